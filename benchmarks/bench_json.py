@@ -0,0 +1,114 @@
+"""Compare the JSON backends of :mod:`sxcu.codec` on payloads like the
+ones returned by sxcu.net.
+
+The backends which aren't installed are skipped. Run it with::
+
+    python benchmarks/bench_json.py
+"""
+import argparse
+import time
+import typing as T
+
+from sxcu import codec
+
+UPLOAD = {
+    "url": "https://sxcu.net/abcdef",
+    "del_url": "https://sxcu.net/api/files/delete/abcdef/0123456789abcdef",
+    "thumb": "https://sxcu.net/t/abcdef.jpeg",
+}
+OG_PROPERTIES = {
+    "color": "#ff00ff",
+    "title": "A screenshot",
+    "description": "Uploaded using sxcu",
+    "discord_hide_url": False,
+    "site_name": False,
+}
+
+
+def collection_meta(files: int) -> T.Dict[str, T.Any]:
+    return {
+        "collection_id": "abcdef",
+        "title": "Screenshots",
+        "desc": "All of them",
+        "views": 1234,
+        "creation_time": 1600000000,
+        "public": True,
+        "unlisted": False,
+        "file_views": 98765,
+        "files": [
+            {
+                "id": f"f{i:05d}",
+                "url": f"https://sxcu.net/f{i:05d}.png",
+                "views": i,
+                "viewable": True,
+                "size": 100000 + i,
+                "creation_time": 1600000000 + i,
+                "og_properties": OG_PROPERTIES,
+            }
+            for i in range(files)
+        ],
+    }
+
+
+def subdomains(count: int) -> T.List[T.Dict[str, T.Any]]:
+    return [
+        {
+            "domain": f"sub{i}.sxcu.net",
+            "upload_count": i * 7,
+            "public": bool(i % 3),
+            "img_views": i * 31,
+        }
+        for i in range(count)
+    ]
+
+
+PAYLOADS = {
+    "upload": UPLOAD,
+    "collection_meta.1k": collection_meta(1000),
+    "subdomains.5k": subdomains(5000),
+}
+
+
+def best_time(func: T.Callable[[], T.Any], number: int, repeat: int) -> float:
+    """The best mean time of ``number`` calls out of ``repeat`` rounds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="the best is kept")
+    parser.add_argument(
+        "--seconds", type=float, default=0.2, help="approximate time per round"
+    )
+    args = parser.parse_args()
+
+    codecs = []
+    for name, factory in codec.BACKENDS.items():
+        try:
+            codecs.append(factory())
+        except ImportError:
+            print(f"{name}: not installed")
+    print("%-22s %-8s %12s %12s" % ("payload", "backend", "loads us", "dumps us"))
+    for payload_name, payload in PAYLOADS.items():
+        encoded = codec.BACKENDS["json"]().dumps(payload).encode()
+        # size the rounds using the standard library, the slowest backend.
+        number = max(
+            1, int(args.seconds / best_time(lambda: codecs[-1].loads(encoded), 1, 1))
+        )
+        for backend in codecs:
+            loads = best_time(lambda: backend.loads(encoded), number, args.repeat)
+            dumps = best_time(lambda: backend.dumps(payload), number, args.repeat)
+            print(
+                "%-22s %-8s %12.1f %12.1f"
+                % (payload_name, backend.name, loads * 1e6, dumps * 1e6)
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""Benchmark the overhead of the client itself, without any network.
+
+A transport adapter is mounted on :class:`~sxcu.__client__.RequestClient`
+which reads the request body and answers with canned JSON, so only the
+work done by the library and ``requests`` is measured:
+
+* the time per call of ``upload_file``, ``create_link``, ``file_meta`` and
+  ``list_subdomain``,
+* the throughput of :class:`~sxcu.multipart.MultipartEncoder`,
+* the peak Python memory of an upload per file size, using
+  :mod:`tracemalloc`,
+* the uploads per second of ``upload_many`` per concurrency, with a
+  simulated latency.
+
+The results can be saved as a baseline and later runs compared to it;
+the script exits with status 1 if a result is worse than the baseline by
+more than ``--threshold``. The times per call are compared relative to
+a reference workload measured in the same run, which evens out some of the
+noise of shared machines, but they still depend on the machine. No
+baseline is committed: record it on the machine used for comparing, from
+the code to compare against, like the main branch.
+
+Run it with::
+
+    # on the main branch
+    python benchmarks/bench_offline.py --save benchmarks/baseline.json
+    # on the branch with the changes
+    python benchmarks/bench_offline.py --compare benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import typing as T
+
+import requests
+from requests.adapters import BaseAdapter
+
+from sxcu import SXCU
+from sxcu.__client__ import RequestClient
+from sxcu.multipart import MultipartEncoder
+
+MiB = 1024 * 1024
+REFERENCE = "call.reference.us"
+
+UPLOAD = {
+    "url": "https://sxcu.net/abc",
+    "del_url": "https://sxcu.net/api/files/delete/abc/token",
+    "thumb": "https://sxcu.net/t/abc.jpeg",
+}
+LINK = {"url": "https://sxcu.net/abc", "del_url": ""}
+META = {"id": "abc", "url": "https://sxcu.net/abc", "views": 1, "size": 1024}
+SUBDOMAINS = [
+    {"domain": f"sub{i}.sxcu.net", "upload_count": i, "public": True, "img_views": i}
+    for i in range(500)
+]
+
+
+class _Transport(BaseAdapter):
+    """Answers like sxcu.net after reading the whole request body."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        super().__init__()
+        self.latency = latency
+        self.bodies = {
+            path: json.dumps(body).encode()
+            for path, body in (
+                ("/files/create", UPLOAD),
+                ("/links/create", LINK),
+                ("/subdomains", SUBDOMAINS),
+                ("/files/", META),
+            )
+        }
+
+    def send(self, request: requests.PreparedRequest, **kwargs: T.Any) -> T.Any:
+        body = request.body
+        if hasattr(body, "read"):
+            while body.read(64 * 1024):
+                pass
+        elif body is not None and not isinstance(body, (bytes, str)):
+            for _ in body:
+                pass
+        if self.latency:
+            time.sleep(self.latency)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = next(
+            content for path, content in self.bodies.items() if path in request.url
+        )
+        response.headers["Content-Type"] = "application/json"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+def _client(latency: float = 0.0, pool_maxsize: int = 10) -> SXCU:
+    transport = _Transport(latency)
+    client = RequestClient(
+        transport=transport, rate_limiter=False, pool_maxsize=pool_maxsize
+    )
+    return SXCU(request_client=client)
+
+
+def _per_call(func: T.Callable[[], T.Any], number: int) -> float:
+    """The mean time of ``number`` calls, in seconds."""
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - start) / number
+
+
+def _reference() -> None:
+    # plain Python and requests work, unchanged by the library, used to
+    # scale the timings to the speed of the machine during the run.
+    json.loads(json.dumps(SUBDOMAINS))
+    requests.Request("POST", "https://sxcu.net/api/", data={"a": "b"}).prepare()
+
+
+def bench_calls(number: int, repeat: int) -> T.Dict[str, float]:
+    sxcu = _client()
+    data = os.urandom(16 * 1024)
+
+    def list_subdomain() -> None:
+        # measure fetching and parsing the list, not the cache.
+        sxcu.subdomains().invalidate()
+        sxcu.list_subdomain(10)
+
+    calls = {
+        "reference": _reference,
+        "upload_file": lambda: sxcu.upload_file(fileobj=data, filename="a.png"),
+        "create_link": lambda: sxcu.create_link("https://example.com"),
+        "file_meta": lambda: sxcu.file_meta("abc"),
+        "list_subdomain": list_subdomain,
+    }
+    best = dict.fromkeys(calls, float("inf"))
+    # interleave the calls, so that a slow period affects all of them.
+    for _ in range(repeat):
+        for name, func in calls.items():
+            best[name] = min(best[name], _per_call(func, number))
+    sxcu.close()
+    results = {f"call.{name}.us": value * 1e6 for name, value in best.items()}
+    return results
+
+
+def bench_encoder(size: int, repeat: int) -> T.Dict[str, float]:
+    data = os.urandom(size)
+    best = float("inf")
+    for _ in range(repeat):
+        encoder = MultipartEncoder({"token": "t"}, "file", data, "a.png")
+        start = time.perf_counter()
+        while encoder.read(64 * 1024):
+            pass
+        best = min(best, time.perf_counter() - start)
+    return {"multipart.throughput.MiBps": size / MiB / best}
+
+
+def bench_memory(sizes: T.Sequence[int]) -> T.Dict[str, float]:
+    results = {}
+    sxcu = _client()
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            path = os.path.join(directory, f"{size}.bin")
+            with open(path, "wb") as file:
+                for _ in range(size // MiB):
+                    file.write(os.urandom(MiB))
+            sxcu.upload_file(path)  # warm up
+            tracemalloc.start()
+            sxcu.upload_file(path)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results[f"memory.upload.{size // MiB}MiB.KiB"] = peak / 1024
+    sxcu.close()
+    return results
+
+
+def bench_concurrency(
+    levels: T.Sequence[int], files: int, latency: float
+) -> T.Dict[str, float]:
+    results = {}
+    data = os.urandom(64 * 1024)
+    for concurrency in levels:
+        with _client(latency, pool_maxsize=concurrency) as sxcu:
+            start = time.perf_counter()
+            outcomes = list(sxcu.upload_many([data] * files, concurrency))
+            total = time.perf_counter() - start
+        assert all(outcome.ok for outcome in outcomes)
+        results[f"upload_many.c{concurrency}.per_s"] = files / total
+    return results
+
+
+def higher_is_better(name: str) -> bool:
+    return name.endswith(("per_s", "MiBps"))
+
+
+def compare(
+    results: T.Mapping[str, float], baseline: T.Mapping[str, float], threshold: float
+) -> T.List[str]:
+    """Returns a message for every result worse than the baseline by more
+    than ``threshold``, a fraction of the baseline. The times per call
+    are scaled by the ratio of the reference times.
+    """
+    regressions = []
+    scale = 1.0
+    if baseline.get(REFERENCE) and results.get(REFERENCE):
+        scale = results[REFERENCE] / baseline[REFERENCE]
+    for name, value in sorted(results.items()):
+        base = baseline.get(name)
+        if not base or name == REFERENCE:
+            continue
+        if name.startswith("call."):
+            base *= scale
+        change = (value - base) / base
+        if higher_is_better(name):
+            change = -change
+        if change > threshold:
+            regressions.append(
+                "%s: %.1f, baseline %.1f (%+.0f%%)" % (name, value, base, change * 100)
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=300, help="calls per round")
+    parser.add_argument("--repeat", type=int, default=7, help="the best is kept")
+    parser.add_argument(
+        "--memory-sizes", type=int, nargs="+", default=[1, 16, 64], help="MiB"
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--files", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=10, help="milliseconds")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare to this baseline JSON file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.3,
+        help="fail if a result is worse than the baseline by this fraction, "
+        "times per call are scaled to the reference workload",
+    )
+    args = parser.parse_args()
+    if args.compare and not os.path.exists(args.compare):
+        parser.error(f"no baseline at {args.compare}, record one using --save")
+
+    results: T.Dict[str, float] = {}
+    results.update(bench_calls(args.number, args.repeat))
+    results.update(bench_encoder(64 * MiB, args.repeat))
+    results.update(bench_memory([size * MiB for size in args.memory_sizes]))
+    results.update(bench_concurrency(args.concurrency, args.files, args.latency / 1000))
+    for name, value in results.items():
+        print("%-36s %12.1f" % (name, value))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "results": {k: round(v, 3) for k, v in results.items()},
+                },
+                file,
+                indent=2,
+                sort_keys=True,
+            )
+            file.write("\n")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for message in regressions:
+            print("REGRESSION " + message, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("no regression beyond %.0f%%" % (args.threshold * 100))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark the connection reuse of :class:`sxcu.__client__.RequestClient`.
+
+A local HTTP/1.1 server is started which answers every request with a small
+JSON body, and the time taken for ``N`` requests is compared between
+
+* bare :func:`requests.get`, which opens a new connection every call (the
+  old behaviour), and
+* a :class:`~sxcu.__client__.RequestClient`, which keeps the connection alive.
+
+The numbers only include the TCP handshake, as the server is plain HTTP.
+Against sxcu.net the saving is larger because the TLS handshake is also
+skipped.
+
+Run it with::
+
+    python benchmarks/bench_sessions.py --requests 500
+"""
+import argparse
+import http.server
+import socketserver
+import threading
+import time
+
+import requests
+
+from sxcu.__client__ import RequestClient
+
+BODY = b'{"url": "https://sxcu.net/abc", "del_url": "", "thumb": ""}'
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:  # noqa N802
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args) -> None:  # noqa ANN002
+        pass
+
+
+class _Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+def _time(func, count: int) -> float:  # noqa ANN001
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    server = _Server(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:%d/api/files/abc" % server.server_address[1]
+    try:
+        bare = _time(lambda: requests.get(url), args.requests)
+        with RequestClient() as client:
+            pooled = _time(lambda: client.get(url), args.requests)
+    finally:
+        server.shutdown()
+
+    for name, total in (("requests.get", bare), ("RequestClient", pooled)):
+        print(
+            "%-14s %8.1f ms total %8.3f ms/request"
+            % (name, total * 1000, total * 1000 / args.requests)
+        )
+    print("speedup: %.2fx" % (bare / pooled))
+
+
+if __name__ == "__main__":
+    main()
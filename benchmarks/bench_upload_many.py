@@ -0,0 +1,88 @@
+"""Benchmark the throughput of :meth:`sxcu.SXCU.upload_many`.
+
+A local HTTP/1.1 server stands in for sxcu.net: it reads each upload and
+answers after ``--latency`` milliseconds, which approximates the round
+trip and processing time of the real API. The same files are uploaded
+with an increasing ``concurrency`` and the uploads per second are printed.
+
+Run it with::
+
+    python benchmarks/bench_upload_many.py --files 64 --size 262144 --latency 50
+"""
+import argparse
+import http.server
+import os
+import socketserver
+import threading
+import time
+
+from sxcu import SXCU
+from sxcu.__client__ import RequestClient
+
+BODY = b'{"url": "https://sxcu.net/abc", "del_url": "", "thumb": ""}'
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency = 0.0
+
+    def do_POST(self) -> None:  # noqa N802
+        remaining = int(self.headers["Content-Length"])
+        while remaining:
+            remaining -= len(self.rfile.read(min(remaining, 65536)))
+        time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args) -> None:  # noqa ANN002
+        pass
+
+
+class _Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+    request_queue_size = 64
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=64)
+    parser.add_argument("--size", type=int, default=256 * 1024)
+    parser.add_argument("--latency", type=float, default=50, help="milliseconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    _Handler.latency = args.latency / 1000
+    server = _Server(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    subdomain = "http://127.0.0.1:%d" % server.server_address[1]
+    data = os.urandom(args.size)
+    try:
+        baseline = None
+        for concurrency in args.concurrency:
+            client = RequestClient(pool_maxsize=concurrency)
+            with SXCU(subdomain, request_client=client) as sxcu:
+                start = time.perf_counter()
+                outcomes = list(sxcu.upload_many([data] * args.files, concurrency))
+                total = time.perf_counter() - start
+            assert all(outcome.ok for outcome in outcomes)
+            rate = args.files / total
+            baseline = baseline or rate
+            print(
+                "concurrency %3d %8.1f uploads/s %8.1f MiB/s %6.2fx"
+                % (
+                    concurrency,
+                    rate,
+                    rate * args.size / 2**20,
+                    rate / baseline,
+                )
+            )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,473 @@
+"""
+
+    __async_client__.py
+    ~~~~~~~~~~~~~~~~~~~
+
+    This module wraps around ``aiohttp`` for logging and checking
+    purpose. It is the asyncio counterpart of ``__client__.py``.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+import typing as T
+
+from . import codec
+from .__logger__ import logger
+from ._utils import parse_retry_after
+from .coalesce import AsyncSingleFlight, coalesce_key
+from .constants import DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE, HEADERS
+from .exceptions import SXCUConnectionError, SXCUError
+from .hooks import Hooks, RequestEvent
+from .multipart import UploadProgress
+from .ratelimit import RateLimiter, RateLimitStatus
+from .retry import DEFAULT_RETRY_POLICY, RetryPolicy, RewindableBody, log_retry
+
+__all__ = ["AsyncRequestClient", "AsyncResponse"]
+
+
+def _import_aiohttp() -> T.Any:
+    try:
+        import aiohttp  # pylint: disable=import-outside-toplevel
+    except ImportError as e:  # pragma: no cover
+        raise ImportError(
+            "aiohttp is required for the asyncio client. "
+            "Install it using `pip install sxcu[async]`."
+        ) from e
+    return aiohttp
+
+
+class AsyncResponse:
+    """A fully read response returned by :class:`AsyncRequestClient`.
+    It has the same interface as :class:`requests.Response` for the parts
+    used in this library. The ``content`` of a request sent with
+    ``stream=True`` is empty, its body isn't read.
+    """
+
+    def __init__(
+        self, url: str, status_code: int, headers: T.Any, content: bytes
+    ) -> None:
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> T.Any:
+        return codec.loads(self.content)
+
+
+class _ProgressReport:
+    """Counts the bytes of a request body sent, for a ``progress``
+    callback.
+    """
+
+    def __init__(
+        self, callback: T.Callable[[UploadProgress], None], total: T.Optional[int]
+    ) -> None:
+        self.callback = callback
+        self.total = total
+        self.sent = 0
+        self.started = time.perf_counter()
+
+    def __call__(self, size: int) -> None:
+        self.sent += size
+        elapsed = time.perf_counter() - self.started
+        self.callback(
+            UploadProgress(
+                self.sent,
+                self.total,
+                elapsed,
+                self.sent / elapsed if elapsed else 0.0,
+            )
+        )
+
+
+async def _on_chunk_sent(session: T.Any, context: T.Any, params: T.Any) -> None:
+    report = context.trace_request_ctx
+    if isinstance(report, _ProgressReport):
+        report(len(params.chunk))
+
+
+class AsyncRequestClient:
+    """:class:`AsyncRequestClient` is internally used by
+    :class:`~.AsyncSXCU` to communicate using ``aiohttp``.
+
+    The :class:`aiohttp.ClientSession` is created lazily in the running
+    event loop and keeps connections alive between calls. The number of
+    requests in flight can be bounded using ``max_concurrency``, extra
+    requests wait for a free slot. Cancelling a call releases its slot and
+    connection. Rate limiting, retries and :attr:`hooks` work like in
+    :class:`~.RequestClient`.
+
+    The client can be used as an async context manager, which awaits
+    :meth:`close` on exit.
+    """
+
+    def __init__(
+        self,
+        headers: dict = None,
+        *,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        max_concurrency: T.Optional[int] = None,
+        timeout: T.Optional[float] = None,
+        rate_limiter: T.Union[RateLimiter, bool, None] = None,
+        retry: T.Union[RetryPolicy, bool, None] = None,
+        coalesce: bool = True,
+    ) -> None:
+        """This initiate the handlers.
+
+        Parameters
+        ==========
+        headers : :class:`dict`, optional
+            The extra header needed to be added to the Request.
+        pool_connections : :class:`int`, optional
+            The number of hosts for which connections are kept in the pool.
+        pool_maxsize : :class:`int`, optional
+            The maximum number of connections per host.
+        max_concurrency : :class:`int`, optional
+            The maximum number of requests in flight. By default, it isn't
+            bounded other than by the connection pool.
+        timeout : :class:`float`, optional
+            The total timeout in seconds for a request.
+        rate_limiter : :class:`~.RateLimiter`, optional
+            The limiter used for scheduling the requests. By default, every
+            client has its own limiter, pass the same one to clients which
+            should share their budget. Pass ``False`` to disable rate
+            limiting.
+        retry : :class:`~.RetryPolicy`, optional
+            The policy for retrying connection errors and ``429`` or ``5xx``
+            responses. Pass ``False`` to disable retries.
+        coalesce : :class:`bool`, optional
+            Whether identical ``GET`` requests sent while one is already in
+            flight share its response instead of being sent again.
+        """
+        if headers and isinstance(headers, dict):
+            self.headers = headers
+        else:
+            self.headers = HEADERS
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        if rate_limiter is None or rate_limiter is True:
+            rate_limiter = RateLimiter()
+        self.rate_limiter: T.Optional[RateLimiter] = rate_limiter or None
+        if retry is None or retry is True:
+            retry = DEFAULT_RETRY_POLICY
+        self.retry_policy: T.Optional[RetryPolicy] = retry or None
+        self.hooks = Hooks()
+        self.single_flight = AsyncSingleFlight() if coalesce else None
+        self._session = None
+        self._semaphore: T.Optional[asyncio.Semaphore] = None
+        self._loop = None
+        self._closing: T.Set[asyncio.Future] = set()
+        logger.debug("Request Headers: %s", self.headers)
+
+    def _create_session(self) -> T.Any:
+        aiohttp = _import_aiohttp()
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_connections * self.pool_maxsize,
+            limit_per_host=self.pool_maxsize,
+        )
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        trace = aiohttp.TraceConfig()
+        trace.on_request_chunk_sent.append(_on_chunk_sent)
+        return aiohttp.ClientSession(
+            connector=connector, timeout=timeout, trace_configs=[trace]
+        )
+
+    @property
+    def session(self) -> T.Any:
+        """The underlying :class:`aiohttp.ClientSession`. It is bound to
+        the running event loop and recreated if used from another loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._discard_session()
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+            self._semaphore = (
+                asyncio.Semaphore(self.max_concurrency)
+                if self.max_concurrency
+                else None
+            )
+            self._loop = loop
+        return self._session
+
+    def _discard_session(self) -> None:
+        """Close the session of the previous event loop, it can't be used
+        from another one.
+        """
+        session, loop = self._session, self._loop
+        self._session = None
+        if session is None or session.closed:
+            return
+        if loop.is_running():
+            # the loop runs in another thread, close the session there.
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+            return
+        if loop.is_closed():
+            # the connections went with the loop, so closing the connector
+            # has nothing to wait for and can be done in the running one.
+            connector = session.connector
+            session.detach()
+            if connector is not None:
+                task = asyncio.ensure_future(connector.close())
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+            return
+        # this thread runs the new loop, run the stopped one in another.
+        closer = threading.Thread(
+            target=loop.run_until_complete, args=(session.close(),)
+        )
+        closer.start()
+        closer.join()
+
+    async def close(self) -> None:
+        """Close the session and all the pooled connections."""
+        if self._loop is not asyncio.get_running_loop():
+            self._discard_session()
+        elif self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._semaphore = None
+        self._loop = None
+
+    def rate_limits(self) -> T.Dict[str, RateLimitStatus]:
+        """Returns the current budget of every known rate-limit bucket.
+        See :meth:`.RateLimiter.status`.
+        """
+        if self.rate_limiter is None:
+            return {}
+        return self.rate_limiter.status()
+
+    async def _acquire_rate_limit(self, method: str, url: str) -> float:
+        waited = 0.0
+        delay = self.rate_limiter.reserve(method, url)
+        while delay > 0:
+            await asyncio.sleep(delay)
+            waited += delay
+            delay = self.rate_limiter.reserve(method, url)
+        return waited
+
+    async def __aenter__(self) -> "AsyncRequestClient":
+        return self
+
+    async def __aexit__(self, *args: T.Any) -> None:
+        await self.close()
+
+    @staticmethod
+    def _form_data(data: T.Optional[dict], files: dict) -> T.Any:
+        aiohttp = _import_aiohttp()
+        form = aiohttp.FormData()
+        for key, value in (data or {}).items():
+            form.add_field(key, str(value))
+        for key, value in files.items():
+            filename = None
+            if isinstance(value, tuple):
+                filename, value = value
+            if filename is None:
+                filename = os.path.basename(str(getattr(value, "name", None) or key))
+            # file objects and async iterables are streamed by aiohttp.
+            form.add_field(key, value, filename=filename)
+        # the multipart body, whose size is known unless a file's isn't.
+        return form()
+
+    async def _send_once(
+        self,
+        method: str,
+        url: str,
+        headers: dict,
+        event: T.Optional[RequestEvent],
+        **kwargs,  # noqa ANN003
+    ) -> AsyncResponse:
+        stream = kwargs.pop("stream", False)
+        progress = kwargs.pop("progress", None)
+        if progress is not None:
+            # reported by _on_chunk_sent, again from 0 on every attempt.
+            total = getattr(kwargs.get("data"), "size", None)
+            kwargs["trace_request_ctx"] = _ProgressReport(progress, total)
+        if self.rate_limiter is not None:
+            waited = await self._acquire_rate_limit(method, url)
+            if waited and event is not None:
+                event.delay = waited
+                event.timings["throttle"] += waited
+                self.hooks.emit("throttled", event)
+        session = self.session
+        semaphore = self._semaphore
+        if semaphore is not None:
+            await semaphore.acquire()
+        sent = time.perf_counter()
+        try:
+            async with session.request(method, url, headers=headers, **kwargs) as resp:
+                content = b"" if stream else await resp.read()
+                con = AsyncResponse(str(resp.url), resp.status, resp.headers, content)
+                if event is not None:
+                    length = resp.request_info.headers.get("Content-Length")
+                    event.bytes_sent = int(length) if length else None
+        finally:
+            if event is not None:
+                event.timings["send"] += time.perf_counter() - sent
+            if semaphore is not None:
+                semaphore.release()
+        if self.rate_limiter is not None:
+            self.rate_limiter.update(method, url, con.headers)
+        return con
+
+    def _emit_error(self, event: T.Optional[RequestEvent], error: Exception) -> None:
+        if event is not None:
+            event.error = error
+            event.timings["total"] = time.perf_counter() - event.start
+            self.hooks.emit("error", event)
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        headers: T.Optional[dict],
+        **kwargs,  # noqa ANN003
+    ) -> AsyncResponse:
+        headers = self.headers if headers is None else headers
+        key = None
+        if self.single_flight is not None:
+            key = coalesce_key(method, url, headers, kwargs)
+        if key is None:
+            return await self._request_once(method, url, headers, **kwargs)
+        con, shared = await self.single_flight.do(
+            key, lambda: self._request_once(method, url, headers, **kwargs)
+        )
+        if shared:
+            logger.debug(
+                "%s %s shared the response of a request in flight.", method, url
+            )
+            if self.hooks:
+                event = RequestEvent(method, url)
+                event.status_code = con.status_code
+                event.timings["total"] = time.perf_counter() - event.start
+                self.hooks.emit("coalesced", event)
+        return con
+
+    async def _request_once(
+        self,
+        method: str,
+        url: str,
+        headers: dict,
+        *,
+        data: T.Optional[dict] = None,
+        files: T.Optional[dict] = None,
+        **kwargs,  # noqa ANN003
+    ) -> AsyncResponse:
+        aiohttp = _import_aiohttp()
+        if not files and isinstance(data, dict):
+            data = {key: str(value) for key, value in data.items()}
+        hooks = self.hooks
+        event = RequestEvent(method, url) if hooks else None
+        if event is not None:
+            hooks.emit("request_start", event)
+        policy = self.retry_policy
+        body = RewindableBody({"files": files, "data": data})
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        attempt = 0
+        while True:
+            attempt += 1
+            # a form can be sent only once, build it again for every attempt.
+            payload = self._form_data(data, files) if files else data
+            try:
+                con = await self._send_once(
+                    method, url, headers, event, data=payload, **kwargs
+                )
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                delay = None
+                if policy is not None and body.rewindable:
+                    delay = policy.retry_delay(attempt, loop.time() - start)
+                if delay is None:
+                    error = SXCUConnectionError(str(e) or repr(e))
+                    self._emit_error(event, error)
+                    raise error from e
+                log_retry(method, url, attempt, repr(e), delay)
+                if event is not None:
+                    event.error = e
+            except SXCUError as e:
+                self._emit_error(event, e)
+                raise
+            else:
+                delay = None
+                if (
+                    policy is not None
+                    and con.status_code in policy.retry_statuses
+                    and body.rewindable
+                ):
+                    delay = policy.retry_delay(
+                        attempt, loop.time() - start, parse_retry_after(con.headers)
+                    )
+                if delay is None:
+                    break
+                log_retry(method, url, attempt, con.status_code, delay)
+                if event is not None:
+                    # not the error of a previous attempt
+                    event.status_code, event.error = con.status_code, None
+            if event is not None:
+                event.delay = delay
+                event.timings["backoff"] += delay
+                hooks.emit("retry", event)
+                event.attempt += 1
+            await asyncio.sleep(delay)
+            body.rewind()
+        if event is not None:
+            event.status_code = con.status_code
+            event.error = None
+            event.timings["total"] = time.perf_counter() - event.start
+            hooks.emit("request_end", event)
+        logger.debug("Received Headers from %s: %s", url, con.headers)
+        logger.debug("status_code returned was:%s", con.status_code)
+        if logger.isEnabledFor(logging.INFO) and not kwargs.get("stream"):
+            logger.info("Received Response: %s", con.text)
+        return con
+
+    async def post(
+        self, url: str, headers: dict = None, **kwargs  # noqa ANN003
+    ) -> AsyncResponse:
+        """Send a POST request. Accepts ``data`` and ``files`` like
+        :meth:`.RequestClient.post`, the files are streamed. ``progress``
+        is called with an :class:`~.UploadProgress` after every chunk of
+        the body sent.
+
+        Parameters
+        ==========
+
+        headers : :class:`str`, optional
+            The header needed to be added to the Request.
+
+            .. important ::
+
+                    The header would overide the default header.
+
+        """
+        logger.debug("Post Requests to: %s", url)
+        return await self._request("POST", url, headers, **kwargs)
+
+    async def get(
+        self, url: str, headers: T.Optional[dict] = None, **kwargs  # noqa ANN003
+    ) -> AsyncResponse:
+        """Send a GET request. With ``stream=True``, the body of the
+        response isn't read.
+
+        Parameters
+        ==========
+
+        headers:
+            The header needed to be added to the Request.
+
+        .. important ::
+            The :attr:`headers` would overide the default header.
+
+        """
+        logger.debug("Get Requests to %s", url)
+        return await self._request("GET", url, headers, **kwargs)
@@ -6,39 +6,291 @@
     This module wraps aroud ``Requests`` for logging
     and checking purpose.
 """
+import logging
+import os
+import threading
+import time
 import typing as T
 
-import requests  # pylint: disable=import-error
-
 from .__logger__ import logger
-from .constants import HEADERS
+from ._utils import parse_retry_after
+from .coalesce import SingleFlight, coalesce_key
+from .constants import DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE, HEADERS
+from .exceptions import SXCUConnectionError, SXCUError
+from .hooks import Hooks, RequestEvent
+from .ratelimit import RateLimiter, RateLimitStatus
+from .retry import DEFAULT_RETRY_POLICY, RetryPolicy, RewindableBody, log_retry
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import requests  # pylint: disable=import-error
 
 __all__ = ["RequestClient"]
 
 
+def _import_requests() -> T.Any:
+    # importing requests takes longer than the rest of the package, only
+    # do it once a request is sent.
+    import requests  # pylint: disable=import-outside-toplevel,import-error
+    import requests.adapters  # pylint: disable=import-outside-toplevel
+
+    return requests
+
+
 class RequestClient:
     """:class:`RequestClient` is internally used to communicated with
     ``Requests`` Library.
+
+    Each client owns a keep-alive :class:`requests.Session` so that
+    connections to sxcu.net, its subdomains and cancer-co.de are reused
+    between calls instead of doing a new TCP and TLS handshake every time.
+    The session is created lazily, is safe to share between threads and is
+    recreated automatically in a forked child process, as sockets can't be
+    shared with the parent.
+
+    Requests are scheduled by a :class:`~.RateLimiter` using the rate-limit
+    headers returned by sxcu.net, so that a request which would exceed the
+    budget waits until the bucket resets instead of failing with ``429``.
+    Transient failures are retried according to a :class:`~.RetryPolicy`.
+    Callbacks can be registered on :attr:`hooks` to observe the requests,
+    see :mod:`sxcu.hooks`.
+
+    The client can be used as a context manager, which calls :meth:`close`
+    on exit.
     """
 
-    def __init__(self, headers: dict = None) -> None:
+    def __init__(
+        self,
+        headers: dict = None,
+        *,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        transport: T.Optional["requests.adapters.BaseAdapter"] = None,
+        rate_limiter: T.Union[RateLimiter, bool, None] = None,
+        retry: T.Union[RetryPolicy, bool, None] = None,
+        coalesce: bool = True,
+    ) -> None:
         """This initiate the handlers.
         Parameters
         ==========
         headers : :class:`dict`, optional
             The extra header needed to be added to the Request.
+        pool_connections : :class:`int`, optional
+            The number of hosts for which connections are kept in the pool.
+        pool_maxsize : :class:`int`, optional
+            The maximum number of connections kept alive per host. Set this
+            to the number of threads sharing the client.
+        transport : :class:`requests.adapters.BaseAdapter`, optional
+            A custom transport adapter, mounted for both ``http://`` and
+            ``https://`` instead of the default pooled
+            :class:`~requests.adapters.HTTPAdapter`.
+        rate_limiter : :class:`~.RateLimiter`, optional
+            The limiter used for scheduling the requests. By default, every
+            client has its own limiter, pass the same one to clients which
+            should share their budget. Pass ``False`` to disable rate
+            limiting.
+        retry : :class:`~.RetryPolicy`, optional
+            The policy for retrying connection errors and ``429`` or ``5xx``
+            responses. Pass ``False`` to disable retries.
+        coalesce : :class:`bool`, optional
+            Whether identical ``GET`` requests sent while one is already in
+            flight share its response instead of being sent again.
 
         """
         if headers and isinstance(headers, dict):
             self.headers = headers
         else:
             self.headers = HEADERS
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.transport = transport
+        if rate_limiter is None or rate_limiter is True:
+            rate_limiter = RateLimiter()
+        self.rate_limiter: T.Optional[RateLimiter] = rate_limiter or None
+        if retry is None or retry is True:
+            retry = DEFAULT_RETRY_POLICY
+        self.retry_policy: T.Optional[RetryPolicy] = retry or None
+        self.hooks = Hooks()
+        self.single_flight = SingleFlight() if coalesce else None
+        self._session: T.Optional["requests.Session"] = None
+        self._session_pid: T.Optional[int] = None
+        self._lock = threading.Lock()
         logger.debug("Request Headers: %s", self.headers)
 
+    def _create_session(self) -> "requests.Session":
+        requests = _import_requests()
+        session = requests.Session()
+        if self.transport is not None:
+            adapter = self.transport
+        else:
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=self.pool_connections,
+                pool_maxsize=self.pool_maxsize,
+            )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @property
+    def session(self) -> "requests.Session":
+        """The underlying :class:`requests.Session`. It is created on first
+        use and recreated if the process has forked since then.
+        """
+        pid = os.getpid()
+        session = self._session
+        if session is not None and self._session_pid == pid:
+            return session
+        with self._lock:
+            if self._session is None or self._session_pid != pid:
+                if self._session is not None:
+                    logger.debug("Process forked, creating a new session.")
+                    # Don't close the parent's session, the sockets
+                    # still belong to it.
+                self._session = self._create_session()
+                self._session_pid = pid
+            return self._session
+
+    def close(self) -> None:
+        """Close the session and all the pooled connections. The client
+        can still be used after this, a new session is created when needed.
+        """
+        with self._lock:
+            if self._session is not None and self._session_pid == os.getpid():
+                self._session.close()
+            self._session = None
+            self._session_pid = None
+
+    def rate_limits(self) -> T.Dict[str, RateLimitStatus]:
+        """Returns the current budget of every known rate-limit bucket.
+        See :meth:`.RateLimiter.status`.
+        """
+        if self.rate_limiter is None:
+            return {}
+        return self.rate_limiter.status()
+
+    def __enter__(self) -> "RequestClient":
+        return self
+
+    def __exit__(self, *args: T.Any) -> None:
+        self.close()
+
+    def _send(
+        self, method: str, url: str, headers: dict, **kwargs  # noqa ANN003
+    ) -> "requests.Response":
+        requests = _import_requests()
+        hooks = self.hooks
+        event = RequestEvent(method, url) if hooks else None
+        if event is not None:
+            hooks.emit("request_start", event)
+        policy = self.retry_policy
+        body = RewindableBody(kwargs) if policy is not None else None
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                if self.rate_limiter is not None:
+                    waited = self.rate_limiter.acquire(method, url)
+                    if waited and event is not None:
+                        event.delay = waited
+                        event.timings["throttle"] += waited
+                        hooks.emit("throttled", event)
+                sent = time.perf_counter()
+                try:
+                    con = self.session.request(method, url, headers=headers, **kwargs)
+                finally:
+                    if event is not None:
+                        event.timings["send"] += time.perf_counter() - sent
+            except (requests.ConnectionError, requests.Timeout) as e:
+                delay = None
+                if policy is not None and body.rewindable:
+                    delay = policy.retry_delay(attempt, time.monotonic() - start)
+                if delay is None:
+                    error = SXCUConnectionError(str(e))
+                    self._emit_error(event, error)
+                    raise error from e
+                log_retry(method, url, attempt, e, delay)
+                if event is not None:
+                    event.error = e
+            except SXCUError as e:
+                self._emit_error(event, e)
+                raise
+            else:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.update(method, url, con.headers)
+                delay = None
+                if (
+                    policy is not None
+                    and con.status_code in policy.retry_statuses
+                    and body.rewindable
+                ):
+                    delay = policy.retry_delay(
+                        attempt,
+                        time.monotonic() - start,
+                        parse_retry_after(con.headers),
+                    )
+                if delay is None:
+                    if event is not None:
+                        event.status_code = con.status_code
+                        event.error = None
+                        length = con.request.headers.get("Content-Length")
+                        event.bytes_sent = int(length) if length else None
+                        event.timings["total"] = time.perf_counter() - event.start
+                        hooks.emit("request_end", event)
+                    return con
+                log_retry(method, url, attempt, con.status_code, delay)
+                con.close()
+                if event is not None:
+                    # not the error of a previous attempt
+                    event.status_code, event.error = con.status_code, None
+            if event is not None:
+                event.delay = delay
+                event.timings["backoff"] += delay
+                hooks.emit("retry", event)
+                event.attempt += 1
+            policy.sleep(delay)
+            body.rewind()
+
+    def _emit_error(self, event: T.Optional[RequestEvent], error: Exception) -> None:
+        if event is not None:
+            event.error = error
+            event.timings["total"] = time.perf_counter() - event.start
+            self.hooks.emit("error", event)
+
+    def _emit_coalesced(self, method: str, url: str, con: T.Any) -> None:
+        logger.debug("%s %s shared the response of a request in flight.", method, url)
+        if self.hooks:
+            event = RequestEvent(method, url)
+            event.status_code = con.status_code
+            event.timings["total"] = time.perf_counter() - event.start
+            self.hooks.emit("coalesced", event)
+
+    def _request(
+        self, method: str, url: str, headers: T.Optional[dict], **kwargs  # noqa ANN003
+    ) -> "requests.Response":
+        headers = self.headers if headers is None else headers
+        key = None
+        if self.single_flight is not None:
+            key = coalesce_key(method, url, headers, kwargs)
+        if key is None:
+            con = self._send(method, url, headers, **kwargs)
+        else:
+            con, shared = self.single_flight.do(
+                key, lambda: self._send(method, url, headers, **kwargs)
+            )
+            if shared:
+                self._emit_coalesced(method, url, con)
+                return con
+        logger.debug("Received Headers from %s: %s", url, con.headers)
+        logger.debug("status_code returned was:%s", con.status_code)
+        # a streamed body is left to the caller.
+        if logger.isEnabledFor(logging.INFO) and not kwargs.get("stream"):
+            logger.info("Received Response: %s", con.text)
+        return con
+
     def post(
         self, url: str, headers: dict = None, **kwargs  # noqa ANN003
-    ) -> requests.models.Response:
-        """Pass all the parameter to :func:`requests.post`.
+    ) -> "requests.Response":
+        """Pass all the parameter to :meth:`requests.Session.post`.
         Also, adding the necessary headers. Also, the newly passed header
         would overide the default.
 
@@ -54,18 +306,12 @@ class RequestClient:
 
         """
         logger.debug("Post Requests to: %s", url)
-        headers = self.headers if headers is None else headers
-        con = requests.post(url, headers=headers, **kwargs)
-        logger.debug("Received Headers from %s: %s", url, con.headers)
-        logger.debug("status_code returned was:%s", con.status_code)
-        response = con.text
-        logger.info("Received Response: %s", response)
-        return con
+        return self._request("POST", url, headers, **kwargs)
 
     def get(
         self, url: str, headers: T.Optional[dict] = None, **kwargs  # noqa ANN003
-    ) -> requests.models.Response:
-        """Pass all the parameter to :func:`requests.get`.
+    ) -> "requests.Response":
+        """Pass all the parameter to :meth:`requests.Session.get`.
         Also, adding the necessary headers. Also, the newly passed header
         would overide the default.
 
@@ -80,10 +326,4 @@ class RequestClient:
 
         """
         logger.debug("Get Requests to %s", url)
-        headers = self.headers if headers is None else headers
-        con = requests.get(url=url, headers=headers, **kwargs)
-        logger.debug("Received Headers from %s: %s", url, con.headers)
-        # Don't use json instead implement a custom class here?
-        response = con.text
-        logger.info("Received Response: %s", response)
-        return con
+        return self._request("GET", url, headers, **kwargs)
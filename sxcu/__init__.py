@@ -10,4 +10,14 @@
 """
 from .__version__ import *  # noqa F401
 from .og_properties import OGProperties  # noqa F401
+from .profile import UploadProfile  # noqa F401
 from .sxcu import SXCU  # noqa F401
+
+
+def __getattr__(name: str) -> object:
+    # asyncio is slow to import, only import it when the client is used.
+    if name == "AsyncSXCU":
+        from .async_sxcu import AsyncSXCU  # pylint: disable=import-outside-toplevel
+
+        return AsyncSXCU
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,247 @@
+"""The configuration and request building shared by :class:`~.SXCU` and
+:class:`~.AsyncSXCU`.
+"""
+import abc
+import io
+import typing as T
+import warnings
+
+from . import codec
+from .__logger__ import logger
+from ._utils import get_id_from_url, join_url
+from .constants import DefaultDomains
+from .journal import UploadJournal
+from .meta_cache import MetadataCache
+from .og_properties import OGProperties
+from .profile import UploadProfile
+from .results import CollectionMeta, FileMeta
+from .transforms import TransformPipeline
+from .upload_cache import UploadCache
+
+R = T.TypeVar("R", FileMeta, CollectionMeta)
+
+# upload profiles kept per client
+MAX_PROFILES = 128
+
+
+class _SXCUBase(abc.ABC):
+    """Configuration and request building shared by :class:`SXCU`
+    and :class:`~.AsyncSXCU`. Subclasses only send the requests.
+    """
+
+    _shared = None
+    meta_cache: T.Optional[MetadataCache] = None
+
+    def __init__(
+        self,
+        subdomain: str = None,
+        upload_token: str = None,
+        sxcu_config: T.Union[str, dict, io.StringIO] = None,
+        *,
+        file_sxcu: str = None,
+        request_client: T.Any = None,
+        upload_cache: T.Optional[UploadCache] = None,
+        meta_cache: T.Optional[MetadataCache] = None,
+        journal: T.Optional[UploadJournal] = None,
+        transforms: T.Optional[TransformPipeline] = None,
+        api_endpoint: T.Optional[str] = None,
+        upload_text_endpoint: T.Optional[str] = None,
+    ) -> None:
+        """This initialise the handler
+
+        Parameters
+        ==========
+        subdomain : :class:`str`, optional
+            The subdomain you get from sxcu.net
+        upload_token : :class:`str`, optional
+            The upload token that comes along with subdomain
+        sxcu_config : :class:`str`,optional
+            The sxcu configuration you have. Parses only ``RequestURL`` and ``upload_token``.
+
+            .. note ::
+
+                The content in ``.sxcu`` file has more priority than passed parameters.
+        file_sxcu : :class:`str`, optional
+            File location to sxcu configuration. Kept for backwards compatibility.
+        request_client : :class:`~.RequestClient`, optional
+            The client used for sending requests. By default, a new one
+            with its own connection pool is created. Pass a client to
+            configure the pool size or to share connections between
+            several instances.
+        upload_cache : :class:`~.UploadCache`, optional
+            If given, content which was already uploaded with the same
+            options isn't uploaded again, the recorded response is returned
+            instead.
+        meta_cache : :class:`~.MetadataCache`, optional
+            Caches the results of :meth:`file_meta` and
+            :meth:`collection_meta`. Defaults to the class attribute
+            ``meta_cache``, which is also used when they are called on the
+            class.
+        journal : :class:`~.UploadJournal`, optional
+            If given, every upload is recorded in it with its delete URL,
+            so that it can be deleted later, see :class:`~.ExpiryScheduler`.
+        transforms : :class:`~.TransformPipeline`, optional
+            Applied to every file before it is uploaded, for example to
+            strip metadata using :class:`~.StripMetadata`.
+        api_endpoint : :class:`str`, optional
+            The API used for the metadata, collections and the list of
+            subdomains, ``https://sxcu.net/api/`` by default.
+        upload_text_endpoint : :class:`str`, optional
+            Where :meth:`upload_text` posts to,
+            ``https://cancer-co.de/upload`` by default. Together with
+            ``subdomain`` and ``api_endpoint``, this points the client at
+            another server, like :class:`~.FakeSXCU`.
+
+        """
+        self.subdomain = subdomain if subdomain else "https://sxcu.net"
+        self.upload_token = upload_token  # Don't log upload_token
+        self.file_sxcu = sxcu_config
+        self.api_endpoint = api_endpoint or DefaultDomains.API_ENDPOINT.value
+        self.upload_text_endpoint = (
+            upload_text_endpoint or DefaultDomains.UPLOAD_TEXT.value
+        )
+        self.upload_cache = upload_cache
+        self.journal = journal
+        self.transforms = transforms
+        self._profiles: T.Dict[tuple, UploadProfile] = {}
+        if meta_cache is not None:
+            self.meta_cache = meta_cache
+        self.request_handler = (
+            request_client if request_client is not None else self._new_client()
+        )
+        if file_sxcu:
+            warnings.warn(
+                "file_sxcu parameter is deprecated. " "Use sxcu_config instead.",
+                DeprecationWarning,
+                stacklevel=2,
+            )
+            sxcu_config = file_sxcu
+
+        if sxcu_config:
+            if isinstance(sxcu_config, io.StringIO):
+                con = codec.loads(sxcu_config.read())
+            elif isinstance(sxcu_config, dict):
+                con = sxcu_config
+            else:
+                with open(sxcu_config, "rb") as sxcu_file:
+                    con = codec.loads(sxcu_file.read())
+            self.sxcu_config = con
+            # requests url already contain `/api/files/create` remove that.
+            self.subdomain = "/".join(con["RequestURL"].split("/")[:-3])
+            if "Arguments" in con:
+                self.upload_token = con["Arguments"]["token"]
+        logger.debug("subdomain: %s", self.subdomain)
+
+    @staticmethod
+    @abc.abstractmethod
+    def _new_client() -> T.Any:
+        """Returns a new client for an instance."""
+
+    @staticmethod
+    @abc.abstractmethod
+    def _shared_client() -> T.Any:
+        """Returns the client used when the methods are called on the
+        class itself.
+        """
+
+    @classmethod
+    def _shared_instance(cls) -> "_SXCUBase":
+        shared = cls.__dict__.get("_shared")
+        if shared is None:
+            shared = cls(request_client=cls._shared_client())
+            cls._shared = shared
+        return shared
+
+    def _get_api_endpoint(self, default_domain: bool = False) -> str:
+        return (
+            join_url("https://sxcu.net", "/api")
+            if default_domain
+            else join_url(self.subdomain, "/api")
+        )
+
+    def _upload_profile(
+        self,
+        profile: T.Optional[UploadProfile],
+        collection: T.Optional[str],
+        collection_token: T.Optional[str],
+        noembed: T.Optional[bool],
+        og_properties: T.Optional[OGProperties],
+        self_destruct: bool,
+    ) -> UploadProfile:
+        """Returns ``profile`` or the profile of the options, completed with
+        the token and subdomain of the client. The profiles are kept, so the
+        form is only encoded once for the same options.
+        """
+        options = (collection, collection_token, noembed, og_properties, self_destruct)
+        if profile is not None and any(options):
+            raise ValueError("profile can't be combined with the upload options.")
+        key = (profile, options, self.upload_token, self.subdomain)
+        resolved = self._profiles.get(key)
+        if resolved is None:
+            if profile is None:
+                profile = UploadProfile(
+                    collection=collection,
+                    collection_token=collection_token,
+                    noembed=noembed,
+                    self_destruct=self_destruct,
+                    og_properties=og_properties,
+                )
+            resolved = profile.replace(
+                token=profile.token or self.upload_token,
+                subdomain=profile.subdomain or self.subdomain,
+            )
+            if len(self._profiles) >= MAX_PROFILES:
+                self._profiles.clear()
+            self._profiles[key] = resolved
+        return resolved
+
+    def _conditional_headers(self, validators: dict) -> T.Optional[dict]:
+        if not validators:
+            return None
+        headers = dict(self.request_handler.headers)
+        headers.update(validators)
+        return headers
+
+    @staticmethod
+    def _collection_data(
+        title: str, private: bool, unlisted: bool, desc: T.Optional[str]
+    ) -> dict:
+        data = {
+            "title": title,
+            "private": private,
+            "unlisted": unlisted,
+        }
+        if desc:
+            data["desc"] = desc
+        return data
+
+    @staticmethod
+    def _file_id(
+        file_id: T.Optional[str],
+        file_url: T.Optional[str],
+        image_id: T.Optional[str],
+        image_url: T.Optional[str],
+    ) -> str:
+        if image_url is not None:
+            warnings.warn(
+                "The parameter 'image_url' is deprecated. " "Use 'file_url' instead.",
+                DeprecationWarning,
+                stacklevel=3,
+            )
+            if file_url is None:
+                file_url = image_url
+        if image_id is not None:
+            warnings.warn(
+                "The parameter 'image_id' is deprecated. " "Use 'file_id' instead.",
+                DeprecationWarning,
+                stacklevel=3,
+            )
+            if file_id is None:
+                file_id = image_id
+
+        if file_id is None:
+            if file_url is None:
+                raise AttributeError("Either one of file_id or file_url is necessary")
+            else:
+                file_id = get_id_from_url(file_url)
+        return file_id
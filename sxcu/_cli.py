@@ -1,64 +1,161 @@
 """Contains CLI code.
+
+rich and pyperclip are only imported when the output is printed for a
+human, so that ``--json`` starts quickly when called from scripts. The
+batch uploads are in :mod:`sxcu._cli_batch`.
 """
 import argparse
+import contextlib
+import functools
 import logging
+import os
+import re
+import shutil
 import sys
 import tempfile
 import typing
 from pathlib import Path
 
-import pyperclip
-from rich.console import Console
-from rich.logging import RichHandler
-from rich.table import Table
-from rich.theme import Theme
-
+from . import codec
+from .__client__ import RequestClient
+from ._cli_batch import upload_batch
+from .constants import DEFAULT_POOL_MAXSIZE, UPLOAD_CHUNK_SIZE
 from .exceptions import CLIError
+from .subdomains import SubdomainDirectory
 from .sxcu import SXCU
 
-custom_theme = Theme({"error": "bold red", "warning": "magenta", "code": "green"})
-console = Console(theme=custom_theme)
+THEME = {"error": "bold red", "warning": "magenta", "code": "green"}
 SUCCESS_MESSAGE_COLOR = "YELLOW Underline"
 FORMAT = "%(message)s"
-logging.basicConfig(
-    format=FORMAT,
-    handlers=[
-        RichHandler(
-            level=logging.ERROR,
-            console=console,
-            show_time=False,
-            show_path=False,
-            show_level=False,
-        )
-    ],
-)
 logger = logging.getLogger("rich")
 
-parser = argparse.ArgumentParser(prog="sxcu")
+# Input which can't be seeked, like a pipe, is kept in memory up to this
+# size and then spooled to a temporary file.
+STDIN_SPOOL_SIZE = 32 * 1024 * 1024
 
-subparsers = parser.add_subparsers(title="subcommands")
-parser.set_defaults(func=lambda *x: parser.print_help())  # print help by default
+# (offset, magic bytes, extension) used to name input without a filename.
+FILE_SIGNATURES = (
+    (0, b"\x89PNG\r\n\x1a\n", ".png"),
+    (0, b"\xff\xd8\xff", ".jpg"),
+    (0, b"GIF87a", ".gif"),
+    (0, b"GIF89a", ".gif"),
+    (8, b"WEBP", ".webp"),
+    (4, b"ftypqt", ".mov"),
+    (4, b"ftyp", ".mp4"),
+    (0, b"\x1a\x45\xdf\xa3", ".webm"),
+    (0, b"%PDF", ".pdf"),
+)
 
 
-def handle_paste_subcommand(args: typing.Any) -> None:
-    def print_result(result: typing.Dict[str, str]) -> None:
-        pyperclip.copy(result["url"])
-        table = Table(title="Upload Details")
-        table.add_column("Details", justify="center", style="green")
-        table.add_column("URL", justify="center", style="cyan")
-        table.add_row("Upload URL", result["url"])
-        table.add_row("Delete URL", result["del_url"])
-        console.print(table)
+@functools.lru_cache(maxsize=None)
+def get_console(stderr: bool = False) -> typing.Any:
+    """Returns the :class:`rich.console.Console` printing to stdout, or
+    to stderr.
+    """
+    from rich.console import Console  # pylint: disable=import-outside-toplevel
+    from rich.theme import Theme  # pylint: disable=import-outside-toplevel
+
+    return Console(theme=Theme(THEME), stderr=stderr)
+
+
+class LazyRichHandler(logging.Handler):
+    """Prints the records using :class:`rich.logging.RichHandler`, which is
+    only created, importing rich, once a record is logged.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.handler: typing.Optional[logging.Handler] = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.handler is None:
+            # pylint: disable=import-outside-toplevel
+            from rich.logging import RichHandler
+
+            self.handler = RichHandler(
+                console=get_console(),
+                show_time=False,
+                show_path=False,
+                show_level=False,
+            )
+            self.handler.setFormatter(self.formatter)
+        self.handler.emit(record)
+
+
+def setup_logging(plain: bool = False) -> None:
+    handler = logging.StreamHandler() if plain else LazyRichHandler()
+    handler.setLevel(logging.ERROR)
+    logging.basicConfig(format=FORMAT, handlers=[handler])
+
+
+def strip_markup(text: str) -> str:
+    """Remove the rich markup, like ``[code]``, from ``text``."""
+    return re.sub(r"\[/?[a-z ]+\]", "", text)
+
+
+def copy_to_clipboard(text: str) -> None:
+    import pyperclip  # pylint: disable=import-outside-toplevel
+
+    pyperclip.copy(text)
+
+
+def print_result(
+    args: typing.Any,
+    result: typing.Dict[str, str],
+    rows: typing.Sequence[typing.Tuple[str, str]],
+) -> None:
+    """Print the JSON returned by an upload, as a line of JSON with
+    ``--json`` or else as a table of ``rows``, ``(title, key)`` pairs. The
+    URL is copied to the clipboard unless ``--json`` or ``--no-clipboard``
+    is given.
+    """
+    if args.json:
+        print(codec.dumps(result), flush=True)
+        return
+    from rich.table import Table  # pylint: disable=import-outside-toplevel
+
+    clipboard = not args.no_clipboard
+    if clipboard:
+        copy_to_clipboard(result["url"])
+    table = Table(title="Upload Details")
+    table.add_column("Details", justify="center", style="green")
+    table.add_column("URL", justify="center", style="cyan")
+    for title, key in rows:
+        table.add_row(title, result[key])
+    console = get_console()
+    console.print(table)
+    if clipboard:
         console.print(
             "Url has been Copied to Clipboard",
             style=SUCCESS_MESSAGE_COLOR,
             justify="center",
         )
 
+
+def add_output_arguments(subparser: argparse.ArgumentParser) -> None:
+    subparser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the response as a line of JSON, without copying the URL",
+    )
+    subparser.add_argument(
+        "--no-clipboard",
+        action="store_true",
+        help="Don't copy the URL to the clipboard",
+    )
+
+
+parser = argparse.ArgumentParser(prog="sxcu")
+
+subparsers = parser.add_subparsers(title="subcommands")
+parser.set_defaults(func=lambda *x: parser.print_help())  # print help by default
+
+
+def handle_paste_subcommand(args: typing.Any) -> None:
     text = args.text or sys.stdin.read()
     sxcu_handler = SXCU()
     res = sxcu_handler.upload_text(text)
-    print_result(res)
+    print_result(args, res, [("Upload URL", "url"), ("Delete URL", "del_url")])
 
 
 def paste_subcommand() -> None:
@@ -71,45 +168,100 @@ def paste_subcommand() -> None:
         type=str,
         help="The text to upload",
     )
+    add_output_arguments(paste)
     paste.set_defaults(func=handle_paste_subcommand, text="")
 
 
 def handle_upload_command(args: typing.Any) -> None:
-    def print_result(result: typing.Dict[str, str]) -> None:
-        pyperclip.copy(result["url"])
-        table = Table(title="Upload Details")
-        table.add_column("Details", justify="center", style="green")
-        table.add_column("URL", justify="center", style="cyan")
-        table.add_row("Upload URL", result["url"])
-        table.add_row("Delete URL", result["del_url"])
-        table.add_row("Thumb URL", result["thumb"])
-        console.print(table)
-        console.print(
-            "Url has been Copied to Clipboard",
-            style=SUCCESS_MESSAGE_COLOR,
-            justify="center",
-        )
-
+    if args.paths:
+        if args.img_path or args.img:
+            raise CLIError(
+                "Received paths and [code]img_path[/code] or [code]img[/code]."
+                " Expected only one of them."
+            )
+        handle_batch_upload(args)
+        return
     if args.img_path and args.img:
         raise CLIError(
             "Received both [code]img_path[/code] and "
             "[code]img[/code]. Expected only one of them."
         )
-    img = args.img
     sxcu_handler = SXCU()
-    if not args.img_path:
-        if img != "":
-            img_data = img.encode()
-        else:
-            img_data = sys.stdin.buffer.read()
+    if args.img_path and args.img_path.is_file():
+        res = sxcu_handler.upload_file(args.img_path, filename=args.name)
+    elif args.img:
+        data = args.img.encode()
+        filename = args.name or guess_filename(data)
+        res = sxcu_handler.upload_file(fileobj=data, filename=filename)
     else:
-        img_data = Path(args.img_path).open("rb").read()
-    with tempfile.TemporaryDirectory(prefix="sxcu") as tmpdir:
-        tmpath = Path(tmpdir, "tmp.jpg")
-        with tmpath.open("wb") as f:
-            f.write(img_data)
-        res = sxcu_handler.upload_file(tmpath)
-        print_result(res)
+        with contextlib.ExitStack() as stack:
+            if args.img_path:
+                # pipes and process substitutions have no size until read
+                stream = stack.enter_context(args.img_path.open("rb"))
+                default_name = args.img_path.name if args.img_path.suffix else None
+            else:
+                stream = sys.stdin.buffer
+                default_name = None
+            source = seekable_input(stream)
+            if source is not stream:
+                stack.enter_context(source)
+            filename = args.name or default_name or guess_filename(peek(source))
+            res = sxcu_handler.upload_file(fileobj=source, filename=filename)
+    print_result(
+        args,
+        res,
+        [("Upload URL", "url"), ("Delete URL", "del_url"), ("Thumb URL", "thumb")],
+    )
+
+
+def handle_batch_upload(args: typing.Any) -> None:
+    console = None if args.json else get_console(stderr=True)
+    failed, count = upload_batch(args, console)
+    if failed:
+        print_error(args, f"{failed} of {count} uploads failed.")
+        sys.exit(1)
+
+
+def seekable_input(
+    stream: typing.BinaryIO, spool_size: int = STDIN_SPOOL_SIZE
+) -> typing.BinaryIO:
+    """Returns ``stream`` if it can be seeked, so that it is uploaded
+    directly, else copies it into a :class:`tempfile.SpooledTemporaryFile`
+    which is kept in memory up to ``spool_size`` bytes.
+    """
+    try:
+        if stream.seekable():
+            return stream
+    except (AttributeError, OSError):
+        pass
+    spool = tempfile.SpooledTemporaryFile(max_size=spool_size, prefix="sxcu")
+    shutil.copyfileobj(stream, spool, UPLOAD_CHUNK_SIZE)
+    spool.seek(0)
+    return spool
+
+
+def peek(fileobj: typing.BinaryIO, size: int = 16) -> bytes:
+    position = fileobj.tell()
+    data = fileobj.read(size)
+    fileobj.seek(position)
+    return data
+
+
+def guess_filename(header: bytes, stem: str = "upload") -> str:
+    """Returns a filename with the extension matching the first bytes of
+    a file, falling back to ``.jpg``.
+    """
+    for offset, magic, extension in FILE_SIGNATURES:
+        if header[offset : offset + len(magic)] == magic:
+            return stem + extension
+    return stem + ".jpg"
+
+
+def print_error(args: typing.Any, message: str) -> None:
+    if getattr(args, "json", False):
+        print(strip_markup(message), file=sys.stderr)
+    else:
+        get_console(stderr=True).print(message, style="error")
 
 
 def upload_subcommand() -> None:
@@ -126,15 +278,143 @@ def upload_subcommand() -> None:
     upload.add_argument(
         "--img", type=str, help="Paste the image to upload", required=False
     )
+    upload.add_argument(
+        "--name",
+        type=str,
+        help="The filename to upload as, defaults to the name of the file",
+        required=False,
+    )
+    upload.add_argument(
+        "paths",
+        nargs="*",
+        help="Files, directories or glob patterns to upload in parallel. "
+        "A JSON line is written to the manifest for each file.",
+    )
+    upload.add_argument(
+        "-r",
+        "--recursive",
+        action="store_true",
+        help="Upload the files in subdirectories, and expand ** in patterns",
+    )
+    upload.add_argument(
+        "-j", "--jobs", type=int, default=4, help="Number of parallel uploads"
+    )
+    upload.add_argument(
+        "--manifest",
+        type=str,
+        default="-",
+        help="File to write the JSON lines manifest to, - for stdout",
+    )
+    upload.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip the files already uploaded according to the manifest",
+    )
+    add_output_arguments(upload)
     upload.set_defaults(func=handle_upload_command, img="")
 
 
+def subdomain_cache_path() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "sxcu", "subdomains.json")
+
+
+def handle_subdomains_command(args: typing.Any) -> None:
+    directory = SubdomainDirectory(
+        SXCU(), ttl=args.ttl, cache_path=subdomain_cache_path()
+    )
+    if args.refresh:
+        directory.invalidate()
+    records = directory.top(args.count)
+    if args.json:
+        for record in records:
+            print(codec.dumps(record._asdict()))
+        return
+    from rich.table import Table  # pylint: disable=import-outside-toplevel
+
+    table = Table(title="Public Subdomains")
+    table.add_column("Domain", style="cyan")
+    table.add_column("Uploads", justify="right", style="green")
+    table.add_column("Views", justify="right")
+    for record in records:
+        table.add_row(record.domain, str(record.upload_count), str(record.img_views))
+    get_console().print(table)
+
+
+def subdomains_subcommand() -> None:
+    subdomains = subparsers.add_parser(
+        "subdomains",
+        help="Lists the public subdomains with the most uploads",
+    )
+    subdomains.add_argument(
+        "-n", "--count", type=int, default=10, help="Number to list, -1 for all"
+    )
+    subdomains.add_argument("--json", action="store_true", help="Print JSON lines")
+    subdomains.add_argument(
+        "--ttl",
+        type=float,
+        default=3600,
+        help="Seconds the list is cached on disk",
+    )
+    subdomains.add_argument(
+        "--refresh", action="store_true", help="Ignore the cached list"
+    )
+    subdomains.set_defaults(func=handle_subdomains_command)
+
+
+def handle_mirror_command(args: typing.Any) -> None:
+    client = RequestClient(pool_maxsize=max(args.jobs, DEFAULT_POOL_MAXSIZE))
+    with SXCU(request_client=client) as sxcu_handler:
+        report = sxcu_handler.mirror_collection(
+            args.collection_id, args.dest, args.jobs, prune=args.prune
+        )
+    if args.json:
+        summary = report._asdict()
+        summary["failed"] = {
+            file_id: str(error) or type(error).__name__
+            for file_id, error in report.failed.items()
+        }
+        print(codec.dumps(summary))
+    elif report.not_modified and not report.downloaded:
+        get_console().print("The collection didn't change.")
+    else:
+        get_console().print(
+            f"Downloaded {len(report.downloaded)} files ({report.bytes} bytes), "
+            f"{report.unchanged} unchanged, {len(report.removed)} removed."
+        )
+    if report.failed:
+        print_error(args, f"{len(report.failed)} downloads failed.")
+        sys.exit(1)
+
+
+def mirror_subcommand() -> None:
+    mirror = subparsers.add_parser(
+        "mirror",
+        help="Downloads the new and changed files of a collection",
+    )
+    mirror.add_argument("collection_id", help="The collection to mirror")
+    mirror.add_argument("dest", type=Path, help="The directory of the mirror")
+    mirror.add_argument(
+        "-j", "--jobs", type=int, default=4, help="Number of parallel downloads"
+    )
+    mirror.add_argument(
+        "--prune",
+        action="store_true",
+        help="Delete the files which were removed from the collection",
+    )
+    mirror.add_argument("--json", action="store_true", help="Print a JSON summary")
+    mirror.set_defaults(func=handle_mirror_command)
+
+
 def main() -> None:
     paste_subcommand()
     upload_subcommand()
+    subdomains_subcommand()
+    mirror_subcommand()
     args = parser.parse_args()
+    setup_logging(plain=getattr(args, "json", False))
     try:
         args.func(args)
     except CLIError as e:
-        console.print(str(e), style="error")
+        print_error(args, str(e))
         sys.exit(2)
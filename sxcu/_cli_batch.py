@@ -0,0 +1,144 @@
+"""The batch uploads of ``sxcu upload``: expanding the paths, uploading
+them in parallel and writing the JSON lines manifest.
+"""
+import contextlib
+import glob
+import os
+import sys
+import typing
+from pathlib import Path
+
+from . import codec
+from .__client__ import RequestClient
+from .batch import Outcome
+from .constants import DEFAULT_POOL_MAXSIZE
+from .exceptions import CLIError
+from .sxcu import SXCU
+
+
+def expand_paths(
+    patterns: typing.Iterable[str], recursive: bool = False
+) -> typing.Iterator[Path]:
+    """Yields the files matching ``patterns``, which are files,
+    directories or glob patterns. Each file is yielded once.
+    """
+    seen = set()
+    for pattern in patterns:
+        if Path(pattern).exists():
+            matches = [pattern]
+        else:
+            matches = sorted(glob.glob(pattern, recursive=recursive))
+            if not matches:
+                raise CLIError(f"No files match [code]{pattern}[/code].")
+        for match in matches:
+            path = Path(match)
+            if path.is_dir():
+                children = path.rglob("*") if recursive else path.iterdir()
+                files = sorted(child for child in children if child.is_file())
+            else:
+                files = [path]
+            for file in files:
+                key = os.path.abspath(file)
+                if key not in seen:
+                    seen.add(key)
+                    yield file
+
+
+def read_manifest(path: Path) -> typing.Set[str]:
+    """Returns the absolute paths which were uploaded according to a
+    manifest written by ``sxcu upload``. A line truncated by an
+    interruption is ignored.
+    """
+    done = set()
+    if not path.exists():
+        return done
+    with path.open(encoding="utf-8") as manifest:
+        for line in manifest:
+            try:
+                entry = codec.loads(line)
+            except ValueError:
+                continue
+            if entry.get("url"):
+                done.add(os.path.abspath(entry["path"]))
+    return done
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as file:
+        file.seek(-1, os.SEEK_END)
+        return file.read(1) == b"\n"
+
+
+def manifest_entry(outcome: Outcome, size: int) -> typing.Dict[str, typing.Any]:
+    entry = {"path": str(outcome.item), "bytes": size, "elapsed": outcome.elapsed}
+    if outcome.ok:
+        for key in ("url", "del_url", "thumb"):
+            entry[key] = outcome.result.get(key)
+    else:
+        entry["error"] = str(outcome.error) or type(outcome.error).__name__
+    return entry
+
+
+def upload_batch(
+    args: typing.Any, console: typing.Any = None
+) -> typing.Tuple[int, int]:
+    """Upload the files matching ``args.paths`` in parallel, writing the
+    manifest. A progress bar is printed to ``console`` if it is given.
+    Returns the number of failed uploads and of files.
+    """
+    files = list(expand_paths(args.paths, args.recursive))
+    to_stdout = args.manifest == "-"
+    if args.resume:
+        if to_stdout:
+            raise CLIError("[code]--resume[/code] needs a [code]--manifest[/code].")
+        done = read_manifest(Path(args.manifest))
+        files = [file for file in files if os.path.abspath(file) not in done]
+    sizes = {file: file.stat().st_size for file in files}
+    client = RequestClient(pool_maxsize=max(args.jobs, DEFAULT_POOL_MAXSIZE))
+    failed = 0
+    with contextlib.ExitStack() as stack:
+        if to_stdout:
+            manifest = sys.stdout
+        else:
+            mode = "a" if args.resume else "w"
+            manifest = stack.enter_context(open(args.manifest, mode, encoding="utf-8"))
+            if manifest.tell() and not _ends_with_newline(args.manifest):
+                # the last line was cut off by an interruption.
+                manifest.write("\n")
+        sxcu_handler = stack.enter_context(SXCU(request_client=client))
+        progress = None
+        if console is not None:
+            progress = stack.enter_context(upload_progress(len(files), console))
+            task = progress.add_task("upload", total=sum(sizes.values()), files=0)
+        for finished, outcome in enumerate(sxcu_handler.upload_many(files, args.jobs)):
+            size = sizes[outcome.item]
+            failed += not outcome.ok
+            manifest.write(codec.dumps(manifest_entry(outcome, size)) + "\n")
+            manifest.flush()
+            if progress is not None:
+                progress.update(task, advance=size, files=finished + 1)
+    return failed, len(files)
+
+
+def upload_progress(count: int, console: typing.Any) -> typing.Any:
+    """Returns a progress bar of the bytes and files uploaded, printed to
+    ``console``.
+    """
+    # pylint: disable=import-outside-toplevel
+    from rich.progress import (
+        BarColumn,
+        DownloadColumn,
+        Progress,
+        TextColumn,
+        TimeRemainingColumn,
+        TransferSpeedColumn,
+    )
+
+    return Progress(
+        TextColumn("{task.fields[files]}/%d files" % count),
+        BarColumn(),
+        DownloadColumn(),
+        TransferSpeedColumn(),
+        TimeRemainingColumn(),
+        console=console,
+    )
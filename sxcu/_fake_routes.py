@@ -0,0 +1,374 @@
+"""The routes of :class:`~.FakeSXCU`, a request handler answering like
+sxcu.net, and the threaded HTTP server running it.
+"""
+__all__ = ["Handler", "Server"]
+
+import hashlib
+import http.server
+import mimetypes
+import re
+import socket
+import socketserver
+import time
+import typing as T
+from email.parser import BytesParser
+from email.policy import HTTP
+from urllib.parse import parse_qs, urlsplit
+
+from . import codec
+from .ratelimit import HEADER_BUCKET, HEADER_REMAINING, HEADER_RESET_AFTER
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from .testing import FakeSXCU
+
+_BUFFER_SIZE = 64 * 1024
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    """Answers a request like sxcu.net, using the state and the knobs of
+    the :class:`~.FakeSXCU` set as ``fake`` on the server.
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server_version = "FakeSXCU"
+
+    # (method, pattern, handler name, rate-limit bucket)
+    routes = [
+        ("POST", r"/api/files/create", "upload_file", "upload"),
+        ("GET", r"/api/files/delete/(\w+)/(\w+)", "delete_file", "delete"),
+        ("GET", r"/api/files/(\w+)", "file_meta", "meta"),
+        ("POST", r"/api/links/create", "create_link", "links"),
+        ("POST", r"/api/collections/create", "create_collection", "collections"),
+        ("GET", r"/api/collections/(\w+)", "collection_meta", "meta"),
+        ("GET", r"/api/subdomains", "subdomains", "meta"),
+        ("POST", r"/upload", "upload_text", "paste"),
+        ("GET", r"/(\w+)(?:\.\w+)?", "download", None),
+    ]
+
+    def log_message(self, *args: T.Any) -> None:
+        pass
+
+    def do_GET(self) -> None:  # noqa N802
+        self._handle("GET")
+
+    def do_POST(self) -> None:  # noqa N802
+        self._handle("POST")
+
+    def _read_body(self) -> bytes:
+        fake: "FakeSXCU" = self.server.fake
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            parts = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if not size:
+                    self.rfile.readline()
+                    break
+                parts.append(self._read(size, fake.bandwidth))
+                self.rfile.readline()
+            return b"".join(parts)
+        return self._read(int(self.headers.get("Content-Length") or 0), fake.bandwidth)
+
+    def _read(self, size: int, bandwidth: T.Optional[float]) -> bytes:
+        parts = []
+        while size > 0:
+            part = self.rfile.read(min(size, _BUFFER_SIZE))
+            if not part:
+                break
+            parts.append(part)
+            size -= len(part)
+            if bandwidth:
+                time.sleep(len(part) / bandwidth)
+        return b"".join(parts)
+
+    def _write(self, data: bytes) -> None:
+        bandwidth = self.server.fake.bandwidth
+        for start in range(0, len(data), _BUFFER_SIZE):
+            part = data[start : start + _BUFFER_SIZE]
+            self.wfile.write(part)
+            if bandwidth:
+                time.sleep(len(part) / bandwidth)
+
+    def _form(self, body: bytes) -> T.Dict[str, T.Any]:
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("multipart/form-data"):
+            message = BytesParser(policy=HTTP).parsebytes(
+                b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body
+            )
+            form = {}
+            for part in message.iter_parts():
+                name = part.get_param("name", header="content-disposition")
+                payload = part.get_payload(decode=True)
+                filename = part.get_filename()
+                if filename is not None:
+                    form[name] = (filename, payload)
+                else:
+                    form[name] = payload.decode()
+            return form
+        query = parse_qs(body.decode(), keep_blank_values=True)
+        return {key: values[-1] for key, values in query.items()}
+
+    def _handle(self, method: str) -> None:
+        fake: "FakeSXCU" = self.server.fake
+        path = urlsplit(self.path).path
+        body = self._read_body()
+        for route_method, pattern, name, bucket in self.routes:
+            match = re.fullmatch(pattern, path)
+            if route_method == method and match:
+                break
+        else:
+            name, bucket, match = None, None, None
+        fake._count(f"{method} {name or path}")
+        fault = fake._fault()
+        if fake.latency:
+            time.sleep(fake.latency)
+        if fault == "drop":
+            # close the connection without answering.
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        headers = {}
+        if bucket is not None and fake.rate_limits:
+            allowed, headers = fake._take(bucket)
+            if not allowed:
+                fault = 429
+        if fault == 429:
+            headers.setdefault(HEADER_BUCKET, bucket or "global")
+            headers[HEADER_REMAINING] = "0"
+            headers.setdefault(HEADER_RESET_AFTER, "1.0")
+            headers["Retry-After"] = headers[HEADER_RESET_AFTER]
+            self._json(429, {"error": "Rate limit exceeded", "code": 429}, headers)
+            return
+        if fault is not None:
+            self._json(
+                fault, {"error": "Injected server error", "code": fault}, headers
+            )
+            return
+        if name is None:
+            self._json(404, {"error": "Not found", "code": 404}, headers)
+            return
+        getattr(self, "_" + name)(body, headers, *match.groups())
+
+    def _json(
+        self,
+        status: int,
+        value: T.Any,
+        headers: T.Optional[T.Mapping[str, str]] = None,
+    ) -> None:
+        self._send(status, codec.dumps(value).encode(), "application/json", headers)
+
+    def _send(
+        self,
+        status: int,
+        data: bytes,
+        content_type: str,
+        headers: T.Optional[T.Mapping[str, str]] = None,
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self._write(data)
+
+    def _upload_file(self, body: bytes, headers: T.Dict[str, str]) -> None:
+        fake: "FakeSXCU" = self.server.fake
+        form = self._form(body)
+        if not isinstance(form.get("file"), tuple):
+            self._json(400, {"error": "No file was uploaded", "code": 2}, headers)
+            return
+        collection_id = form.get("collection")
+        if collection_id:
+            collection = fake.collections.get(collection_id)
+            if collection is None:
+                self._json(400, {"error": "Invalid collection ID", "code": 6}, headers)
+                return
+            token = collection.get("collection_token")
+            if token and form.get("collection_token") != token:
+                self._json(
+                    400, {"error": "Invalid collection token", "code": 7}, headers
+                )
+                return
+        filename, data = form["file"]
+        extension = mimetypes.guess_extension(
+            mimetypes.guess_type(filename)[0] or ""
+        ) or (("." + filename.rsplit(".", 1)[1]) if "." in filename else "")
+        og_properties = form.get("og_properties")
+        entry = fake._add_file(
+            data,
+            extension,
+            collection=collection_id,
+            og_properties=codec.loads(og_properties) if og_properties else None,
+            self_destruct="self_destruct" in form,
+        )
+        url = f"{fake.url}/{entry['id']}"
+        if "noembed" in form:
+            url += extension
+        self._json(
+            200,
+            {
+                "url": url,
+                "del_url": f"{fake.url}/api/files/delete/{entry['id']}/{entry['token']}",
+                "thumb": f"{fake.url}/t/{entry['id']}.jpeg",
+            },
+            headers,
+        )
+
+    def _delete_file(
+        self, body: bytes, headers: T.Dict[str, str], file_id: str, token: str
+    ) -> None:
+        fake: "FakeSXCU" = self.server.fake
+        with fake._lock:
+            entry = fake.files.get(file_id)
+            if entry is None or entry["token"] != token:
+                entry = None
+            else:
+                del fake.files[file_id]
+        if entry is None:
+            self._send(404, b"<p>Invalid file ID or token.</p>", "text/html", headers)
+            return
+        self._send(200, b"<p>The file was deleted.</p>", "text/html", headers)
+
+    def _file_meta(self, body: bytes, headers: T.Dict[str, str], file_id: str) -> None:
+        entry = self.server.fake.files.get(file_id)
+        if entry is None:
+            self._json(404, {"error": "Invalid file ID", "code": 1}, headers)
+            return
+        self._meta(self._file_entry(entry), headers)
+
+    def _file_entry(self, entry: T.Dict[str, T.Any]) -> T.Dict[str, T.Any]:
+        return {
+            "id": entry["id"],
+            "url": f"{self.server.fake.url}/{entry['id']}{entry['extension']}",
+            "views": entry["views"],
+            "viewable": True,
+            "collection": entry["collection"],
+            "size": len(entry["data"]),
+            "creation_time": entry["created"],
+            "og_properties": entry["og_properties"],
+        }
+
+    def _meta(self, value: T.Any, headers: T.Dict[str, str]) -> None:
+        data = codec.dumps(value).encode()
+        etag = '"%s"' % hashlib.sha1(data).hexdigest()
+        headers["ETag"] = etag
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, b"", "application/json", headers)
+            return
+        self._send(200, data, "application/json", headers)
+
+    def _create_link(self, body: bytes, headers: T.Dict[str, str]) -> None:
+        fake: "FakeSXCU" = self.server.fake
+        link = self._form(body).get("link")
+        if not link:
+            self._json(400, {"error": "No link given", "code": 3}, headers)
+            return
+        link_id, token = fake._new_id(), fake._new_id(16)
+        with fake._lock:
+            fake.links[link_id] = link
+        self._json(
+            200,
+            {
+                "url": f"{fake.url}/{link_id}",
+                "del_url": f"{fake.url}/api/links/delete/{link_id}/{token}",
+            },
+            headers,
+        )
+
+    def _create_collection(self, body: bytes, headers: T.Dict[str, str]) -> None:
+        fake: "FakeSXCU" = self.server.fake
+        form = self._form(body)
+        if not form.get("title"):
+            self._json(400, {"error": "No title given", "code": 4}, headers)
+            return
+        private = form.get("private", "").lower() == "true"
+        collection = {
+            "collection_id": fake._new_id(),
+            "title": form["title"],
+            "desc": form.get("desc"),
+            "private": private,
+            "unlisted": form.get("unlisted", "").lower() == "true",
+            "creation_time": int(time.time()),
+            "views": 0,
+            "collection_token": fake._new_id(16) if private else None,
+        }
+        with fake._lock:
+            fake.collections[collection["collection_id"]] = collection
+        self._json(200, collection, headers)
+
+    def _collection_meta(
+        self, body: bytes, headers: T.Dict[str, str], collection_id: str
+    ) -> None:
+        fake: "FakeSXCU" = self.server.fake
+        collection = fake.collections.get(collection_id)
+        if collection is None:
+            self._json(404, {"error": "Invalid collection ID", "code": 6}, headers)
+            return
+        meta = {k: v for k, v in collection.items() if k != "collection_token"}
+        with fake._lock:
+            meta["files"] = [
+                self._file_entry(entry)
+                for entry in fake.files.values()
+                if entry["collection"] == collection_id
+            ]
+        self._meta(meta, headers)
+
+    def _subdomains(self, body: bytes, headers: T.Dict[str, str]) -> None:
+        self._meta(self.server.fake.subdomains, headers)
+
+    def _upload_text(self, body: bytes, headers: T.Dict[str, str]) -> None:
+        fake: "FakeSXCU" = self.server.fake
+        text = self._form(body).get("text")
+        if not text:
+            self._json(400, {"error": "No text given", "code": 5}, headers)
+            return
+        paste_id = fake._new_id()
+        with fake._lock:
+            fake.pastes[paste_id] = text
+        self._json(200, {"url": f"{fake.url}/{paste_id}", "del_url": ""}, headers)
+
+    def _download(self, body: bytes, headers: T.Dict[str, str], file_id: str) -> None:
+        fake: "FakeSXCU" = self.server.fake
+        entry = fake.files.get(file_id)
+        if entry is None:
+            self._send(404, b"<p>Not found.</p>", "text/html", headers)
+            return
+        with fake._lock:
+            entry["views"] += 1
+        content_type = (
+            mimetypes.guess_type("a" + entry["extension"])[0]
+            or "application/octet-stream"
+        )
+        data, status = entry["data"], 200
+        headers["Accept-Ranges"] = "bytes"
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2) or len(data) - 1), len(data) - 1)
+            if start >= len(data) or start > end:
+                headers["Content-Range"] = f"bytes */{len(data)}"
+                self._send(416, b"", content_type, headers)
+                return
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+            data, status = data[start : end + 1], 206
+        if len(data) > 1 and fake._chance("cut", fake.cut_rate):
+            # announce the whole body but close the connection half way.
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+            self._write(data[: len(data) // 2])
+            self.close_connection = True
+            return
+        self._send(status, data, content_type, headers)
+
+
+class Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """Runs every connection in its own thread."""
+
+    daemon_threads = True
+    request_queue_size = 128
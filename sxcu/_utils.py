@@ -6,9 +6,15 @@
     Extra utils used internally.
 """
 __all__ = []
+import functools
+import types
+import typing as T
+import warnings
+
+from . import codec
 from .__logger__ import logger
 from .constants import SXCU_SUCCESS_CODE
-from .exceptions import SXCUError
+from .exceptions import error_for_status
 
 
 def join_url(subdomain: str, path: str) -> str:
@@ -19,7 +25,12 @@ def join_url(subdomain: str, path: str) -> str:
     return subdomain[:-1] + path
 
 
-def raise_error(status_code: int, error_code: int, error: str) -> None:
+def raise_error(
+    status_code: int,
+    error_code: T.Optional[int],
+    error: str,
+    retry_after: T.Optional[float] = None,
+) -> None:
     logger.error(
         "The status_code from remote is %s which was expected to be %s.",
         status_code,
@@ -27,7 +38,55 @@ def raise_error(status_code: int, error_code: int, error: str) -> None:
     )
     logger.error("The error code is: %s ", error_code)
     logger.error("The reason for this error is: %s", error)
-    raise SXCUError(error)
+    raise error_for_status(status_code)(error, status_code, error_code, retry_after)
+
+
+def parse_retry_after(headers: T.Mapping[str, str]) -> T.Optional[float]:
+    """Returns the number of seconds to wait before retrying, from the
+    ``Retry-After`` or ``X-RateLimit-Reset-After`` headers.
+    """
+    for header in ("Retry-After", "X-RateLimit-Reset-After"):
+        value = headers.get(header)
+        if value is not None:
+            try:
+                return max(float(value), 0.0)
+            except ValueError:
+                pass
+    return None
+
+
+def check_response(res: T.Any) -> None:
+    """Raise :class:`~.SXCUError` if ``res`` isn't a successful response.
+    ``res`` can be any response object with ``status_code``, ``headers``,
+    ``text``, ``content`` and ``json()``.
+    """
+    if res.status_code != SXCU_SUCCESS_CODE:
+        try:
+            error_response = codec.loads(res.content)
+            error_code, error = error_response["code"], error_response["error"]
+        except (ValueError, KeyError, TypeError):
+            # proxies in front of sxcu.net reply with html on 5xx.
+            error_code, error = None, res.text or f"HTTP {res.status_code}"
+        raise_error(res.status_code, error_code, error, parse_retry_after(res.headers))
+
+
+def release_response(res: T.Any, max_drain: int = 64 * 1024) -> None:
+    """Release the connection of a response requested with ``stream=True``
+    without decoding its body. A small body is read and discarded so that
+    the connection goes back to the pool, a large one closes it.
+    """
+    raw = getattr(res, "raw", None)
+    if raw is None:
+        return
+    if not hasattr(raw, "drain_conn"):
+        res.close()
+        return
+    length = res.headers.get("Content-Length")
+    if length is not None and length.isdigit() and int(length) > max_drain:
+        res.close()
+        return
+    raw.drain_conn()
+    raw.release_conn()
 
 
 def get_id_from_url(url: str) -> str:
@@ -47,3 +106,42 @@ def get_id_from_url(url: str) -> str:
     """
     sp = url.split("/")
     return sp[-1]
+
+
+class hybridmethod:  # pylint: disable=invalid-name
+    """A method which can be called both on the class and on an
+    instance. When called on the class it is bound to the instance
+    returned by the class's ``_shared_instance()``, so that the old
+    static helpers keep working while instances use their own
+    configuration.
+    """
+
+    def __init__(self, func: T.Callable) -> None:
+        self.__func__ = func
+        functools.update_wrapper(self, func)
+
+    def __get__(self, obj: T.Any, objtype: T.Optional[type] = None) -> T.Callable:
+        if obj is None:
+            obj = objtype._shared_instance()
+        return types.MethodType(self.__func__, obj)
+
+
+def deprecated_alias(name: str, replacement: str) -> T.Callable:
+    """Returns a method ``name`` which warns that it is deprecated and
+    calls the method ``replacement`` instead.
+    """
+
+    def method(self: T.Any, *args: T.Any, **kwargs: T.Any) -> T.Any:
+        warnings.warn(
+            f"SXCU.{name}() is deprecated. Use SXCU.{replacement}() instead.",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        return getattr(self, replacement)(*args, **kwargs)
+
+    method.__name__ = name
+    method.__qualname__ = f"SXCU.{name}"
+    method.__doc__ = (
+        f"This method is deprecated.\n\nUse :meth:`~.SXCU.{replacement}` instead.\n"
+    )
+    return method
@@ -0,0 +1,278 @@
+"""Asyncio API wrapper for sxcu.net
+"""
+import asyncio
+import io
+import os
+import typing as T
+
+from . import codec
+from .__async_client__ import AsyncRequestClient
+from ._base import R, _SXCUBase
+from ._utils import check_response, hybridmethod, join_url
+from .constants import SXCU_SUCCESS_CODE
+from .delete import forget_deleted
+from .journal import check_ttl, record_upload, source_size
+from .multipart import UploadProgress
+from .og_properties import OGProperties
+from .profile import UploadProfile
+from .results import CollectionMeta, FileMeta, LinkResult, UploadResult
+from .subdomains import SubdomainDirectory
+from .transforms import TransformPipeline
+from .upload_cache import upload_key
+
+__all__ = ["AsyncSXCU"]
+
+# shared by the helpers when they are called on the class itself, created
+# on first use.
+_async_request_handler: T.Optional[AsyncRequestClient] = None
+
+
+class AsyncSXCU(_SXCUBase):
+    """The asyncio counterpart of :class:`~.SXCU`. It accepts the same
+    parameters and has the same methods, but all of them are coroutines.
+
+    Requests are sent using an :class:`~.AsyncRequestClient` which keeps
+    connections alive. Pass ``request_client=AsyncRequestClient(max_concurrency=N)``
+    to bound the number of requests in flight. Use :meth:`close` or the
+    instance as an async context manager to release the connections.
+
+    .. note ::
+
+        This requires ``aiohttp``, install it using ``pip install sxcu[async]``.
+
+    Example
+    =======
+
+    .. code-block:: python
+
+        async with sxcu.AsyncSXCU() as client:
+            results = await asyncio.gather(
+                *(client.upload_file(path) for path in paths)
+            )
+    """
+
+    @staticmethod
+    def _new_client() -> AsyncRequestClient:
+        return AsyncRequestClient()
+
+    @staticmethod
+    def _shared_client() -> AsyncRequestClient:
+        global _async_request_handler  # pylint: disable=global-statement
+        if _async_request_handler is None:
+            _async_request_handler = AsyncRequestClient()
+        return _async_request_handler
+
+    async def close(self) -> None:
+        """Close the connections kept alive by this instance's client."""
+        await self.request_handler.close()
+
+    async def __aenter__(self) -> "AsyncSXCU":
+        return self
+
+    async def __aexit__(self, *args: T.Any) -> None:
+        await self.close()
+
+    async def upload_file(
+        self,
+        name: str = None,
+        fileobj: T.Union[io.IOBase, bytes, T.AsyncIterable[bytes]] = None,
+        collection: T.Optional[str] = None,
+        collection_token: T.Optional[str] = None,
+        noembed: T.Optional[bool] = False,
+        og_properties: T.Optional[OGProperties] = None,
+        self_destruct: bool = False,
+        *,
+        filename: T.Optional[str] = None,
+        progress: T.Optional[T.Callable[[UploadProgress], None]] = None,
+        ttl: T.Optional[float] = None,
+        transforms: T.Optional[TransformPipeline] = None,
+        profile: T.Optional[UploadProfile] = None,
+    ) -> UploadResult:
+        """This uploads image to sxcu. See :meth:`.SXCU.upload_file`.
+
+        The file is streamed to the server in chunks, it is never read
+        into memory at once.
+
+        Parameters
+        ==========
+        name:
+            The pathname of file to upload.
+        fileobj:
+            If fileobj is given, it is used for reading the file. It can be
+            a file object, :class:`bytes` or an async iterable yielding
+            :class:`bytes`.
+        filename:
+            The filename sent to the server. Defaults to the name of
+            ``name`` or ``fileobj``.
+        progress:
+            Called with a :class:`~.UploadProgress` after every chunk sent.
+        ttl:
+            Seconds after which the file is deleted by an
+            :class:`~.ExpiryScheduler`. Requires a :attr:`journal`.
+        transforms:
+            Applied to the file before it is uploaded, in a thread. Async
+            iterables can't be transformed.
+        profile:
+            An :class:`~.UploadProfile` used instead of the other upload
+            options.
+
+        Returns
+        =======
+        :class:`~.UploadResult`
+            The returned JSON from the request.
+
+        Raises
+        ======
+        :class:`~.SXCUError`:
+            Any error from the request side.
+        :class:`TypeError`:
+            If ``transforms`` are used with an async iterable.
+        """
+        profile = self._upload_profile(
+            profile, collection, collection_token, noembed, og_properties, self_destruct
+        )
+        data = profile.fields
+        check_ttl(self, ttl)
+        source = name if fileobj is None else fileobj
+        if transforms is None:
+            transforms = self.transforms
+        if transforms is not None and hasattr(source, "__aiter__"):
+            raise TypeError("Async iterables can't be transformed.")
+        loop = asyncio.get_running_loop()
+        # hashing reads the whole file, don't block the event loop with it.
+        cache_key = await loop.run_in_executor(
+            None,
+            upload_key,
+            self,
+            source,
+            data,
+            profile.self_destruct,
+            transforms,
+        )
+        if cache_key is not None:
+            cached = self.upload_cache.get(cache_key[0])
+            if cached is not None:
+                return UploadResult(cached)
+        if filename is None and isinstance(source, (str, os.PathLike)):
+            filename = os.path.basename(source)
+        size = source_size(source)
+        _file_opened = False
+        if transforms is not None:
+            fileobj, stats = await loop.run_in_executor(
+                None, transforms.apply, source, filename
+            )
+            filename, size = stats.filename, stats.bytes_out
+            _file_opened = True
+        try:
+            if fileobj is None:
+                fileobj = open(name, "rb")
+                _file_opened = True
+            res = await self.request_handler.post(
+                profile.url,
+                files={"file": (filename, fileobj)},
+                data=data,
+                progress=progress,
+            )
+        finally:
+            if _file_opened:
+                fileobj.close()
+        check_response(res)
+        result = UploadResult(res.content)
+        if cache_key is not None:
+            self.upload_cache.put(*cache_key, result)
+        record_upload(self, result, data, size, filename, ttl)
+        return result
+
+    async def _get_metadata(self, url: str, cls: T.Type[R]) -> R:
+        if self.meta_cache is None:
+            res = await self.request_handler.get(url)
+            check_response(res)
+            return cls(res.content)
+
+        async def fetch(validators: dict) -> T.Any:
+            return await self.request_handler.get(
+                url, headers=self._conditional_headers(validators)
+            )
+
+        return cls(await self.meta_cache.aget(url, fetch))
+
+    async def create_link(self, link: str) -> LinkResult:
+        """Creates a new link. See :meth:`.SXCU.create_link`."""
+        url = join_url(self._get_api_endpoint(), "/links/create")
+        res = await self.request_handler.post(url, data={"link": link})
+        check_response(res)
+        return LinkResult(res.content)
+
+    @hybridmethod
+    async def create_collection(
+        self,
+        title: str,
+        private: bool = False,
+        unlisted: bool = False,
+        desc: T.Optional[str] = None,
+    ) -> CollectionMeta:
+        """Create a new collection on sxcu.net.
+        See :meth:`.SXCU.create_collection`.
+        """
+        url = join_url(self.api_endpoint, "/collections/create")
+        data = self._collection_data(title, private, unlisted, desc)
+        res = await self.request_handler.post(url, data=data)
+        check_response(res)
+        return CollectionMeta(res.content)
+
+    @hybridmethod
+    async def collection_meta(self, collection_id: str) -> CollectionMeta:
+        """Get collection details and list of images (if any are uploaded)
+        for a given collection. See :meth:`.SXCU.collection_meta`.
+        """
+        url = join_url(self.api_endpoint, f"/collections/{collection_id}")
+        return await self._get_metadata(url, CollectionMeta)
+
+    @hybridmethod
+    async def upload_text(self, text: str) -> UploadResult:
+        """Uploads an text to sxcu.net (via cancer-co.de).
+        See :meth:`.SXCU.upload_text`.
+        """
+        res = await self.request_handler.post(
+            self.upload_text_endpoint,
+            data={"text": text},
+        )
+        check_response(res)
+        return UploadResult(res.content)
+
+    @hybridmethod
+    async def file_meta(
+        self,
+        file_id: str = None,
+        file_url: str = None,
+    ) -> FileMeta:
+        """Get basic details about an image on sxcu.net or any of its
+        subdomain. See :meth:`.SXCU.file_meta`.
+        """
+        file_id = self._file_id(file_id, file_url, None, None)
+        url = join_url(self.api_endpoint, f"/files/{file_id}")
+        return await self._get_metadata(url, FileMeta)
+
+    @hybridmethod
+    async def list_subdomain(self, count: int = -1) -> list:
+        """This lists all the public domains available, sorted by upload
+        count. See :meth:`.SXCU.list_subdomain`.
+        """
+        directory = self.__dict__.get("_subdomains")
+        if directory is None:
+            directory = self._subdomains = SubdomainDirectory(self)
+        if directory.stale:
+            url = join_url(self.api_endpoint, "/subdomains")
+            res = await self.request_handler.get(url)
+            check_response(res)
+            directory.update(codec.loads(res.content))
+        return directory.entries(count, encoded=True)
+
+    @hybridmethod
+    async def delete_image(self, delete_url: str) -> bool:
+        """Deletes images from sxcu.net. See :meth:`.SXCU.delete_image`."""
+        con = await self.request_handler.get(delete_url, stream=True)
+        deleted = con.status_code == SXCU_SUCCESS_CODE
+        if deleted:
+            forget_deleted(self, delete_url)
+        return deleted
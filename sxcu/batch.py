@@ -0,0 +1,188 @@
+"""Running many requests over a bounded pool of worker threads.
+"""
+__all__ = ["Outcome", "OutcomeReport", "run_many", "run_reported"]
+
+import collections
+import concurrent.futures
+import os
+import time
+import typing as T
+
+from . import codec
+
+_Item = T.TypeVar("_Item")
+
+
+class Outcome(T.NamedTuple):
+    """The outcome of one item of a batch, like :meth:`.SXCU.upload_many`.
+    Exactly one of ``result`` and ``error`` is set.
+    """
+
+    index: int
+    """The position of the item in the input."""
+    item: T.Any
+    """The item as it was passed in."""
+    result: T.Any
+    """The returned JSON, if the request succeeded."""
+    error: T.Optional[BaseException]
+    """The exception raised for this item, if any."""
+    elapsed: float
+    """The seconds taken by this item, including retries."""
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _run_one(func: T.Callable[[_Item], T.Any], index: int, item: _Item) -> Outcome:
+    start = time.perf_counter()
+    try:
+        result = func(item)
+    except Exception as error:  # pylint: disable=broad-except
+        return Outcome(index, item, None, error, time.perf_counter() - start)
+    return Outcome(index, item, result, None, time.perf_counter() - start)
+
+
+def run_many(
+    func: T.Callable[[_Item], T.Any],
+    items: T.Iterable[_Item],
+    concurrency: int,
+    ordered: bool = False,
+    thread_name_prefix: str = "sxcu",
+) -> T.Iterator[Outcome]:
+    """Call ``func`` for each of ``items`` using ``concurrency`` threads,
+    yielding an :class:`Outcome` per item as soon as it is available.
+
+    ``items`` is consumed lazily and at most ``2 * concurrency`` items are
+    in flight, so large or unbounded iterables can be passed. Exceptions
+    raised by ``func`` are captured in the outcome instead of stopping the
+    batch. With ``ordered``, the outcomes are yielded in input order.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    window = 2 * concurrency
+    iterator = enumerate(items)
+    pool = concurrent.futures.ThreadPoolExecutor(
+        concurrency, thread_name_prefix=thread_name_prefix
+    )
+    pending: T.Deque[concurrent.futures.Future] = collections.deque()
+
+    def fill() -> None:
+        while len(pending) < window:
+            try:
+                index, item = next(iterator)
+            except StopIteration:
+                return
+            pending.append(pool.submit(_run_one, func, index, item))
+
+    try:
+        fill()
+        while pending:
+            if ordered:
+                future = pending.popleft()
+            else:
+                done, _ = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                future = next(iter(done))
+                pending.remove(future)
+            outcome = future.result()
+            fill()
+            yield outcome
+    finally:
+        # the consumer stopped early, don't start the remaining items.
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=True)
+
+
+class OutcomeReport:
+    """Appends outcomes to a JSON lines file, one line per item with
+    ``item``, ``ok``, ``error``, ``status_code`` and ``elapsed``, so that
+    the items which succeeded can be skipped when a batch is resumed.
+
+    Items are recorded as strings, like delete URLs.
+    """
+
+    def __init__(self, path: T.Union[str, os.PathLike]) -> None:
+        self.path = os.fspath(path)
+        self._file: T.Optional[T.TextIO] = None
+
+    def completed(self) -> T.Set[str]:
+        """Returns the items recorded as successful. A last line cut off
+        by an interruption is ignored.
+        """
+        done = set()
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        entry = codec.loads(line)
+                    except ValueError:
+                        continue
+                    if entry.get("ok"):
+                        done.add(entry["item"])
+        except FileNotFoundError:
+            pass
+        return done
+
+    def open(self) -> None:
+        cut_off = False
+        try:
+            with open(self.path, "rb") as file:
+                if file.seek(0, os.SEEK_END):
+                    file.seek(-1, os.SEEK_END)
+                    cut_off = file.read(1) != b"\n"
+        except FileNotFoundError:
+            pass
+        self._file = open(self.path, "a", encoding="utf-8")
+        if cut_off:
+            self._file.write("\n")
+
+    def write(self, outcome: Outcome) -> None:
+        """Append ``outcome`` and flush it to the file."""
+        error = outcome.error
+        entry = {
+            "item": str(outcome.item),
+            "ok": outcome.ok,
+            "error": None if error is None else str(error) or type(error).__name__,
+            "status_code": getattr(error, "status_code", None),
+            "elapsed": round(outcome.elapsed, 6),
+        }
+        self._file.write(codec.dumps(entry) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "OutcomeReport":
+        self.open()
+        return self
+
+    def __exit__(self, *args: T.Any) -> None:
+        self.close()
+
+
+def run_reported(
+    func: T.Callable[[str], T.Any],
+    items: T.Iterable[str],
+    concurrency: int,
+    ordered: bool,
+    path: T.Union[str, os.PathLike],
+    *,
+    thread_name_prefix: str = "sxcu",
+) -> T.Iterator[Outcome]:
+    """Like :func:`run_many`, but the outcomes are appended to the
+    :class:`OutcomeReport` at ``path`` and the items it records as
+    successful are skipped.
+    """
+    with OutcomeReport(path) as report:
+        done = report.completed()
+        pending = (item for item in items if item not in done)
+        for outcome in run_many(
+            func, pending, concurrency, ordered, thread_name_prefix=thread_name_prefix
+        ):
+            report.write(outcome)
+            yield outcome
@@ -0,0 +1,123 @@
+"""Coalescing of identical requests which are in flight at the same time.
+
+When several threads or tasks send the same idempotent request while the
+first one hasn't received its response yet, only the first one is sent
+and the others wait for it and share its response.
+"""
+__all__ = ["AsyncSingleFlight", "SingleFlight", "coalesce_key"]
+
+import concurrent.futures
+import threading
+import typing as T
+
+COALESCED_METHODS = frozenset({"GET", "HEAD"})
+
+_Key = T.Tuple[T.Any, ...]
+
+
+def _freeze(value: T.Any) -> T.Any:
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def coalesce_key(
+    method: str, url: str, headers: T.Mapping[str, str], kwargs: T.Mapping
+) -> T.Optional[_Key]:
+    """Returns the key identifying a request, or ``None`` if it mustn't
+    be coalesced: it isn't a ``GET`` or ``HEAD``, or it has other options
+    than ``params``, like a streamed body.
+    """
+    if method not in COALESCED_METHODS or any(name != "params" for name in kwargs):
+        return None
+    return (
+        method,
+        url,
+        tuple(sorted((name.lower(), value) for name, value in headers.items())),
+        _freeze(kwargs.get("params")),
+    )
+
+
+class SingleFlight:
+    """Coalesces calls with the same key from several threads."""
+
+    def __init__(self) -> None:
+        self._calls: T.Dict[_Key, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+        self.saved = 0
+        """The number of calls which shared the result of another one."""
+
+    def do(self, key: _Key, func: T.Callable[[], T.Any]) -> T.Tuple[T.Any, bool]:
+        """Returns the result of ``func``, or of the call with the same
+        ``key`` in flight, and whether the result was shared.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = concurrent.futures.Future()
+            else:
+                self.saved += 1
+        if not leader:
+            return future.result(), True
+        try:
+            result = func()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AsyncSingleFlight:
+    """Coalesces calls with the same key from several :mod:`asyncio` tasks.
+
+    The call runs in its own task, so that cancelling one of the waiting
+    tasks doesn't cancel it for the others. It is cancelled once all the
+    tasks waiting for it were cancelled.
+    """
+
+    def __init__(self) -> None:
+        self._calls: T.Dict[_Key, T.List[T.Any]] = {}
+        self.saved = 0
+        """The number of calls which shared the result of another one."""
+
+    def _forget(self, key: _Key, call: T.List[T.Any]) -> None:
+        # a new call with the same key may have started since.
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(
+        self, key: _Key, func: T.Callable[[], T.Awaitable[T.Any]]
+    ) -> T.Tuple[T.Any, bool]:
+        """Like :meth:`SingleFlight.do`, ``func`` is a coroutine function."""
+        # only imported by the asyncio client, it is slow to import.
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        loop = asyncio.get_running_loop()
+        # futures can't be awaited from another event loop.
+        key = (id(loop),) + key
+        call = self._calls.get(key)
+        shared = call is not None
+        if shared:
+            self.saved += 1
+            call[1] += 1
+        else:
+            # [task, number of waiting tasks]
+            call = self._calls[key] = [loop.create_task(func()), 1]
+            call[0].add_done_callback(lambda _: self._forget(key, call))
+        task = call[0]
+        try:
+            return await asyncio.shield(task), shared
+        except asyncio.CancelledError:
+            if not task.done():
+                call[1] -= 1
+                if not call[1]:
+                    task.cancel()
+            raise
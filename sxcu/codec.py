@@ -0,0 +1,112 @@
+"""The JSON backend used for responses, configs and caches.
+
+`orjson <https://pypi.org/project/orjson/>`_ is used if it is installed,
+using the ``fast`` extra, else :mod:`json`. `ujson
+<https://pypi.org/project/ujson/>`_ isn't chosen automatically, but it
+and the others can be chosen using the ``SXCU_JSON`` environment variable
+or :func:`set_codec`:
+
+.. code-block:: python
+
+    sxcu.codec.set_codec("json")
+    sxcu.codec.get_codec().name
+
+All the backends encode to compact JSON without escaping non-ASCII
+characters, so they produce the same output for the same data.
+"""
+__all__ = ["BACKENDS", "JSONCodec", "dumps", "get_codec", "loads", "set_codec"]
+
+import functools
+import json
+import os
+import typing as T
+
+
+class JSONCodec(T.NamedTuple):
+    """A JSON backend."""
+
+    name: str
+    loads: T.Callable[[T.Union[bytes, str]], T.Any]
+    """Decodes :class:`bytes` or :class:`str`, raising :class:`ValueError`
+    on invalid JSON."""
+    dumps: T.Callable[[T.Any], str]
+    """Encodes to a compact :class:`str`."""
+
+
+def _orjson() -> JSONCodec:
+    import orjson  # pylint: disable=import-outside-toplevel
+
+    def dumps(obj: T.Any) -> str:
+        return orjson.dumps(obj).decode()
+
+    return JSONCodec("orjson", orjson.loads, dumps)
+
+
+def _ujson() -> JSONCodec:
+    import ujson  # pylint: disable=import-outside-toplevel
+
+    dumps = functools.partial(
+        ujson.dumps, ensure_ascii=False, escape_forward_slashes=False
+    )
+    return JSONCodec("ujson", ujson.loads, dumps)
+
+
+def _stdlib() -> JSONCodec:
+    dumps = functools.partial(json.dumps, ensure_ascii=False, separators=(",", ":"))
+    return JSONCodec("json", json.loads, dumps)
+
+
+BACKENDS: T.Dict[str, T.Callable[[], JSONCodec]] = {
+    "orjson": _orjson,
+    "ujson": _ujson,
+    "json": _stdlib,
+}
+
+# tried in order by set_codec(None)
+_PREFERRED = ("orjson", "json")
+
+_codec: T.Optional[JSONCodec] = None
+
+
+def set_codec(name: T.Optional[str] = None) -> JSONCodec:
+    """Use the backend ``name``, one of :data:`BACKENDS`, or orjson if it
+    is installed and else :mod:`json` if ``name`` is ``None``. Returns the
+    new codec.
+
+    Raises
+    ======
+    :class:`ImportError`
+        If the backend isn't installed.
+    :class:`ValueError`
+        If the backend is unknown.
+    """
+    global _codec  # pylint: disable=global-statement
+    if name is None:
+        for preferred in _PREFERRED:
+            try:
+                _codec = BACKENDS[preferred]()
+                break
+            except ImportError:
+                continue
+    elif name in BACKENDS:
+        _codec = BACKENDS[name]()
+    else:
+        raise ValueError(f"Unknown JSON backend {name!r}, use one of {list(BACKENDS)}")
+    return _codec
+
+
+def get_codec() -> JSONCodec:
+    """Returns the codec in use, choosing it on first use."""
+    if _codec is None:
+        return set_codec(os.environ.get("SXCU_JSON") or None)
+    return _codec
+
+
+def loads(data: T.Union[bytes, str]) -> T.Any:
+    """Decode ``data`` using the current backend."""
+    return (_codec or get_codec()).loads(data)
+
+
+def dumps(obj: T.Any) -> str:
+    """Encode ``obj`` to compact JSON using the current backend."""
+    return (_codec or get_codec()).dumps(obj)
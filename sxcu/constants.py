@@ -14,6 +14,16 @@ from .__version__ import __version__
 
 SXCU_SUCCESS_CODE = 200
 
+# Number of hosts, and connections per host, kept alive by the
+# connection pool of :class:`~.RequestClient`.
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+# Size of the chunks read from files while uploading them.
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Size of the chunks written to files while downloading them.
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
 
 class DefaultDomains(Enum):
     """DefaultDomains A Emum representing all the default API
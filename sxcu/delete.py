@@ -0,0 +1,76 @@
+"""Delete files using the delete URLs returned by sxcu.net, see
+:meth:`.SXCU.delete_image` and :meth:`.SXCU.delete_image_many`.
+
+Only the status codes of the responses are read, the pages aren't
+downloaded.
+"""
+__all__ = ["delete_file", "delete_many", "forget_deleted"]
+
+import os
+import re
+import typing as T
+from urllib.parse import urlsplit
+
+from ._utils import join_url, raise_error, release_response
+from .batch import Outcome, run_many, run_reported
+from .constants import SXCU_SUCCESS_CODE
+
+_DELETE_URL = re.compile(r"/files/delete/(\w+)/")
+
+
+def forget_deleted(client: T.Any, delete_url: str) -> None:
+    """Remove a deleted file from the caches of ``client`` and mark it as
+    deleted in its journal.
+    """
+    if client.journal is not None:
+        client.journal.mark_deleted(delete_url)
+    if client.upload_cache is not None:
+        client.upload_cache.evict_url(delete_url)
+    match = _DELETE_URL.search(urlsplit(delete_url).path)
+    if client.meta_cache is not None and match:
+        client.meta_cache.invalidate(
+            join_url(client.api_endpoint, f"/files/{match.group(1)}")
+        )
+
+
+def delete_file(client: T.Any, delete_url: str) -> int:
+    """Request ``delete_url``, returns the status code of the response. A
+    deleted file is removed from the caches and the journal of ``client``.
+    """
+    res = client.request_handler.get(delete_url, stream=True)
+    release_response(res)
+    if res.status_code == SXCU_SUCCESS_CODE:
+        forget_deleted(client, delete_url)
+    return res.status_code
+
+
+def delete_many(
+    client: T.Any,
+    delete_urls: T.Iterable[str],
+    concurrency: int = 4,
+    *,
+    report: T.Union[str, os.PathLike, None] = None,
+    ordered: bool = False,
+) -> T.Iterator[Outcome]:
+    """Delete ``delete_urls`` using ``concurrency`` worker threads. See
+    :meth:`.SXCU.delete_image_many`.
+    """
+
+    def delete(delete_url: str) -> bool:
+        status_code = delete_file(client, delete_url)
+        if status_code != SXCU_SUCCESS_CODE:
+            raise_error(status_code, None, f"HTTP {status_code}")
+        return True
+
+    if report is None:
+        return run_many(
+            delete, delete_urls, concurrency, ordered, thread_name_prefix="sxcu-delete"
+        )
+    return run_reported(
+        delete,
+        delete_urls,
+        concurrency,
+        ordered,
+        report,
+        thread_name_prefix="sxcu-delete",
+    )
@@ -0,0 +1,290 @@
+"""Stream files from sxcu.net to disk or a buffer.
+
+Downloads are read in chunks of :data:`~.constants.DOWNLOAD_CHUNK_SIZE`, so
+their memory use doesn't depend on the size of the files. A download to a
+path is written to ``<path>.part`` and renamed once complete. An
+interrupted download continues from the end of the partial file using a
+``Range`` request, both when the connection drops during the transfer and
+when it is started again later. The content behind a URL of sxcu.net never
+changes, so a partial file is assumed to be the start of the same file.
+
+.. code-block:: python
+
+    client = sxcu.SXCU()
+    client.download("https://sxcu.net/QNeo92", "downloads/")
+    for outcome in client.download_many(ids, "downloads/", concurrency=8):
+        print(outcome.item, outcome.result.throughput)
+"""
+__all__ = ["DownloadResult", "download_file", "download_many", "resolve_url"]
+
+import os
+import re
+import time
+import typing as T
+from urllib.parse import urlsplit
+
+from ._utils import get_id_from_url, raise_error, release_response
+from .batch import Outcome, run_many
+from .constants import DOWNLOAD_CHUNK_SIZE, SXCU_SUCCESS_CODE
+from .exceptions import SXCUConnectionError
+from .retry import log_retry
+
+PARTIAL_CONTENT = 206
+RANGE_NOT_SATISFIABLE = 416
+PART_SUFFIX = ".part"
+
+
+class DownloadResult(T.NamedTuple):
+    """Returned by :meth:`.SXCU.download`."""
+
+    url: str
+    """The URL the file was downloaded from."""
+    path: T.Optional[str]
+    """Where the file was written, ``None`` for a buffer."""
+    size: int
+    """The size of the file."""
+    received: int
+    """The bytes received by this download, without the ones of a previous
+    partial download."""
+    resumed_from: int
+    """The offset the download started from."""
+    elapsed: float
+    """The seconds taken, including retries."""
+
+    @property
+    def throughput(self) -> float:
+        """The bytes received per second."""
+        return self.received / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def resolve_url(client: T.Any, source: str) -> str:
+    """Returns the URL of the content of ``source``, a file ID or URL.
+    Direct links, with an extension, are used as is. For IDs and links to
+    the page of a file, the URL is looked up using :meth:`.SXCU.file_meta`.
+    """
+    name = get_id_from_url(source) if "://" in source else source
+    if "://" in source and "." in name:
+        return source
+    return client.file_meta(file_id=name.split(".", 1)[0]).url
+
+
+def _total_size(res: T.Any, offset: int) -> T.Optional[int]:
+    """The size of the whole file, from the ``Content-Range`` of a partial
+    response or the ``Content-Length`` of a full one.
+    """
+    content_range = res.headers.get("Content-Range")
+    if content_range:
+        match = re.fullmatch(r"bytes (?:(\d+)-\d+|\*)/(\d+)", content_range.strip())
+        if match:
+            if match.group(1) is not None and int(match.group(1)) != offset:
+                raise SXCUConnectionError(
+                    f"Asked for the content from byte {offset}, "
+                    f"received {content_range}."
+                )
+            return int(match.group(2))
+        return None
+    length = res.headers.get("Content-Length")
+    return int(length) if length and length.isdigit() else None
+
+
+class _Transfer:
+    """The state of one download: where it is written and how far it got."""
+
+    def __init__(
+        self,
+        client: T.Any,
+        url: str,
+        part: T.Optional[str],
+        fileobj: T.Optional[T.BinaryIO],
+        chunk_size: int,
+    ) -> None:
+        self.client = client
+        self.url = url
+        self.part = part
+        self.output = fileobj
+        self.chunk_size = chunk_size
+        self.offset = 0
+        if part is not None:
+            try:
+                self.offset = os.path.getsize(part)
+            except OSError:
+                pass
+        self.resumed_from = self.offset
+        self.total: T.Optional[int] = None
+        self.headers = dict(client.request_handler.headers)
+        # byte offsets only match the file without content encoding.
+        self.headers["Accept-Encoding"] = "identity"
+
+    @property
+    def complete(self) -> bool:
+        return self.total is not None and self.offset >= self.total
+
+    def request(self) -> T.Any:
+        """Request the rest of the file, ``None`` if nothing is left."""
+        while True:
+            if self.offset:
+                self.headers["Range"] = f"bytes={self.offset}-"
+            else:
+                self.headers.pop("Range", None)
+            res = self.client.request_handler.get(
+                self.url, headers=self.headers, stream=True
+            )
+            if res.status_code != RANGE_NOT_SATISFIABLE or not self.offset:
+                break
+            release_response(res)
+            self.total = _total_size(res, self.offset)
+            if self.total == self.offset:
+                return None
+            if self.output is not None:
+                raise SXCUConnectionError(f"{self.url} changed while downloading.")
+            # the partial file is the one of another file.
+            os.unlink(self.part)
+            self.offset = self.resumed_from = 0
+        if res.status_code not in (SXCU_SUCCESS_CODE, PARTIAL_CONTENT):
+            release_response(res)
+            raise_error(res.status_code, None, f"HTTP {res.status_code}")
+        return res
+
+    def receive(self, res: T.Any) -> T.Tuple[int, T.Optional[OSError]]:
+        """Write the body of ``res``, returns the number of bytes received
+        and the error which interrupted the transfer, if any.
+        """
+        # a server ignoring the range sends the file from the start.
+        skip = self.offset if res.status_code == SXCU_SUCCESS_CODE else 0
+        self.total = _total_size(res, self.offset - skip)
+        if self.output is None:
+            self.output = open(self.part, "ab")
+        raw = getattr(res, "raw", None)
+        if hasattr(raw, "enforce_content_length"):
+            # else urllib3 discards the bytes of the read which hit the end
+            # of a cut off body, the length is checked against the total.
+            raw.enforce_content_length = False
+        received = 0
+        chunks = res.iter_content(self.chunk_size)
+        while True:
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return received, None
+            except OSError as e:
+                # the errors of requests are subclasses of OSError.
+                return received, e
+            if skip:
+                dropped = min(skip, len(chunk))
+                chunk, skip = chunk[dropped:], skip - dropped
+            self.output.write(chunk)
+            received += len(chunk)
+            self.offset += len(chunk)
+
+    def run(self, start: float) -> None:
+        policy = self.client.request_handler.retry_policy
+        failures = 0
+        while True:
+            res = self.request()
+            if res is None:
+                return
+            try:
+                received, error = self.receive(res)
+            finally:
+                res.close()
+            if error is None and (self.total is None or self.complete):
+                return
+            # attempts which made progress don't count against the retries.
+            failures = 1 if received else failures + 1
+            delay = None
+            if policy is not None:
+                delay = policy.retry_delay(failures, time.monotonic() - start)
+            if delay is None:
+                raise SXCUConnectionError(
+                    f"Download of {self.url} stopped after {self.offset} bytes."
+                ) from error
+            log_retry("GET", self.url, failures, error or "incomplete", delay)
+            policy.sleep(delay)
+
+
+def download_file(
+    client: T.Any,
+    source: str,
+    dest: T.Union[str, os.PathLike, None] = None,
+    *,
+    fileobj: T.Optional[T.BinaryIO] = None,
+    chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+) -> DownloadResult:
+    """Downloads a file, streaming it in chunks to ``dest`` or
+    ``fileobj``.
+
+    A download to ``dest`` is written to ``<dest>.part`` and renamed once
+    complete. If the partial file exists, for example after an
+    interruption, the download continues from its end using a ``Range``
+    request. A connection lost during the transfer is resumed the same
+    way, following the :class:`~.RetryPolicy` of the client.
+
+    Parameters
+    ==========
+    client : :class:`.SXCU`
+        Used for the requests.
+    source : :class:`str`
+        The ID or URL of the file. The direct link of IDs and links
+        without an extension is looked up using :meth:`.SXCU.file_meta`.
+    dest : :class:`str`, optional
+        The path to write the file to, or a directory to write it to
+        under the name of its URL.
+    fileobj : :class:`io.BufferedIOBase`, optional
+        A writable binary file to write the file to instead.
+    chunk_size : :class:`int`, optional
+        The size of the chunks read from the response.
+
+    Returns
+    =======
+    :class:`~.DownloadResult`
+        The size of the file, the bytes received and the time taken.
+    """
+    if (dest is None) == (fileobj is None):
+        raise ValueError("Pass either dest or fileobj.")
+    start = time.monotonic()
+    url = resolve_url(client, source)
+    path = None
+    if dest is not None:
+        path = os.fspath(dest)
+        if os.path.isdir(path):
+            name = os.path.basename(urlsplit(url).path) or get_id_from_url(source)
+            path = os.path.join(path, name)
+    transfer = _Transfer(client, url, path and path + PART_SUFFIX, fileobj, chunk_size)
+    try:
+        transfer.run(start)
+    finally:
+        if fileobj is None and transfer.output is not None:
+            transfer.output.close()
+    if path is not None:
+        if transfer.output is None:
+            # the partial file was already complete, or the file is empty.
+            open(transfer.part, "ab").close()
+        os.replace(transfer.part, path)
+    return DownloadResult(
+        url,
+        path,
+        transfer.offset if transfer.total is None else transfer.total,
+        transfer.offset - transfer.resumed_from,
+        transfer.resumed_from,
+        time.monotonic() - start,
+    )
+
+
+def download_many(
+    client: T.Any,
+    sources: T.Iterable[str],
+    dest: T.Union[str, os.PathLike],
+    concurrency: int = 4,
+    ordered: bool = False,
+) -> T.Iterator[Outcome]:
+    """Download ``sources`` into the directory ``dest`` using
+    ``concurrency`` worker threads. See :meth:`.SXCU.download_many`.
+    """
+    os.makedirs(dest, exist_ok=True)
+    return run_many(
+        lambda source: download_file(client, source, dest),
+        sources,
+        concurrency,
+        ordered,
+        thread_name_prefix="sxcu-download",
+    )
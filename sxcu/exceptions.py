@@ -1,5 +1,6 @@
 """Custom Exeeption declarations.
 """
+import typing as T
 
 
 class SXCUError(Exception):
@@ -8,8 +9,93 @@ class SXCUError(Exception):
 
     See error_codes and message list for more information in
     https://sxcu.net.
+
+    Attributes
+    ==========
+    status_code : :class:`int`
+        The HTTP status code returned, ``None`` if no response was received.
+    error_code : :class:`int`
+        The error code returned by sxcu.net, if any.
+    retry_after : :class:`float`
+        The number of seconds the server asked to wait before retrying,
+        if any.
+    retryable : :class:`bool`
+        Whether the same request could succeed if retried later.
+    """
+
+    retryable = False
+
+    def __init__(
+        self,
+        message: str = "",
+        status_code: T.Optional[int] = None,
+        error_code: T.Optional[int] = None,
+        retry_after: T.Optional[float] = None,
+    ) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.error_code = error_code
+        self.retry_after = retry_after
+
+
+class ClientError(SXCUError):
+    """Raised when sxcu.net rejected the request with a ``4xx`` status
+    code. Retrying the same request won't help.
+    """
+
+
+class RateLimitError(ClientError):
+    """Raised when sxcu.net replied with ``429 Too Many Requests``."""
+
+    retryable = True
+
+
+class ServerError(SXCUError):
+    """Raised when sxcu.net failed with a ``5xx`` status code."""
+
+    retryable = True
+
+
+class SXCUConnectionError(SXCUError):
+    """Raised when no response could be received from the server, for
+    example when the connection was reset or timed out.
+    """
+
+    retryable = True
+
+
+class RateLimitExceeded(SXCUError):
+    """Raised by :class:`~.RateLimiter` when a request would exceed the
+    rate-limit budget and the limiter is configured to not wait.
+
+    Attributes
+    ==========
+    bucket : :class:`str`
+        The exhausted rate-limit bucket.
+    retry_after : :class:`float`
+        The number of seconds until the bucket resets.
     """
 
+    retryable = True
+
+    def __init__(self, bucket: str, retry_after: float) -> None:
+        super().__init__(
+            f"Rate limit of {bucket} exhausted, resets in {retry_after:.2f}s.",
+            retry_after=retry_after,
+        )
+        self.bucket = bucket
+
+
+def error_for_status(status_code: int) -> T.Type[SXCUError]:
+    """Returns the :class:`SXCUError` subclass matching ``status_code``."""
+    if status_code == 429:
+        return RateLimitError
+    if 400 <= status_code < 500:
+        return ClientError
+    if status_code >= 500:
+        return ServerError
+    return SXCUError
+
 
 class CLIError(Exception):
     """Raised when failed to parse CLI args."""
@@ -0,0 +1,124 @@
+"""Request lifecycle hooks of :class:`~.RequestClient`.
+
+Callbacks can be registered for the following events, and are called with
+a :class:`RequestEvent`:
+
+``request_start``
+    Before the first attempt of a request.
+``request_end``
+    After a response was received, ``status_code`` is set.
+``retry``
+    Before waiting to retry, ``delay`` and either ``status_code`` or
+    ``error`` are set.
+``throttled``
+    After a request waited for the rate limit, ``delay`` is set.
+``error``
+    When a request failed without a response, ``error`` is set.
+``coalesced``
+    When a request wasn't sent because an identical one was in flight,
+    and it got the same response. ``status_code`` is set.
+
+When no hooks are registered, no event objects are created at all.
+"""
+__all__ = ["Hooks", "RequestEvent", "EVENTS"]
+
+import time
+import typing as T
+
+from .__logger__ import logger
+from .ratelimit import route_key
+
+EVENTS = ("request_start", "request_end", "retry", "throttled", "error", "coalesced")
+
+
+class RequestEvent:
+    """The state of a request, passed to the hooks.
+
+    Attributes
+    ==========
+    method : :class:`str`
+        The HTTP method.
+    url : :class:`str`
+        The requested URL.
+    endpoint : :class:`str`
+        The URL without IDs, for example ``sxcu.net/api/files``.
+    attempt : :class:`int`
+        The current attempt, starting at ``1``.
+    status_code : :class:`int`
+        The status code of the last response, if any.
+    error : :class:`Exception`
+        The exception of the last attempt, if any.
+    delay : :class:`float`
+        The seconds waited (``throttled``) or to wait (``retry``).
+    bytes_sent : :class:`int`
+        The size of the request body, if known.
+    timings : :class:`dict`
+        Seconds spent per phase: ``throttle`` waiting for the rate limit,
+        ``send`` sending requests and reading responses, ``backoff``
+        waiting between retries and ``total``.
+    """
+
+    __slots__ = (
+        "method",
+        "url",
+        "endpoint",
+        "attempt",
+        "status_code",
+        "error",
+        "delay",
+        "bytes_sent",
+        "timings",
+        "start",
+    )
+
+    def __init__(self, method: str, url: str) -> None:
+        self.method = method
+        self.url = url
+        self.endpoint = route_key(method, url).split(" ", 1)[1]
+        self.attempt = 1
+        self.status_code: T.Optional[int] = None
+        self.error: T.Optional[BaseException] = None
+        self.delay = 0.0
+        self.bytes_sent: T.Optional[int] = None
+        self.timings = {"throttle": 0.0, "send": 0.0, "backoff": 0.0, "total": 0.0}
+        self.start = time.perf_counter()
+
+    def __repr__(self) -> str:
+        return "<RequestEvent %s %s attempt=%d status=%s>" % (
+            self.method,
+            self.url,
+            self.attempt,
+            self.status_code,
+        )
+
+
+class Hooks:
+    """The hooks registered on a client."""
+
+    __slots__ = ("_callbacks",)
+
+    def __init__(self) -> None:
+        self._callbacks: T.Dict[str, T.List[T.Callable[[RequestEvent], None]]] = {}
+
+    def add(self, event: str, callback: T.Callable[[RequestEvent], None]) -> None:
+        """Call ``callback`` with a :class:`RequestEvent` on ``event``."""
+        if event not in EVENTS:
+            raise ValueError(f"Unknown event {event!r}, expected one of {EVENTS}")
+        self._callbacks.setdefault(event, []).append(callback)
+
+    def remove(self, event: str, callback: T.Callable[[RequestEvent], None]) -> None:
+        """Remove a callback added using :meth:`add`."""
+        callbacks = self._callbacks.get(event, [])
+        callbacks.remove(callback)
+        if not callbacks:
+            del self._callbacks[event]
+
+    def __bool__(self) -> bool:
+        return bool(self._callbacks)
+
+    def emit(self, event: str, payload: RequestEvent) -> None:
+        for callback in self._callbacks.get(event, ()):
+            try:
+                callback(payload)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Hook %r for %s failed.", callback, event)
@@ -0,0 +1,394 @@
+"""A journal of uploads, and a scheduler deleting them once they expire.
+
+.. code-block:: python
+
+    journal = sxcu.journal.UploadJournal("uploads.sqlite")
+    client = sxcu.SXCU(journal=journal)
+    client.upload_file("screenshot.png", ttl=3600)
+
+    # in a long running process
+    scheduler = sxcu.journal.ExpiryScheduler(client, journal)
+    scheduler.start()
+"""
+__all__ = [
+    "ExpiryScheduler",
+    "JournalEntry",
+    "UploadJournal",
+    "check_ttl",
+    "record_upload",
+    "source_size",
+]
+
+import os
+import sqlite3
+import threading
+import time
+import typing as T
+from collections.abc import Mapping
+
+from . import codec
+from .__logger__ import logger
+from .batch import Outcome
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    url TEXT,
+    del_url TEXT,
+    thumb TEXT,
+    size INTEGER,
+    filename TEXT,
+    subdomain TEXT,
+    collection TEXT,
+    options TEXT,
+    expires REAL,
+    deleted REAL
+);
+CREATE INDEX IF NOT EXISTS uploads_created ON uploads (created);
+CREATE INDEX IF NOT EXISTS uploads_collection ON uploads (collection, created);
+CREATE INDEX IF NOT EXISTS uploads_size ON uploads (size);
+CREATE INDEX IF NOT EXISTS uploads_del_url ON uploads (del_url);
+CREATE INDEX IF NOT EXISTS uploads_expires ON uploads (expires)
+    WHERE expires IS NOT NULL AND deleted IS NULL;
+"""
+
+_COLUMNS = (
+    "id, created, url, del_url, thumb, size, filename, subdomain, collection, "
+    "options, expires, deleted"
+)
+
+
+class JournalEntry(T.NamedTuple):
+    """An upload recorded in an :class:`UploadJournal`. Times are Unix
+    timestamps.
+    """
+
+    id: int
+    created: float
+    url: T.Optional[str]
+    del_url: T.Optional[str]
+    thumb: T.Optional[str]
+    size: T.Optional[int]
+    filename: T.Optional[str]
+    subdomain: T.Optional[str]
+    collection: T.Optional[str]
+    options: T.Dict[str, T.Any]
+    expires: T.Optional[float]
+    deleted: T.Optional[float]
+
+
+def _entry(row: T.Sequence[T.Any]) -> JournalEntry:
+    row = list(row)
+    row[9] = codec.loads(row[9]) if row[9] else {}
+    return JournalEntry(*row)
+
+
+class UploadJournal:
+    """Records every upload in a SQLite database using write-ahead
+    logging, so that a crash loses at most the upload in progress and
+    several threads and processes can share it.
+
+    Rows are only appended, except for setting the expiry time and the
+    time the file was deleted. Queries by age, collection, size and expiry
+    use indexes.
+
+    Parameters
+    ==========
+    path : :class:`str`
+        The database file, created if it doesn't exist.
+    clock : :class:`callable`, optional
+        Returns the current Unix time, :func:`time.time` by default.
+    """
+
+    def __init__(
+        self,
+        path: T.Union[str, os.PathLike],
+        *,
+        clock: T.Callable[[], float] = time.time,
+    ) -> None:
+        self.path = os.path.expanduser(os.fspath(path))
+        self.clock = clock
+        self._local = threading.local()
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def record(
+        self,
+        response: T.Mapping[str, T.Any],
+        *,
+        size: T.Optional[int] = None,
+        filename: T.Optional[str] = None,
+        subdomain: T.Optional[str] = None,
+        collection: T.Optional[str] = None,
+        options: T.Optional[T.Mapping[str, T.Any]] = None,
+        ttl: T.Optional[float] = None,
+    ) -> int:
+        """Append an upload and returns its id.
+
+        Parameters
+        ==========
+        response : :class:`dict`
+            The JSON returned by sxcu.net.
+        ttl : :class:`float`, optional
+            Seconds after which the file expires, see
+            :class:`ExpiryScheduler`.
+        """
+        now = self.clock()
+        cursor = self._connect().execute(
+            "INSERT INTO uploads (created, url, del_url, thumb, size, filename, "
+            "subdomain, collection, options, expires) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                now,
+                response.get("url"),
+                response.get("del_url"),
+                response.get("thumb"),
+                size,
+                filename,
+                subdomain,
+                collection,
+                codec.dumps(dict(sorted(options.items()))) if options else None,
+                None if ttl is None else now + ttl,
+            ),
+        )
+        return cursor.lastrowid
+
+    def get(self, entry_id: int) -> T.Optional[JournalEntry]:
+        row = (
+            self._connect()
+            .execute(f"SELECT {_COLUMNS} FROM uploads WHERE id = ?", (entry_id,))
+            .fetchone()
+        )
+        return None if row is None else _entry(row)
+
+    def set_ttl(self, entry_id: int, ttl: T.Optional[float]) -> None:
+        """Expire the upload ``ttl`` seconds from now, or never if
+        ``ttl`` is ``None``.
+        """
+        expires = None if ttl is None else self.clock() + ttl
+        self._connect().execute(
+            "UPDATE uploads SET expires = ? WHERE id = ?", (expires, entry_id)
+        )
+
+    def mark_deleted(self, del_url: str) -> int:
+        """Record that the file with the delete URL ``del_url`` was deleted.
+        Returns the number of updated entries.
+        """
+        return (
+            self._connect()
+            .execute(
+                "UPDATE uploads SET deleted = ? WHERE del_url = ? AND deleted IS NULL",
+                (self.clock(), del_url),
+            )
+            .rowcount
+        )
+
+    def query(
+        self,
+        *,
+        older_than: T.Optional[float] = None,
+        newer_than: T.Optional[float] = None,
+        collection: T.Optional[str] = None,
+        min_size: T.Optional[int] = None,
+        max_size: T.Optional[int] = None,
+        include_deleted: bool = False,
+        limit: T.Optional[int] = None,
+    ) -> T.List[JournalEntry]:
+        """Returns the uploads matching all the given filters, oldest
+        first. ``older_than`` and ``newer_than`` are ages in seconds.
+        """
+        clauses, params = [], []
+        now = self.clock()
+        if older_than is not None:
+            clauses.append("created <= ?")
+            params.append(now - older_than)
+        if newer_than is not None:
+            clauses.append("created >= ?")
+            params.append(now - newer_than)
+        if collection is not None:
+            clauses.append("collection = ?")
+            params.append(collection)
+        if min_size is not None:
+            clauses.append("size >= ?")
+            params.append(min_size)
+        if max_size is not None:
+            clauses.append("size <= ?")
+            params.append(max_size)
+        if not include_deleted:
+            clauses.append("deleted IS NULL")
+        sql = f"SELECT {_COLUMNS} FROM uploads"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [_entry(row) for row in self._connect().execute(sql, params)]
+
+    def due(self, limit: int = 100) -> T.List[JournalEntry]:
+        """Returns up to ``limit`` expired uploads which weren't deleted
+        yet, the earliest expired first.
+        """
+        rows = self._connect().execute(
+            f"SELECT {_COLUMNS} FROM uploads "
+            "WHERE expires IS NOT NULL AND deleted IS NULL AND expires <= ? "
+            "ORDER BY expires LIMIT ?",
+            (self.clock(), limit),
+        )
+        return [_entry(row) for row in rows]
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM uploads").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the connection of the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class ExpiryScheduler:
+    """Deletes the uploads of an :class:`UploadJournal` once they expire,
+    in batches sent concurrently using :meth:`.SXCU.delete_image_many`.
+
+    Parameters
+    ==========
+    client : :class:`.SXCU`
+        The client used to delete the files.
+    journal : :class:`UploadJournal`
+        The journal with the expiry times.
+    interval : :class:`float`, optional
+        Seconds between two purges when running in the background.
+    batch_size : :class:`int`, optional
+        The number of uploads read from the journal at once.
+    concurrency : :class:`int`, optional
+        The number of deletes sent at the same time.
+    """
+
+    def __init__(
+        self,
+        client: T.Any,
+        journal: UploadJournal,
+        interval: float = 60.0,
+        batch_size: int = 100,
+        concurrency: int = 4,
+    ) -> None:
+        self.client = client
+        self.journal = journal
+        self.interval = interval
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self._stop = threading.Event()
+        self._thread: T.Optional[threading.Thread] = None
+
+    def purge(self) -> T.List[Outcome]:
+        """Delete all the expired uploads now. Files which were already
+        deleted on sxcu.net are marked as deleted too. Returns the outcomes
+        of the deletes.
+        """
+        outcomes: T.List[Outcome] = []
+        failed: T.Set[str] = set()
+        while True:
+            urls = []
+            for entry in self.journal.due(self.batch_size + len(failed)):
+                if not entry.del_url:
+                    # it can't be deleted, don't select it again.
+                    logger.warning("Expired %s has no delete URL.", entry.url)
+                    self.journal.set_ttl(entry.id, None)
+                elif entry.del_url not in failed:
+                    urls.append(entry.del_url)
+            if not urls:
+                return outcomes
+            for outcome in self.client.delete_image_many(urls, self.concurrency):
+                gone = getattr(outcome.error, "status_code", None) in (404, 410)
+                if outcome.ok or gone:
+                    self.journal.mark_deleted(outcome.item)
+                else:
+                    # keep it for the next purge, don't retry it now.
+                    failed.add(outcome.item)
+                    logger.warning(
+                        "Deleting expired %s failed: %s", outcome.item, outcome.error
+                    )
+                outcomes.append(outcome)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.purge()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Purging expired uploads failed.")
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        """Purge expired uploads every ``interval`` seconds in a daemon
+        thread.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="sxcu-expiry", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: T.Optional[float] = None) -> None:
+        """Stop the background thread, waiting for the current purge."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def check_ttl(client: T.Any, ttl: T.Optional[float]) -> None:
+    if ttl is not None and client.journal is None:
+        raise ValueError("ttl requires a journal")
+
+
+def source_size(source: T.Any) -> T.Optional[int]:
+    """Returns the size of ``source`` if it is known without reading it."""
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    if isinstance(source, (bytes, bytearray)):
+        return len(source)
+    if isinstance(source, memoryview):
+        return source.nbytes
+    return None
+
+
+def record_upload(
+    client: T.Any,
+    result: T.Any,
+    data: T.Mapping[str, T.Any],
+    size: T.Optional[int],
+    filename: T.Optional[str],
+    ttl: T.Optional[float],
+) -> None:
+    """Append an upload to the journal of ``client``, if it has one."""
+    if client.journal is None or not isinstance(result, Mapping):
+        return
+    options = {
+        "noembed": "noembed" in data,
+        "self_destruct": "self_destruct" in data,
+    }
+    if "og_properties" in data:
+        options["og_properties"] = codec.loads(data["og_properties"])
+    client.journal.record(
+        result,
+        size=size,
+        filename=filename,
+        subdomain=client.subdomain,
+        collection=data.get("collection"),
+        options=options,
+        ttl=ttl,
+    )
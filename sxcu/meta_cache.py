@@ -0,0 +1,362 @@
+"""A cache for the metadata returned by :meth:`.SXCU.file_meta` and
+:meth:`.SXCU.collection_meta`.
+
+.. code-block:: python
+
+    # for the helpers called on the class, and instances without a cache
+    sxcu.SXCU.meta_cache = sxcu.meta_cache.MetadataCache(ttl=60)
+    sxcu.SXCU.file_meta("QNeo92")  # sent to sxcu.net
+    sxcu.SXCU.file_meta("QNeo92")  # returned from the cache
+
+Entries are fresh for ``ttl`` seconds. During the following ``stale_ttl``
+seconds the stale value is returned immediately while it is refreshed in
+the background. If the server sent an ``ETag`` or ``Last-Modified``
+header, the refresh is a conditional request, and a ``304 Not Modified``
+reply only renews the entry.
+"""
+__all__ = [
+    "CacheStats",
+    "DiskBackend",
+    "MemoryBackend",
+    "MetadataCache",
+    "get_metadata",
+]
+
+import collections
+import concurrent.futures
+import os
+import sqlite3
+import threading
+import time
+import typing as T
+
+from . import codec
+from .__logger__ import logger
+from ._utils import check_response
+
+NOT_MODIFIED = 304
+
+_Meta = T.TypeVar("_Meta")
+
+
+class CacheEntry:
+    """A cached value with its validators and expiry time."""
+
+    __slots__ = ("value", "etag", "last_modified", "expires")
+
+    def __init__(
+        self,
+        value: T.Any,
+        etag: T.Optional[str],
+        last_modified: T.Optional[str],
+        expires: float,
+    ) -> None:
+        self.value = value
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires = expires
+
+    def validators(self) -> T.Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class CacheStats(T.NamedTuple):
+    """Counters of a :class:`MetadataCache`."""
+
+    hits: int
+    """Lookups answered with a fresh entry."""
+    stale_hits: int
+    """Lookups answered with a stale entry which was then refreshed."""
+    misses: int
+    """Lookups which waited for a request."""
+    revalidated: int
+    """Requests answered with ``304 Not Modified``."""
+    errors: int
+    """Background refreshes which failed."""
+
+
+class MemoryBackend:
+    """Keeps at most ``maxsize`` entries in memory, evicting the least
+    recently used one.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._entries: "collections.OrderedDict[str, CacheEntry]" = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> T.Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskBackend:
+    """Keeps the entries in a SQLite database, so that they survive
+    restarts and are shared between processes. Expiry times are stored as
+    wall clock time.
+    """
+
+    def __init__(self, path: T.Union[str, os.PathLike]) -> None:
+        self.path = os.path.expanduser(os.fspath(path))
+        self._local = threading.local()
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, "
+            "value TEXT, etag TEXT, last_modified TEXT, expires REAL)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> T.Optional[CacheEntry]:
+        row = (
+            self._connect()
+            .execute(
+                "SELECT value, etag, last_modified, expires FROM metadata "
+                "WHERE key = ?",
+                (key,),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        return CacheEntry(codec.loads(row[0]), row[1], row[2], row[3])
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?, ?)",
+            (
+                key,
+                codec.dumps(entry.value),
+                entry.etag,
+                entry.last_modified,
+                entry.expires,
+            ),
+        )
+
+    def delete(self, key: str) -> None:
+        self._connect().execute("DELETE FROM metadata WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        self._connect().execute("DELETE FROM metadata")
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM metadata").fetchone()[0]
+
+
+class MetadataCache:
+    """Caches the JSON of GET requests by URL.
+
+    The returned values are shared between callers and must not be
+    modified.
+
+    Parameters
+    ==========
+    backend : :class:`MemoryBackend` or :class:`DiskBackend`, optional
+        Where the entries are stored, by default a :class:`MemoryBackend`.
+        Any object with the same ``get``, ``set``, ``delete`` and ``clear``
+        methods can be used.
+    ttl : :class:`float`, optional
+        Seconds during which an entry is returned without any request.
+    stale_ttl : :class:`float`, optional
+        Seconds after ``ttl`` during which an entry is returned while it is
+        refreshed in the background.
+    clock : :class:`callable`, optional
+        Returns the current time in seconds, :func:`time.time` by default.
+    """
+
+    def __init__(
+        self,
+        backend: T.Any = None,
+        ttl: float = 300.0,
+        stale_ttl: float = 0.0,
+        *,
+        clock: T.Callable[[], float] = time.time,
+    ) -> None:
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+        self._counts = collections.Counter()
+        self._refreshing: T.Set[str] = set()
+        self._lock = threading.Lock()
+        self._executor: T.Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._tasks: T.Set[T.Any] = set()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def stats(self) -> CacheStats:
+        """Returns the counters since the cache was created."""
+        return CacheStats(*(self._counts[name] for name in CacheStats._fields))
+
+    def invalidate(self, key: str) -> None:
+        """Remove the entry of the URL ``key``."""
+        self.backend.delete(key)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def _lookup(self, key: str) -> T.Tuple[T.Optional[CacheEntry], str]:
+        """Returns the entry of ``key`` and whether it is ``fresh``,
+        ``stale`` or ``missing``, counting the lookup.
+        """
+        entry = self.backend.get(key)
+        now = self.clock()
+        if entry is not None and now < entry.expires:
+            state = "fresh"
+            self._count("hits")
+        elif entry is not None and now < entry.expires + self.stale_ttl:
+            state = "stale"
+            self._count("stale_hits")
+        else:
+            state = "missing"
+            self._count("misses")
+        return entry, state
+
+    def _store(self, key: str, entry: T.Optional[CacheEntry], res: T.Any) -> T.Any:
+        expires = self.clock() + self.ttl
+        if res.status_code == NOT_MODIFIED and entry is not None:
+            self._count("revalidated")
+            entry.expires = expires
+        else:
+            check_response(res)
+            entry = CacheEntry(
+                codec.loads(res.content),
+                res.headers.get("ETag"),
+                res.headers.get("Last-Modified"),
+                expires,
+            )
+        self.backend.set(key, entry)
+        return entry.value
+
+    def _start_refresh(self, key: str) -> bool:
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def _refresh(
+        self, key: str, entry: CacheEntry, fetch: T.Callable[[dict], T.Any]
+    ) -> None:
+        try:
+            self._store(key, entry, fetch(entry.validators()))
+        except Exception:  # pylint: disable=broad-except
+            self._count("errors")
+            logger.exception("Refreshing %s failed.", key)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, key: str, fetch: T.Callable[[dict], T.Any]) -> T.Any:
+        """Returns the value of ``key``, calling ``fetch`` with the
+        conditional request headers to get a response if needed.
+        """
+        entry, state = self._lookup(key)
+        if state == "fresh":
+            return entry.value
+        if state == "stale":
+            if self._start_refresh(key):
+                with self._lock:
+                    if self._executor is None:
+                        self._executor = concurrent.futures.ThreadPoolExecutor(
+                            2, thread_name_prefix="sxcu-meta-refresh"
+                        )
+                self._executor.submit(self._refresh, key, entry, fetch)
+            return entry.value
+        validators = entry.validators() if entry is not None else {}
+        return self._store(key, entry, fetch(validators))
+
+    async def _arefresh(
+        self, key: str, entry: CacheEntry, fetch: T.Callable[[dict], T.Awaitable]
+    ) -> None:
+        try:
+            self._store(key, entry, await fetch(entry.validators()))
+        except Exception:  # pylint: disable=broad-except
+            self._count("errors")
+            logger.exception("Refreshing %s failed.", key)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    async def aget(
+        self, key: str, fetch: T.Callable[[dict], T.Awaitable[T.Any]]
+    ) -> T.Any:
+        """Like :meth:`get`, but ``fetch`` is a coroutine function and
+        stale entries are refreshed in an :mod:`asyncio` task.
+        """
+        entry, state = self._lookup(key)
+        if state == "fresh":
+            return entry.value
+        if state == "stale":
+            if self._start_refresh(key):
+                import asyncio  # pylint: disable=import-outside-toplevel
+
+                task = asyncio.get_running_loop().create_task(
+                    self._arefresh(key, entry, fetch)
+                )
+                # keep a reference, the loop only has a weak one.
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            return entry.value
+        validators = entry.validators() if entry is not None else {}
+        return self._store(key, entry, await fetch(validators))
+
+    def close(self) -> None:
+        """Wait for the background refreshes and stop their threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def get_metadata(client: T.Any, url: str, cls: T.Type[_Meta]) -> _Meta:
+    """Returns the metadata at ``url`` as ``cls``, using the metadata cache
+    of ``client`` if it has one.
+    """
+    if client.meta_cache is None:
+        res = client.request_handler.get(url)
+        check_response(res)
+        return cls(res.content)
+    return cls(
+        client.meta_cache.get(
+            url,
+            lambda validators: client.request_handler.get(
+                url, headers=client._conditional_headers(validators)
+            ),
+        )
+    )
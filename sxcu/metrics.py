@@ -0,0 +1,268 @@
+"""An in-process metrics registry fed by the hooks of
+:class:`~.RequestClient`, which can be exported in the Prometheus text
+format.
+
+.. code-block:: python
+
+    registry = sxcu.metrics.MetricsRegistry()
+    client = sxcu.SXCU()
+    registry.instrument(client.request_handler)
+    ...
+    print(registry.render_prometheus())
+"""
+__all__ = ["Counter", "Histogram", "MetricsRegistry"]
+
+import bisect
+import threading
+import typing as T
+
+from .hooks import RequestEvent
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_Labels = T.Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: T.Sequence[str], values: T.Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(v))}"' for name, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: T.Sequence[str]
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: T.Mapping[str, T.Any]) -> _Labels:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _samples(self) -> T.Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """A monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: T.Sequence[str] = ()
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: T.Dict[_Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: T.Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: T.Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> T.Iterator[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Counts observations in cumulative buckets per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: T.Sequence[str] = (),
+        buckets: T.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [count per bucket..., count in +Inf, sum]
+        self._values: T.Dict[_Labels, T.List[float]] = {}
+
+    def observe(self, value: float, **labels: T.Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def count(self, **labels: T.Any) -> int:
+        state = self._values.get(self._key(labels))
+        return int(sum(state[:-1])) if state else 0
+
+    def _samples(self) -> T.Iterator[str]:
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        names = self.labelnames + ("le",)
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                labels = _format_labels(names, key + (_format_value(bound),))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(state[-1])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """A collection of metrics. :meth:`instrument` registers hooks on a
+    client which record:
+
+    * ``sxcu_requests_total`` by endpoint, method and status,
+    * ``sxcu_request_duration_seconds`` latency histogram by endpoint,
+      method and status,
+    * ``sxcu_request_errors_total`` requests which failed without response,
+    * ``sxcu_request_bytes_total`` bytes sent in request bodies,
+    * ``sxcu_retries_total`` retried attempts,
+    * ``sxcu_throttled_total`` and ``sxcu_throttled_seconds_total``
+      requests delayed by the rate limiter and the time spent waiting,
+    * ``sxcu_coalesced_total`` requests which weren't sent because they
+      shared the response of an identical request in flight.
+    """
+
+    def __init__(self, prefix: str = "sxcu") -> None:
+        self.prefix = prefix
+        self._metrics: T.Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        labels = ("endpoint", "method", "status")
+        self.requests = self.counter(
+            "requests_total", "Requests which received a response.", labels
+        )
+        self.latency = self.histogram(
+            "request_duration_seconds", "Total time taken by requests.", labels
+        )
+        self.errors = self.counter(
+            "request_errors_total",
+            "Requests which failed without a response.",
+            ("endpoint", "method", "error"),
+        )
+        self.bytes_sent = self.counter(
+            "request_bytes_total", "Bytes sent in request bodies.", ("endpoint",)
+        )
+        self.retries = self.counter(
+            "retries_total", "Retried attempts.", ("endpoint", "reason")
+        )
+        self.throttled = self.counter(
+            "throttled_total", "Requests delayed by the rate limit.", ("endpoint",)
+        )
+        self.throttled_seconds = self.counter(
+            "throttled_seconds_total",
+            "Seconds spent waiting for the rate limit.",
+            ("endpoint",),
+        )
+        self.coalesced = self.counter(
+            "coalesced_total",
+            "Requests which shared the response of an identical request.",
+            ("endpoint", "method"),
+        )
+
+    def _register(self, metric: _Metric) -> T.Any:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: T.Sequence[str] = ()
+    ) -> Counter:
+        """Create and register a :class:`Counter`."""
+        return self._register(
+            Counter(f"{self.prefix}_{name}", documentation, labelnames)
+        )
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: T.Sequence[str] = (),
+        buckets: T.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Create and register a :class:`Histogram`."""
+        return self._register(
+            Histogram(f"{self.prefix}_{name}", documentation, labelnames, buckets)
+        )
+
+    def _on_request_end(self, event: RequestEvent) -> None:
+        labels = {
+            "endpoint": event.endpoint,
+            "method": event.method,
+            "status": event.status_code,
+        }
+        self.requests.inc(**labels)
+        self.latency.observe(event.timings["total"], **labels)
+        if event.bytes_sent:
+            self.bytes_sent.inc(event.bytes_sent, endpoint=event.endpoint)
+
+    def _on_error(self, event: RequestEvent) -> None:
+        self.errors.inc(
+            endpoint=event.endpoint,
+            method=event.method,
+            error=type(event.error).__name__,
+        )
+
+    def _on_retry(self, event: RequestEvent) -> None:
+        reason = event.status_code if event.error is None else type(event.error)
+        self.retries.inc(
+            endpoint=event.endpoint, reason=getattr(reason, "__name__", reason)
+        )
+
+    def _on_throttled(self, event: RequestEvent) -> None:
+        self.throttled.inc(endpoint=event.endpoint)
+        self.throttled_seconds.inc(event.delay, endpoint=event.endpoint)
+
+    def _on_coalesced(self, event: RequestEvent) -> None:
+        self.coalesced.inc(endpoint=event.endpoint, method=event.method)
+
+    def instrument(self, client: T.Any) -> None:
+        """Record the requests sent by ``client``, a
+        :class:`~.RequestClient` or :class:`~.AsyncRequestClient`.
+        """
+        client.hooks.add("request_end", self._on_request_end)
+        client.hooks.add("error", self._on_error)
+        client.hooks.add("retry", self._on_retry)
+        client.hooks.add("throttled", self._on_throttled)
+        client.hooks.add("coalesced", self._on_coalesced)
+
+    def render_prometheus(self) -> str:
+        """Returns all the metrics in the Prometheus text exposition
+        format.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
@@ -0,0 +1,208 @@
+"""Keep a local copy of a collection up to date.
+
+:func:`mirror_collection` stores a manifest of the mirrored files next to
+them, so that later runs only download the files which were added or
+changed since, see :meth:`.SXCU.mirror_collection`.
+"""
+__all__ = ["MirrorReport", "mirror_collection"]
+
+import os
+import tempfile
+import typing as T
+from urllib.parse import urlsplit
+
+from . import codec
+from ._utils import check_response, join_url
+from .batch import run_many
+from .download import download_file
+from .results import CollectionMeta
+
+MANIFEST_NAME = ".sxcu-mirror.json"
+NOT_MODIFIED = 304
+
+
+class MirrorReport(T.NamedTuple):
+    """What a run of :func:`mirror_collection` did."""
+
+    collection_id: str
+    not_modified: bool
+    """Whether the server replied that the collection didn't change."""
+    downloaded: T.List[str]
+    """The IDs of the files downloaded."""
+    unchanged: int
+    """The number of files which were already mirrored."""
+    removed: T.List[str]
+    """The IDs of the files no longer in the collection."""
+    failed: T.Dict[str, BaseException]
+    """The errors of the files which couldn't be downloaded, by ID."""
+    bytes: int
+    """The bytes downloaded."""
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+
+def _local_name(file_id: str, url: T.Optional[str]) -> str:
+    name = os.path.basename(urlsplit(url).path) if url else ""
+    # don't let the server pick hidden files, like the manifest.
+    if not name or name.startswith("."):
+        return file_id
+    return name
+
+
+def _is_mirrored(
+    path: str, size: T.Optional[int], known: T.Optional[T.Mapping[str, T.Any]]
+) -> bool:
+    try:
+        local_size = os.stat(path).st_size
+    except FileNotFoundError:
+        return False
+    if size is not None:
+        return local_size == size
+    # sizes aren't listed, trust the manifest.
+    return known is not None and known.get("size") == local_size
+
+
+def read_manifest(dest: str) -> T.Dict[str, T.Any]:
+    """Returns the manifest of the mirror in ``dest``, empty if there is
+    none or it can't be read.
+    """
+    try:
+        with open(os.path.join(dest, MANIFEST_NAME), "rb") as file:
+            manifest = codec.loads(file.read())
+    except (OSError, ValueError):
+        return {"files": {}}
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("files"), dict):
+        return {"files": {}}
+    return manifest
+
+
+def _write_manifest(dest: str, manifest: T.Mapping[str, T.Any]) -> None:
+    fd, tmp = tempfile.mkstemp(dir=dest, prefix=MANIFEST_NAME)
+    with os.fdopen(fd, "w", encoding="utf-8") as file:
+        file.write(codec.dumps(manifest))
+    os.replace(tmp, os.path.join(dest, MANIFEST_NAME))
+
+
+def mirror_collection(
+    client: T.Any,
+    collection_id: str,
+    dest: T.Union[str, os.PathLike],
+    concurrency: int = 4,
+    *,
+    prune: bool = False,
+) -> MirrorReport:
+    """Download the files of a collection into ``dest`` which aren't there
+    yet, using ``concurrency`` worker threads.
+
+    The files listed by the manifest in ``dest`` whose size didn't change
+    are skipped. The manifest also keeps the ``ETag`` of the collection,
+    so a run without changes costs a single conditional metadata request.
+    Files are downloaded using :func:`~.download.download_file`, so they are
+    renamed into place once complete and interrupted downloads resume.
+
+    Parameters
+    ==========
+    client : :class:`.SXCU`
+        Used for the requests.
+    collection_id : :class:`str`
+        The collection to mirror.
+    dest : :class:`str`
+        The directory of the mirror, created if needed.
+    concurrency : :class:`int`, optional
+        The number of files downloaded at the same time.
+    prune : :class:`bool`, optional
+        Delete the local copy of files which were removed from the
+        collection.
+
+    Raises
+    ======
+    :class:`ValueError`
+        If ``dest`` is the mirror of another collection.
+    """
+    dest = os.fspath(dest)
+    os.makedirs(dest, exist_ok=True)
+    manifest = read_manifest(dest)
+    if manifest.get("collection_id", collection_id) != collection_id:
+        raise ValueError(
+            f"{dest} is the mirror of the collection {manifest['collection_id']}."
+        )
+    known: T.Dict[str, T.Dict[str, T.Any]] = manifest["files"]
+
+    validators = {}
+    if manifest.get("etag"):
+        validators["If-None-Match"] = manifest["etag"]
+    if manifest.get("last_modified"):
+        validators["If-Modified-Since"] = manifest["last_modified"]
+    url = join_url(client.api_endpoint, f"/collections/{collection_id}")
+    res = client.request_handler.get(
+        url, headers=client._conditional_headers(validators)
+    )
+    not_modified = res.status_code == NOT_MODIFIED
+    if not_modified:
+        listing = [dict(entry, id=file_id) for file_id, entry in known.items()]
+        etag, last_modified = manifest.get("etag"), manifest.get("last_modified")
+    else:
+        check_response(res)
+        listing = CollectionMeta(res.content).files or []
+        etag = res.headers.get("ETag")
+        last_modified = res.headers.get("Last-Modified")
+
+    files: T.Dict[str, T.Dict[str, T.Any]] = {}
+    pending = []
+    for file in listing:
+        file_id = file["id"]
+        entry = {
+            "name": _local_name(file_id, file.get("url")),
+            "size": file.get("size"),
+            "url": file.get("url"),
+        }
+        files[file_id] = entry
+        path = os.path.join(dest, entry["name"])
+        if not _is_mirrored(path, entry["size"], known.get(file_id)):
+            pending.append(file_id)
+
+    def download(file_id: str) -> int:
+        entry = files[file_id]
+        path = os.path.join(dest, entry["name"])
+        result = download_file(client, entry["url"] or file_id, path)
+        entry["url"], entry["size"] = result.url, result.size
+        return result.received
+
+    downloaded, failed, total = [], {}, 0
+    for outcome in run_many(
+        download, pending, concurrency, thread_name_prefix="sxcu-mirror"
+    ):
+        if outcome.ok:
+            downloaded.append(outcome.item)
+            total += outcome.result
+        else:
+            failed[outcome.item] = outcome.error
+            del files[outcome.item]
+
+    removed = [file_id for file_id in known if file_id not in files]
+    if prune:
+        for file_id in removed:
+            if file_id in failed:
+                continue
+            try:
+                os.unlink(os.path.join(dest, known[file_id]["name"]))
+            except FileNotFoundError:
+                pass
+    removed = [file_id for file_id in removed if file_id not in failed]
+
+    manifest = {"collection_id": collection_id, "files": files}
+    if not failed:
+        # else the next run has to list the collection again.
+        manifest.update(etag=etag, last_modified=last_modified)
+    _write_manifest(dest, manifest)
+    return MirrorReport(
+        collection_id,
+        not_modified,
+        downloaded,
+        len(files) - len(downloaded),
+        removed,
+        failed,
+        total,
+    )
@@ -0,0 +1,304 @@
+"""A streaming ``multipart/form-data`` encoder used for uploading files.
+
+:class:`MultipartEncoder` produces the request body chunk by chunk while
+it is being sent, so the memory used by an upload doesn't depend on the
+size of the file. Files on disk are read through :mod:`mmap`.
+"""
+__all__ = ["MultipartEncoder", "PreparedFields", "UploadProgress"]
+
+import io
+import mimetypes
+import mmap
+import os
+import stat
+import time
+import typing as T
+import uuid
+
+from .constants import UPLOAD_CHUNK_SIZE
+
+Source = T.Union[str, os.PathLike, T.IO[bytes], bytes, memoryview, T.Iterable[bytes]]
+
+
+class UploadProgress(T.NamedTuple):
+    """The progress of an upload, passed to the ``progress`` callback.
+    ``total`` is ``None`` when the size of the body isn't known.
+    """
+
+    bytes_sent: int
+    total: T.Optional[int]
+    elapsed: float
+    throughput: float
+    """Bytes per second since the upload started."""
+
+
+class _PathSource:
+    def __init__(self, path: T.Union[str, os.PathLike]) -> None:
+        self.path = path
+        st = os.stat(path)
+        # named pipes and devices have no size and can only be read once,
+        # they are sent using chunked transfer encoding.
+        self.rewindable = stat.S_ISREG(st.st_mode)
+        self.length: T.Optional[int] = st.st_size if self.rewindable else None
+        self.name = os.path.basename(os.fspath(path))
+
+    def chunks(self, chunk_size: int) -> T.Iterator[bytes]:
+        with open(self.path, "rb") as fileobj:
+            if not self.length:
+                # empty files and pipes can't be mapped.
+                yield from _FileSource(fileobj).chunks(chunk_size)
+                return
+            with mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for start in range(0, len(view), chunk_size):
+                        yield bytes(view[start : start + chunk_size])
+                finally:
+                    view.release()
+
+
+class _FileSource:
+    def __init__(self, fileobj: T.IO[bytes]) -> None:
+        self.fileobj = fileobj
+        name = getattr(fileobj, "name", None)
+        # pseudo files are named like ``<stdin>``, and fds are ints
+        if not isinstance(name, str) or name.startswith("<"):
+            name = None
+        self.name = os.path.basename(name) if name else None
+        self.start = self._start()
+        self.rewindable = self.start is not None
+        self.length = self._length()
+
+    def _start(self) -> T.Optional[int]:
+        # ``SpooledTemporaryFile`` has no ``seekable()`` before Python 3.11
+        seekable = getattr(self.fileobj, "seekable", None)
+        try:
+            if seekable is not None and not seekable():
+                return None
+            return self.fileobj.tell()
+        except (AttributeError, OSError):
+            return None
+
+    def _length(self) -> T.Optional[int]:
+        # seek instead of ``fstat`` so that spooled files aren't rolled
+        # over to disk by ``fileno()``
+        if self.start is None:
+            return None
+        end = self.fileobj.seek(0, io.SEEK_END)
+        self.fileobj.seek(self.start)
+        return end - self.start
+
+    def chunks(self, chunk_size: int) -> T.Iterator[bytes]:
+        if self.start is not None:
+            self.fileobj.seek(self.start)
+        while True:
+            chunk = self.fileobj.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+class _BytesSource:
+    def __init__(self, data: T.Union[bytes, bytearray, memoryview]) -> None:
+        self.view = memoryview(data).cast("B")
+        self.length: T.Optional[int] = len(self.view)
+        self.rewindable = True
+        self.name = None
+
+    def chunks(self, chunk_size: int) -> T.Iterator[bytes]:
+        for start in range(0, len(self.view), chunk_size):
+            yield bytes(self.view[start : start + chunk_size])
+
+
+class _IterableSource:
+    def __init__(self, iterable: T.Iterable[bytes]) -> None:
+        self.iterable = iterable
+        self.length: T.Optional[int] = None
+        self.rewindable = False
+        self.name = None
+
+    def chunks(self, chunk_size: int) -> T.Iterator[bytes]:
+        for chunk in self.iterable:
+            if chunk:
+                yield bytes(chunk)
+
+
+def _make_source(source: Source) -> T.Any:
+    if isinstance(source, (str, os.PathLike)):
+        return _PathSource(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return _BytesSource(source)
+    if hasattr(source, "read"):
+        return _FileSource(source)
+    if hasattr(source, "__iter__"):
+        return _IterableSource(source)
+    raise TypeError(f"Can't upload an object of type {type(source).__name__}")
+
+
+def _quote(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', "%22").replace("\r\n", "%0D%0A")
+
+
+class PreparedFields:
+    """Form fields encoded once, to be sent with many files by passing
+    them as the ``fields`` of :class:`MultipartEncoder`. Only the parts
+    are encoded, every body still gets its own boundary.
+    """
+
+    __slots__ = ("fields", "parts")
+
+    def __init__(self, fields: T.Mapping[str, str]) -> None:
+        self.fields = dict(fields)
+        self.parts = tuple(
+            (
+                f'Content-Disposition: form-data; name="{_quote(name)}"\r\n\r\n'
+                f"{value}\r\n"
+            ).encode()
+            for name, value in self.fields.items()
+        )
+
+
+class MultipartEncoder:
+    """Encodes form fields and a single file as ``multipart/form-data``,
+    producing the body lazily in chunks of ``chunk_size`` bytes.
+
+    The encoder is a file-like object which can be passed as ``data`` to
+    :mod:`requests`. If the size of the file is known, ``Content-Length``
+    is sent, else iterate over :meth:`iter_chunks` to send the body using
+    chunked transfer encoding.
+
+    Parameters
+    ==========
+    fields : :class:`dict` or :class:`PreparedFields`
+        The form fields sent before the file.
+    file_field : :class:`str`
+        The name of the form field containing the file.
+    source
+        A path, a binary file object, :class:`bytes`, :class:`memoryview`
+        or an iterable of :class:`bytes`.
+    filename : :class:`str`, optional
+        The filename sent for the file. Defaults to the name of the source.
+    progress : :class:`callable`, optional
+        Called with an :class:`UploadProgress` after every chunk read.
+    """
+
+    def __init__(
+        self,
+        fields: T.Mapping[str, str],
+        file_field: str,
+        source: Source,
+        filename: T.Optional[str] = None,
+        *,
+        chunk_size: int = UPLOAD_CHUNK_SIZE,
+        progress: T.Optional[T.Callable[[UploadProgress], None]] = None,
+    ) -> None:
+        if not isinstance(fields, PreparedFields):
+            fields = PreparedFields(fields)
+        self.fields = fields.fields
+        self.source = _make_source(source)
+        self.filename = filename or self.source.name or file_field
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.boundary = uuid.uuid4().hex
+        delimiter = f"--{self.boundary}\r\n".encode()
+        self._encoded_fields = b"".join(delimiter + part for part in fields.parts)
+        content_type = mimetypes.guess_type(self.filename)[0]
+        self._head = self._encode_head(file_field, content_type)
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode()
+        self.len: T.Optional[int] = None
+        if self.source.length is not None:
+            self.len = len(self._head) + self.source.length + len(self._tail)
+        self._reset()
+
+    def _encode_head(self, file_field: str, content_type: T.Optional[str]) -> bytes:
+        return (
+            self._encoded_fields
+            + (
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{_quote(file_field)}"; '
+                f'filename="{_quote(self.filename)}"\r\n'
+                f"Content-Type: {content_type or 'application/octet-stream'}"
+                "\r\n\r\n"
+            ).encode()
+        )
+
+    @property
+    def content_type(self) -> str:
+        """The value of the ``Content-Type`` header for this body."""
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def _reset(self) -> None:
+        self._chunks: T.Optional[T.Iterator[bytes]] = None
+        self._buffer = b""
+        self._position = 0
+        self._started: T.Optional[float] = None
+
+    def _generate(self) -> T.Iterator[bytes]:
+        yield self._head
+        yield from self.source.chunks(self.chunk_size)
+        yield self._tail
+
+    def _next_chunk(self) -> bytes:
+        if self._chunks is None:
+            self._chunks = self._generate()
+            self._started = time.perf_counter()
+        return next(self._chunks, b"")
+
+    def _report(self) -> None:
+        elapsed = time.perf_counter() - self._started
+        sent = self._position
+        self.progress(
+            UploadProgress(sent, self.len, elapsed, sent / elapsed if elapsed else 0.0)
+        )
+
+    def iter_chunks(self) -> T.Iterator[bytes]:
+        """Yield the body in chunks, for chunked transfer encoding."""
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def __iter__(self) -> T.Iterator[bytes]:
+        return self.iter_chunks()
+
+    def __len__(self) -> int:
+        if self.len is None:
+            raise TypeError("The length of the body isn't known.")
+        return self.len - self._position
+
+    def read(self, size: int = -1) -> bytes:
+        """Read at most ``size`` bytes of the body."""
+        buffer = self._buffer
+        while size < 0 or len(buffer) < size:
+            chunk = self._next_chunk()
+            if not chunk:
+                break
+            buffer = buffer + chunk if buffer else chunk
+        if size < 0:
+            data, self._buffer = buffer, b""
+        else:
+            data, self._buffer = buffer[:size], buffer[size:]
+        self._position += len(data)
+        if data and self.progress is not None:
+            self._report()
+        return data
+
+    def tell(self) -> int:
+        return self._position
+
+    def seekable(self) -> bool:
+        return self.source.rewindable
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        """Only rewinding to the start of the body is supported."""
+        if offset != 0 or whence != io.SEEK_SET or not self.source.rewindable:
+            raise io.UnsupportedOperation("Can only rewind to the start.")
+        self.close()
+        self._reset()
+        return 0
+
+    def close(self) -> None:
+        if self._chunks is not None:
+            self._chunks.close()
+            self._chunks = None
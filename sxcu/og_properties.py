@@ -4,16 +4,25 @@ __all__ = [
     "OGProperties",
 ]
 
-import json
 import typing as T
 
+from . import codec
+
+_FIELDS = ("color", "description", "title", "discord_hide_url", "site_name")
+
 
 class OGProperties:
     """
     This is a helper class for main SXCU function. This helps you to reuse
     the :class:`OGProperties`.
+
+    The properties are immutable and hashable, so that they can be shared
+    between threads and :class:`~.UploadProfile` objects. Use
+    :meth:`replace` to change them.
     """
 
+    __slots__ = _FIELDS + ("_export",)
+
     def __init__(
         self,
         color: T.Union[str, bool] = None,
@@ -22,29 +31,65 @@ class OGProperties:
         discord_hide_url: bool = False,
         site_name: T.Union[str, bool] = None,
     ) -> None:
-        self.color = color
-        self.description = description
-        self.title = title
-        self.discord_hide_url = discord_hide_url
-        self.site_name = site_name
+        _set = object.__setattr__
+        _set(self, "color", color)
+        _set(self, "description", description)
+        _set(self, "title", title)
+        _set(self, "discord_hide_url", discord_hide_url)
+        _set(self, "site_name", site_name)
+        _set(self, "_export", None)
+
+    def __setattr__(self, name: str, value: T.Any) -> None:
+        raise AttributeError(
+            "OGProperties is immutable, use OGProperties.replace() instead."
+        )
+
+    def _key(self) -> tuple:
+        return tuple(getattr(self, name) for name in _FIELDS)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, OGProperties):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        args = ", ".join(f"{name}={getattr(self, name)!r}" for name in _FIELDS)
+        return f"OGProperties({args})"
+
+    def __reduce__(self) -> T.Tuple[T.Any, ...]:
+        return OGProperties, self._key()
+
+    def replace(self, **changes: T.Any) -> "OGProperties":
+        """Returns a copy with the properties in ``changes`` replaced."""
+        values = dict(zip(_FIELDS, self._key()))
+        values.update(changes)
+        return OGProperties(**values)
 
     def export(self) -> str:
-        """Exports the Property set to a JSON file.
+        """Exports the Property set to a JSON file. It is encoded once and
+        cached.
 
         Returns
         =======
         :class:`str`
-            Using ``json.dumps`` the content of JSON file is dumped.
+            The properties encoded using :func:`.codec.dumps`.
         """
-        return json.dumps(
-            {
-                "color": self.color or False,
-                "title": self.title or False,
-                "description": self.description or False,
-                "discord_hide_url": self.discord_hide_url,
-                "site_name": self.site_name or False,
-            }
-        )
+        exported = self._export
+        if exported is None:
+            exported = codec.dumps(
+                {
+                    "color": self.color or False,
+                    "title": self.title or False,
+                    "description": self.description or False,
+                    "discord_hide_url": self.discord_hide_url,
+                    "site_name": self.site_name or False,
+                }
+            )
+            object.__setattr__(self, "_export", exported)
+        return exported
 
     @classmethod
     def from_json(cls, contents: str) -> "OGProperties":
@@ -60,7 +105,7 @@ class OGProperties:
         :class:`str`
             Using ``json.dumps`` the content of JSON file is dumped.
         """
-        _dict = json.loads(contents)
+        _dict = codec.loads(contents)
 
         color = _dict["color"]
         description = _dict["description"]
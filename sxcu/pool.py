@@ -0,0 +1,377 @@
+"""Spread uploads over several accounts or subdomains.
+
+:class:`SXCUPool` holds several :class:`.SXCU` clients, for example one
+per ``.sxcu`` config, and sends every upload through one of them, chosen
+by weighted round-robin or by the least expected wait. Members which keep
+failing are ejected for a while and then probed again with a single
+upload.
+
+.. code-block:: python
+
+    with sxcu.pool.SXCUPool(["a.sxcu", "b.sxcu", "c.sxcu"]) as pool:
+        for outcome in pool.upload_many(paths):
+            print(outcome.result["url"])
+"""
+__all__ = ["PoolMember", "SXCUPool"]
+
+import os
+import threading
+import time
+import typing as T
+
+from .__client__ import RequestClient
+from .__logger__ import logger
+from ._utils import join_url
+from .batch import Outcome, run_many
+from .exceptions import ServerError, SXCUConnectionError, SXCUError
+from .profile import UploadProfile
+from .ratelimit import RateLimiter
+from .results import UploadResult
+from .sxcu import SXCU
+
+Member = T.Union[SXCU, str, os.PathLike]
+
+STRATEGIES = ("weighted", "least_loaded")
+# statuses of errors caused by the member itself, like a revoked token
+UNHEALTHY_STATUSES = frozenset({401, 403})
+# weight of the last upload in the average latency
+LATENCY_ALPHA = 0.3
+
+
+def _is_member_failure(error: BaseException) -> bool:
+    """Whether ``error`` says that the member is unhealthy, rather than
+    that the file or the options are invalid.
+    """
+    if isinstance(error, (ServerError, SXCUConnectionError)):
+        return True
+    return getattr(error, "status_code", None) in UNHEALTHY_STATUSES
+
+
+def _rewindable(source: T.Any) -> bool:
+    return isinstance(source, (str, os.PathLike, bytes, bytearray, memoryview))
+
+
+class PoolMember:
+    """A client in an :class:`SXCUPool` with its health and load.
+
+    Attributes
+    ==========
+    client : :class:`.SXCU`
+        The client used for the uploads of this member.
+    name : :class:`str`
+        The subdomain of the client.
+    weight : :class:`float`
+        The share of the uploads of this member, relative to the others.
+    in_flight : :class:`int`
+        The uploads currently sent through this member.
+    latency : :class:`float`
+        The exponential moving average of the upload time in seconds,
+        ``None`` before the first upload.
+    uploads : :class:`int`
+        The successful uploads.
+    failures : :class:`int`
+        The failed uploads which counted against the health of the member.
+    consecutive_failures : :class:`int`
+        The failures since the last success.
+    ejected_until : :class:`float`
+        When an ejected member may be probed again, ``None`` if healthy.
+    """
+
+    __slots__ = (
+        "client",
+        "name",
+        "weight",
+        "in_flight",
+        "latency",
+        "uploads",
+        "failures",
+        "consecutive_failures",
+        "ejected_until",
+        "ejections",
+        "probing",
+        "current_weight",
+        "upload_url",
+    )
+
+    def __init__(self, client: SXCU, weight: float = 1.0) -> None:
+        if weight <= 0:
+            raise ValueError("weight must be positive")
+        self.client = client
+        self.name = client.subdomain
+        self.weight = weight
+        self.in_flight = 0
+        self.latency: T.Optional[float] = None
+        self.uploads = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejected_until: T.Optional[float] = None
+        self.ejections = 0
+        self.probing = False
+        self.current_weight = 0.0
+        self.upload_url = join_url(join_url(client.subdomain, "/api"), "/files/create")
+
+    @property
+    def healthy(self) -> bool:
+        return self.ejected_until is None
+
+    def budget_wait(self) -> float:
+        """Seconds until the upload bucket of the member has budget again,
+        ``0`` if it has budget or it is unknown.
+        """
+        limiter = self.client.request_handler.rate_limiter
+        status = limiter.route_status("POST", self.upload_url) if limiter else None
+        if status is None or status.remaining > 0 or status.reset_after is None:
+            return 0.0
+        return status.reset_after
+
+    def expected_wait(self) -> float:
+        """The estimated seconds until one more upload through this member
+        completes, from its budget, latency and uploads in flight.
+        """
+        latency = self.latency if self.latency is not None else 0.0
+        return self.budget_wait() + (self.in_flight + 1) * latency / self.weight
+
+    def __repr__(self) -> str:
+        state = "healthy" if self.healthy else "ejected"
+        return f"<PoolMember {self.name} {state} in_flight={self.in_flight}>"
+
+
+class SXCUPool:
+    """Spreads uploads over several :class:`.SXCU` clients, so that the
+    throughput grows with the number of accounts and subdomains.
+
+    Members are :class:`.SXCU` instances or paths to ``.sxcu`` configs.
+    Clients created from configs get their own :class:`~.RateLimiter`, so
+    their budgets are tracked separately; give the :class:`.SXCU` instances
+    their own limiter too if their limits are independent.
+
+    Parameters
+    ==========
+    members : :class:`list`
+        The clients or configs, or ``(member, weight)`` tuples.
+    strategy : :class:`str`, optional
+        ``"weighted"`` for smooth weighted round-robin over the members
+        with budget left, or ``"least_loaded"`` for the member with the
+        shortest expected wait, from its remaining rate-limit budget,
+        average latency and uploads in flight.
+    max_failures : :class:`int`, optional
+        The consecutive failures after which a member is ejected. Server
+        errors, connection errors and rejected tokens count as failures.
+    eject_time : :class:`float`, optional
+        Seconds before an ejected member is probed again with an upload.
+        It doubles every time the probe fails, up to ``max_eject_time``.
+    max_eject_time : :class:`float`, optional
+        The longest ejection.
+    failover : :class:`bool`, optional
+        Retry an upload which failed because of its member on another
+        member. Only paths and :class:`bytes` are retried.
+    """
+
+    def __init__(
+        self,
+        members: T.Iterable[T.Union[Member, T.Tuple[Member, float]]],
+        *,
+        strategy: str = "weighted",
+        max_failures: int = 3,
+        eject_time: float = 30.0,
+        max_eject_time: float = 300.0,
+        failover: bool = True,
+        clock: T.Callable[[], float] = time.monotonic,
+    ) -> None:
+        if strategy not in STRATEGIES:
+            raise ValueError(f"strategy must be one of {STRATEGIES}")
+        self.strategy = strategy
+        self.max_failures = max_failures
+        self.eject_time = eject_time
+        self.max_eject_time = max_eject_time
+        self.failover = failover
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._owned: T.List[SXCU] = []
+        self.members: T.List[PoolMember] = []
+        for member in members:
+            weight = 1.0
+            if isinstance(member, tuple):
+                member, weight = member
+            if not isinstance(member, SXCU):
+                member = SXCU(
+                    sxcu_config=member,
+                    request_client=RequestClient(rate_limiter=RateLimiter()),
+                )
+                self._owned.append(member)
+            self.members.append(PoolMember(member, weight))
+        if not self.members:
+            raise ValueError("SXCUPool needs at least one member")
+
+    def close(self) -> None:
+        """Close the clients created by the pool from configs."""
+        for client in self._owned:
+            client.close()
+
+    def __enter__(self) -> "SXCUPool":
+        return self
+
+    def __exit__(self, *args: T.Any) -> None:
+        self.close()
+
+    def _eligible(self, now: float, exclude: T.Container[PoolMember]) -> list:
+        eligible = []
+        for member in self.members:
+            if member in exclude or member.probing:
+                continue
+            if member.ejected_until is not None and member.ejected_until > now:
+                continue
+            eligible.append(member)
+        return eligible
+
+    def _choose(self, members: T.List[PoolMember]) -> PoolMember:
+        if self.strategy == "least_loaded":
+            return min(members, key=PoolMember.expected_wait)
+        # only wait for a rate limit if every member has to.
+        ready = [member for member in members if member.budget_wait() <= 0]
+        members = ready or members
+        total = 0.0
+        chosen = members[0]
+        for member in members:
+            member.current_weight += member.weight
+            total += member.weight
+            if member.current_weight > chosen.current_weight:
+                chosen = member
+        chosen.current_weight -= total
+        return chosen
+
+    def acquire(self, exclude: T.Container[PoolMember] = ()) -> PoolMember:
+        """Choose the member for an upload and count it as in flight.
+        Pass it to :meth:`release` once the upload is done.
+
+        An ejected member whose ejection is over is probed first: it gets
+        this upload and no other until the probe completes. If every member is
+        ejected, the one probed the soonest is used.
+        """
+        with self._lock:
+            now = self.clock()
+            members = self._eligible(now, exclude)
+            probes = [m for m in members if m.ejected_until is not None]
+            if probes:
+                chosen = probes[0]
+            elif members:
+                chosen = self._choose(members)
+            else:
+                candidates = [m for m in self.members if m not in exclude] or list(
+                    self.members
+                )
+                chosen = min(candidates, key=lambda m: m.ejected_until or 0.0)
+            if chosen.ejected_until is not None:
+                chosen.probing = True
+                logger.info("Probing pool member %s.", chosen.name)
+            chosen.in_flight += 1
+            return chosen
+
+    def release(
+        self,
+        member: PoolMember,
+        elapsed: float,
+        error: T.Optional[BaseException] = None,
+    ) -> None:
+        """Record the outcome of an upload sent through ``member``."""
+        with self._lock:
+            member.in_flight -= 1
+            probing, member.probing = member.probing, False
+            if error is None:
+                member.uploads += 1
+                if member.latency is None:
+                    member.latency = elapsed
+                else:
+                    member.latency += LATENCY_ALPHA * (elapsed - member.latency)
+                member.consecutive_failures = 0
+                if member.ejected_until is not None:
+                    logger.info("Pool member %s is healthy again.", member.name)
+                member.ejected_until = None
+                member.ejections = 0
+                return
+            if not _is_member_failure(error):
+                # says nothing about the member, like an invalid file or an
+                # interrupted upload; an interrupted probe is sent again.
+                return
+            member.failures += 1
+            member.consecutive_failures += 1
+            if probing or member.consecutive_failures >= self.max_failures:
+                duration = min(
+                    self.eject_time * 2**member.ejections, self.max_eject_time
+                )
+                member.ejections += 1
+                member.ejected_until = self.clock() + duration
+                logger.warning(
+                    "Ejected pool member %s for %.0fs after %s.",
+                    member.name,
+                    duration,
+                    error,
+                )
+
+    def upload_file(
+        self,
+        name: T.Any = None,
+        fileobj: T.Any = None,
+        *,
+        profile: T.Optional[UploadProfile] = None,
+        **options: T.Any,
+    ) -> UploadResult:
+        """Upload a file through one of the members. The parameters are the
+        ones of :meth:`.SXCU.upload_file`, except that ``profile`` can't set
+        a token or subdomain, as every member has its own.
+
+        Raises
+        ======
+        :class:`~.SXCUError`:
+            The error of the last member tried.
+        """
+        if profile is not None and (profile.token or profile.subdomain):
+            raise ValueError("The profile of a pool can't set a token or subdomain.")
+        source = fileobj if fileobj is not None else name or options.get("file")
+        attempts = len(self.members) if self.failover and _rewindable(source) else 1
+        tried: T.List[PoolMember] = []
+        while True:
+            member = self.acquire(tried)
+            tried.append(member)
+            start = time.perf_counter()
+            try:
+                result = member.client.upload_file(
+                    name, fileobj, profile=profile, **options
+                )
+            except SXCUError as e:
+                self.release(member, time.perf_counter() - start, e)
+                if len(tried) >= attempts or not _is_member_failure(e):
+                    raise
+                logger.info("Upload through %s failed, failing over.", member.name)
+                continue
+            except BaseException as e:
+                self.release(member, time.perf_counter() - start, e)
+                raise
+            self.release(member, time.perf_counter() - start)
+            return result
+
+    def upload_many(
+        self,
+        sources: T.Iterable[T.Any],
+        concurrency: T.Optional[int] = None,
+        *,
+        ordered: bool = False,
+        **options: T.Any,
+    ) -> T.Iterator[Outcome]:
+        """Upload many files over the members, see :meth:`.SXCU.upload_many`.
+        ``concurrency`` defaults to four uploads per member.
+        """
+        if concurrency is None:
+            concurrency = 4 * len(self.members)
+
+        def upload(source: T.Any) -> UploadResult:
+            filename = None
+            if isinstance(source, tuple):
+                filename, source = source
+            if isinstance(source, (str, os.PathLike)):
+                return self.upload_file(source, filename=filename, **options)
+            return self.upload_file(fileobj=source, filename=filename, **options)
+
+        return run_many(
+            upload, sources, concurrency, ordered, thread_name_prefix="sxcu-pool"
+        )
@@ -0,0 +1,149 @@
+"""The options of uploads, prepared once and reused.
+"""
+__all__ = ["UploadProfile"]
+
+import typing as T
+
+from ._utils import join_url
+from .multipart import PreparedFields
+from .og_properties import OGProperties
+
+_OPTIONS = (
+    "token",
+    "collection",
+    "collection_token",
+    "noembed",
+    "self_destruct",
+    "og_properties",
+    "subdomain",
+)
+
+
+class UploadProfile:
+    """The options of uploads, validated and encoded once so that many
+    files can be uploaded with them without rebuilding the form. Pass it as
+    ``profile`` to :meth:`.SXCU.upload_file`, :meth:`.SXCU.upload_many` or
+    :meth:`.AsyncSXCU.upload_file`.
+
+    Profiles are immutable and hashable, so they can be shared between
+    threads. Use :meth:`replace` to change an option.
+
+    .. code-block:: python
+
+        profile = sxcu.UploadProfile(collection="abc", noembed=True)
+        for path in paths:
+            client.upload_file(path, profile=profile)
+
+    Parameters
+    ==========
+    token : :class:`str`, optional
+        The upload token, the one of the client by default.
+    collection : :class:`str`, optional
+        The collection to upload to.
+    collection_token : :class:`str`, optional
+        The token of a private ``collection``.
+    noembed : :class:`bool`, optional
+        Return a direct link to the file.
+    self_destruct : :class:`bool`, optional
+        Delete the file automatically after 24 hours.
+    og_properties : :class:`~.OGProperties`, optional
+        The OpenGraph properties of the files.
+    subdomain : :class:`str`, optional
+        The subdomain to upload to, the one of the client by default.
+
+    Attributes
+    ==========
+    prepared : :class:`~.PreparedFields`
+        The form fields, encoded for :class:`~.MultipartEncoder`.
+    url : :class:`str`
+        The upload endpoint, ``None`` without a ``subdomain``.
+
+    Raises
+    ======
+    :class:`TypeError`
+        If ``og_properties`` isn't an :class:`~.OGProperties`.
+    """
+
+    __slots__ = _OPTIONS + ("prepared", "url", "_hash")
+
+    def __init__(
+        self,
+        token: T.Optional[str] = None,
+        collection: T.Optional[str] = None,
+        collection_token: T.Optional[str] = None,
+        noembed: bool = False,
+        self_destruct: bool = False,
+        og_properties: T.Optional[OGProperties] = None,
+        subdomain: T.Optional[str] = None,
+    ) -> None:
+        if og_properties is not None and not isinstance(og_properties, OGProperties):
+            raise TypeError(
+                "og_properties must be OGProperties, "
+                f"not {type(og_properties).__name__}"
+            )
+        _set = object.__setattr__
+        _set(self, "token", token or None)
+        _set(self, "collection", collection or None)
+        _set(self, "collection_token", collection_token or None)
+        _set(self, "noembed", bool(noembed))
+        _set(self, "self_destruct", bool(self_destruct))
+        _set(self, "og_properties", og_properties)
+        _set(self, "subdomain", subdomain or None)
+        _set(self, "_hash", hash(self._key()))
+
+        fields = {}
+        if self.token:
+            fields["token"] = self.token
+        if self.collection:
+            fields["collection"] = self.collection
+        if self.collection_token:
+            fields["collection_token"] = self.collection_token
+        if self.noembed:
+            fields["noembed"] = ""
+        if og_properties:
+            fields["og_properties"] = og_properties.export()
+        if self.self_destruct:
+            fields["self_destruct"] = ""
+        _set(self, "prepared", PreparedFields(fields))
+        url = None
+        if self.subdomain:
+            url = join_url(join_url(self.subdomain, "/api"), "/files/create")
+        _set(self, "url", url)
+
+    @property
+    def fields(self) -> T.Dict[str, str]:
+        """The form fields sent with the files. Don't modify it."""
+        return self.prepared.fields
+
+    def __setattr__(self, name: str, value: T.Any) -> None:
+        raise AttributeError(
+            "UploadProfile is immutable, use UploadProfile.replace() instead."
+        )
+
+    def _key(self) -> tuple:
+        return tuple(getattr(self, name) for name in _OPTIONS)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, UploadProfile):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __repr__(self) -> str:
+        # the tokens are secrets, don't show them.
+        args = ", ".join(
+            f"{name}={'...' if 'token' in name and value else value!r}"
+            for name, value in zip(_OPTIONS, self._key())
+        )
+        return f"UploadProfile({args})"
+
+    def __reduce__(self) -> T.Tuple[T.Any, ...]:
+        return UploadProfile, self._key()
+
+    def replace(self, **changes: T.Any) -> "UploadProfile":
+        """Returns a copy with the options in ``changes`` replaced."""
+        values = dict(zip(_OPTIONS, self._key()))
+        values.update(changes)
+        return UploadProfile(**values)
@@ -0,0 +1,257 @@
+"""Client side rate limiting using the rate-limit headers returned by
+sxcu.net.
+
+Every response from sxcu.net contains headers describing the rate-limit
+bucket the request counted against::
+
+    X-RateLimit-Bucket: upload
+    X-RateLimit-Limit: 5
+    X-RateLimit-Remaining: 4
+    X-RateLimit-Reset: 1630000000
+    X-RateLimit-Reset-After: 59.6
+
+:class:`RateLimiter` keeps the state of each bucket and delays a request
+which would exceed the budget until the bucket resets, instead of letting
+sxcu.net reply with ``429 Too Many Requests``.
+"""
+__all__ = ["RateLimiter", "RateLimitStatus"]
+
+import threading
+import time
+import typing as T
+from urllib.parse import urlsplit
+
+from .__logger__ import logger
+from .exceptions import RateLimitExceeded
+
+HEADER_BUCKET = "X-RateLimit-Bucket"
+HEADER_LIMIT = "X-RateLimit-Limit"
+HEADER_REMAINING = "X-RateLimit-Remaining"
+HEADER_RESET = "X-RateLimit-Reset"
+HEADER_RESET_AFTER = "X-RateLimit-Reset-After"
+HEADER_GLOBAL = "X-RateLimit-Global"
+
+
+class RateLimitStatus(T.NamedTuple):
+    """A snapshot of the budget of a rate-limit bucket. ``reset_after``
+    is the number of seconds until the bucket resets, ``None`` if unknown.
+    """
+
+    bucket: str
+    limit: int
+    remaining: int
+    reset_after: T.Optional[float]
+
+
+class _Bucket:
+    __slots__ = ("name", "limit", "remaining", "reset_at")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.limit = 0
+        self.remaining = 0
+        self.reset_at: T.Optional[float] = None
+
+
+def route_key(method: str, url: str) -> str:
+    """Returns the route a request belongs to, used until the server has
+    told which bucket the route counts against. IDs are stripped from the
+    path so that, for example, all ``GET /api/files/{id}`` share a route.
+    """
+    parts = urlsplit(url)
+    segments = [seg for seg in parts.path.split("/") if seg]
+    if segments and segments[0] == "api":
+        segments = segments[:2]
+    else:
+        segments = segments[:1]
+    return "%s %s/%s" % (method.upper(), parts.netloc, "/".join(segments))
+
+
+def _float(value: T.Optional[str]) -> T.Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _int(value: T.Optional[str]) -> T.Optional[int]:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+class RateLimiter:
+    """Keeps track of the rate-limit buckets of sxcu.net and schedules
+    requests so that they never exceed the budget.
+
+    Every :class:`~.RequestClient` has its own limiter by default. sxcu.net
+    applies some limits per client IP, so clients sending many requests to
+    the same server can share one, like :data:`shared_rate_limiter`.
+    It is safe to use from multiple threads.
+    """
+
+    def __init__(
+        self,
+        fail_fast: bool = False,
+        max_wait: T.Optional[float] = None,
+        *,
+        clock: T.Callable[[], float] = time.monotonic,
+        sleep: T.Callable[[float], None] = time.sleep,
+    ) -> None:
+        """
+        Parameters
+        ==========
+        fail_fast : :class:`bool`, optional
+            If ``True``, raise :class:`~.RateLimitExceeded` instead of
+            waiting when the budget of a bucket is exhausted.
+        max_wait : :class:`float`, optional
+            Raise :class:`~.RateLimitExceeded` if the request would need to
+            wait longer than this many seconds.
+        """
+        self.fail_fast = fail_fast
+        self.max_wait = max_wait
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._routes: T.Dict[str, str] = {}
+        self._buckets: T.Dict[str, _Bucket] = {}
+        self._global: T.Optional[_Bucket] = None
+
+    def _reserve_bucket(self, bucket: T.Optional[_Bucket], now: float) -> float:
+        if bucket is None:
+            return 0.0
+        if bucket.reset_at is not None and bucket.reset_at <= now:
+            # the window is over, assume a full budget until the server
+            # tells otherwise.
+            bucket.remaining = bucket.limit
+            bucket.reset_at = None
+        if bucket.remaining > 0 or bucket.reset_at is None:
+            return 0.0
+        return bucket.reset_at - now
+
+    def reserve(self, method: str, url: str) -> float:
+        """Try to take a request from the budget of the bucket ``url``
+        belongs to.
+
+        Returns
+        =======
+        :class:`float`
+            ``0`` if the request can be sent now, else the number of
+            seconds to wait before trying again.
+
+        Raises
+        ======
+        :class:`~.RateLimitExceeded`
+            If the limiter is configured to fail instead of waiting.
+        """
+        route = route_key(method, url)
+        with self._lock:
+            now = self._clock()
+            bucket = self._buckets.get(self._routes.get(route, route))
+            delay = max(
+                self._reserve_bucket(self._global, now),
+                self._reserve_bucket(bucket, now),
+            )
+            if delay <= 0:
+                for _bucket in (self._global, bucket):
+                    if _bucket is not None and _bucket.remaining > 0:
+                        _bucket.remaining -= 1
+                return 0.0
+        name = bucket.name if bucket is not None else "global"
+        if self.fail_fast or (self.max_wait is not None and delay > self.max_wait):
+            raise RateLimitExceeded(name, delay)
+        logger.debug("Rate limit of %s exhausted, waiting %.2fs", name, delay)
+        return delay
+
+    def acquire(self, method: str, url: str) -> float:
+        """Block until a request to ``url`` is allowed by the budget.
+
+        Returns
+        =======
+        :class:`float`
+            The number of seconds spent waiting.
+        """
+        waited = 0.0
+        delay = self.reserve(method, url)
+        while delay > 0:
+            self._sleep(delay)
+            waited += delay
+            delay = self.reserve(method, url)
+        return waited
+
+    def update(self, method: str, url: str, headers: T.Mapping[str, str]) -> None:
+        """Update the state of the bucket from the headers of a response."""
+        limit = _int(headers.get(HEADER_LIMIT))
+        remaining = _int(headers.get(HEADER_REMAINING))
+        if limit is None or remaining is None:
+            # missing or invalid, as sent by some proxies.
+            return
+        reset_after = _float(headers.get(HEADER_RESET_AFTER))
+        if reset_after is None:
+            reset = _float(headers.get(HEADER_RESET))
+            if reset is not None:
+                reset_after = max(reset - time.time(), 0.0)
+        route = route_key(method, url)
+        name = headers.get(HEADER_BUCKET) or route
+        with self._lock:
+            if headers.get(HEADER_GLOBAL):
+                bucket = self._global
+                if bucket is None:
+                    bucket = self._global = _Bucket("global")
+            else:
+                self._routes[route] = name
+                bucket = self._buckets.get(name)
+                if bucket is None:
+                    bucket = self._buckets[name] = _Bucket(name)
+            now = self._clock()
+            bucket.limit = limit
+            if bucket.reset_at is not None and bucket.reset_at > now:
+                # requests which are still in flight have already been
+                # taken from the budget, never increase it within a window.
+                bucket.remaining = min(bucket.remaining, remaining)
+            else:
+                bucket.remaining = remaining
+            if reset_after is not None:
+                bucket.reset_at = now + reset_after
+
+    @staticmethod
+    def _status(bucket: _Bucket, now: float) -> RateLimitStatus:
+        reset_after = None
+        remaining = bucket.remaining
+        if bucket.reset_at is not None:
+            reset_after = bucket.reset_at - now
+            if reset_after <= 0:
+                reset_after, remaining = None, bucket.limit
+        return RateLimitStatus(bucket.name, bucket.limit, remaining, reset_after)
+
+    def status(self) -> T.Dict[str, RateLimitStatus]:
+        """Returns the current budget of every known bucket, keyed by the
+        bucket name.
+        """
+        with self._lock:
+            now = self._clock()
+            buckets = list(self._buckets.values())
+            if self._global is not None:
+                buckets.append(self._global)
+            return {bucket.name: self._status(bucket, now) for bucket in buckets}
+
+    def route_status(self, method: str, url: str) -> T.Optional[RateLimitStatus]:
+        """Returns the budget of the bucket a request to ``url`` counts
+        against, ``None`` until a response from that route was seen.
+        """
+        route = route_key(method, url)
+        with self._lock:
+            bucket = self._buckets.get(self._routes.get(route, route))
+            if bucket is None:
+                return None
+            return self._status(bucket, self._clock())
+
+
+shared_rate_limiter = RateLimiter()
+"""A :class:`RateLimiter` for the clients which share the budget of the
+process, pass it as their ``rate_limiter``."""
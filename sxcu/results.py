@@ -0,0 +1,184 @@
+"""Typed objects for the JSON returned by sxcu.net.
+
+The results are :class:`dict` subclasses, decoded when they are built, so
+code written for the dictionaries returned by older versions, including
+:func:`json.dumps`, keeps working. They use ``__slots__`` and don't keep
+the response body. The known fields are also available as attributes,
+which are ``None`` for the fields missing from the response:
+
+.. code-block:: python
+
+    result = sxcu.SXCU().upload_file("screenshot.png")
+    result.url == result["url"]
+    json.dumps(result)
+"""
+__all__ = ["CollectionMeta", "FileMeta", "LinkResult", "UploadResult"]
+
+import typing as T
+from collections.abc import Mapping
+
+from . import codec
+
+
+class _Result(dict):
+    __slots__ = ()
+    _fields: T.Tuple[str, ...] = ()
+
+    def __init__(self, data: T.Union[bytes, str, T.Mapping[str, T.Any]]) -> None:
+        if isinstance(data, (bytes, bytearray, str)):
+            data = codec.loads(data)
+        if not isinstance(data, Mapping):
+            raise TypeError(
+                f"{type(self).__name__} expects a JSON object, "
+                f"got {type(data).__name__}"
+            )
+        super().__init__(data)
+
+    def __getattr__(self, name: str) -> T.Any:
+        # only called for the fields, which have no slot.
+        if name in self._fields:
+            return self.get(name)
+        raise AttributeError(f"{type(self).__name__!r} has no attribute {name!r}")
+
+    def __setattr__(self, name: str, value: T.Any) -> None:
+        raise AttributeError(f"the attributes of {type(self).__name__!r} are read-only")
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict.__repr__(self)})"
+
+    def __reduce__(self) -> T.Tuple[T.Any, ...]:
+        return type(self), (self.to_dict(),)
+
+    def to_dict(self) -> T.Dict[str, T.Any]:
+        """Returns the result as a new :class:`dict`."""
+        return dict(self)
+
+
+class UploadResult(_Result):
+    """Returned by :meth:`.SXCU.upload_file` and :meth:`.SXCU.upload_text`.
+
+    Attributes
+    ==========
+    url : :class:`str`
+        The URL of the file.
+    del_url : :class:`str`
+        The URL which deletes the file.
+    thumb : :class:`str`
+        The URL of the thumbnail, ``None`` for text.
+    """
+
+    __slots__ = ()
+    _fields = ("url", "del_url", "thumb")
+    url: str
+    del_url: str
+    thumb: T.Optional[str]
+
+
+class LinkResult(_Result):
+    """Returned by :meth:`.SXCU.create_link`.
+
+    Attributes
+    ==========
+    url : :class:`str`
+        The shortened URL.
+    del_url : :class:`str`
+        The URL which deletes the link.
+    """
+
+    __slots__ = ()
+    _fields = ("url", "del_url")
+    url: str
+    del_url: str
+
+
+class FileMeta(_Result):
+    """Returned by :meth:`.SXCU.file_meta`.
+
+    Attributes
+    ==========
+    id : :class:`str`
+        The ID of the file.
+    url : :class:`str`
+        The URL of the file.
+    views : :class:`int`
+        The number of views.
+    viewable : :class:`bool`
+        Whether the file can be viewed.
+    collection : :class:`str`
+        The ID of the collection of the file, if any.
+    size : :class:`int`
+        The size of the file in bytes.
+    creation_time : :class:`int`
+        The upload time as a Unix timestamp.
+    og_properties : :class:`dict`
+        The OpenGraph properties of the file.
+    """
+
+    __slots__ = ()
+    _fields = (
+        "id",
+        "url",
+        "views",
+        "viewable",
+        "collection",
+        "size",
+        "creation_time",
+        "og_properties",
+    )
+    id: str
+    url: str
+    views: int
+    viewable: bool
+    collection: T.Optional[str]
+    size: int
+    creation_time: int
+    og_properties: T.Optional[T.Dict[str, T.Any]]
+
+
+class CollectionMeta(_Result):
+    """Returned by :meth:`.SXCU.collection_meta` and
+    :meth:`.SXCU.create_collection`.
+
+    Attributes
+    ==========
+    collection_id : :class:`str`
+        The ID of the collection.
+    title : :class:`str`
+        The title of the collection.
+    desc : :class:`str`
+        The description of the collection.
+    views : :class:`int`
+        The number of views.
+    creation_time : :class:`int`
+        The creation time as a Unix timestamp.
+    private : :class:`bool`
+        Whether uploading to the collection needs its token.
+    unlisted : :class:`bool`
+        Whether the collection is unlisted.
+    collection_token : :class:`str`
+        The token of a private collection, only returned on creation.
+    files : :class:`list`
+        The files of the collection.
+    """
+
+    __slots__ = ()
+    _fields = (
+        "collection_id",
+        "title",
+        "desc",
+        "views",
+        "creation_time",
+        "private",
+        "unlisted",
+        "collection_token",
+        "files",
+    )
+    collection_id: str
+    title: str
+    desc: T.Optional[str]
+    views: int
+    creation_time: int
+    private: bool
+    unlisted: bool
+    collection_token: T.Optional[str]
+    files: T.Optional[T.List[T.Dict[str, T.Any]]]
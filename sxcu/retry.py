@@ -0,0 +1,146 @@
+"""Retry policy used by :class:`~.RequestClient` for transient failures.
+"""
+__all__ = ["RetryPolicy"]
+
+import random
+import time
+import typing as T
+
+from .__logger__ import logger
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class RetryPolicy:
+    """Decides whether, and after how long, a failed request is retried.
+
+    A request is retried when no response was received (the connection was
+    reset or timed out) or when the status code is one of
+    ``retry_statuses``. The delay grows exponentially with each attempt::
+
+        min(max_backoff, backoff_factor * 2 ** (attempt - 1))
+
+    and, with ``jitter``, a random delay between zero and that value is
+    used so that many clients don't retry at the same moment. If the server
+    sent ``Retry-After``, the delay is at least that long.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30.0,
+        jitter: bool = True,
+        total_timeout: T.Optional[float] = None,
+        retry_statuses: T.Iterable[int] = RETRY_STATUSES,
+        *,
+        sleep: T.Callable[[float], None] = time.sleep,
+    ) -> None:
+        """
+        Parameters
+        ==========
+        max_attempts : :class:`int`, optional
+            The maximum number of attempts, including the first one.
+        backoff_factor : :class:`float`, optional
+            The delay in seconds before the first retry.
+        max_backoff : :class:`float`, optional
+            The maximum delay in seconds between two attempts.
+        jitter : :class:`bool`, optional
+            Whether to randomise the delay.
+        total_timeout : :class:`float`, optional
+            Don't retry if the time spent since the first attempt plus the
+            delay would exceed this many seconds.
+        retry_statuses : :class:`set`, optional
+            The status codes which are retried.
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.total_timeout = total_timeout
+        self.retry_statuses = frozenset(retry_statuses)
+        self.sleep = sleep
+
+    def backoff(self, attempt: int) -> float:
+        """Returns the delay before the retry following ``attempt``."""
+        delay = min(self.max_backoff, self.backoff_factor * 2 ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)  # nosec
+        return delay
+
+    def retry_delay(
+        self,
+        attempt: int,
+        elapsed: float,
+        retry_after: T.Optional[float] = None,
+    ) -> T.Optional[float]:
+        """Returns the number of seconds to wait before the next attempt,
+        or ``None`` if the request shouldn't be retried anymore.
+
+        Parameters
+        ==========
+        attempt : :class:`int`
+            The number of the attempt which failed, starting at ``1``.
+        elapsed : :class:`float`
+            The seconds spent since the first attempt.
+        retry_after : :class:`float`, optional
+            The delay the server asked for.
+        """
+        if attempt >= self.max_attempts:
+            return None
+        delay = self.backoff(attempt)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        if self.total_timeout is not None and elapsed + delay > self.total_timeout:
+            return None
+        return delay
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+class RewindableBody:
+    """Records the position of the file objects in a request's ``files``
+    and ``data``, so that they can be rewound before a retry. A request
+    whose body can't be rewound isn't retried, as the server would receive
+    a truncated file.
+    """
+
+    def __init__(self, kwargs: T.Mapping[str, T.Any]) -> None:
+        self._positions: T.List[T.Tuple[T.Any, int]] = []
+        self.rewindable = True
+        values = list((kwargs.get("files") or {}).values())
+        values.append(kwargs.get("data"))
+        for value in values:
+            if isinstance(value, (tuple, list)) and len(value) > 1:
+                value = value[1]
+            if value is None or isinstance(value, (str, bytes, dict, list)):
+                continue
+            if hasattr(value, "__aiter__"):
+                self.rewindable = False
+                continue
+            if not hasattr(value, "read") and not hasattr(value, "__iter__"):
+                continue
+            try:
+                if not value.seekable():
+                    raise AttributeError
+                self._positions.append((value, value.tell()))
+            except (AttributeError, OSError):
+                self.rewindable = False
+
+    def rewind(self) -> None:
+        for fileobj, position in self._positions:
+            fileobj.seek(position)
+
+
+def log_retry(method: str, url: str, attempt: int, reason: T.Any, delay: float) -> None:
+    logger.warning(
+        "%s %s failed on attempt %d (%s), retrying in %.2fs.",
+        method,
+        url,
+        attempt,
+        reason,
+        delay,
+    )
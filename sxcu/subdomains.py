@@ -0,0 +1,230 @@
+"""A cached directory of the public subdomains of sxcu.net.
+"""
+__all__ = ["Subdomain", "SubdomainDirectory"]
+
+import array
+import os
+import tempfile
+import threading
+import time
+import typing as T
+
+from . import codec
+from ._utils import check_response, join_url
+
+
+class Subdomain(T.NamedTuple):
+    """A public subdomain of sxcu.net."""
+
+    domain: str
+    upload_count: int
+    public: bool
+    img_views: int
+
+
+class _Columns:
+    """One snapshot of the list, replaced as a whole on refresh so that
+    readers never see a half updated list.
+    """
+
+    __slots__ = (
+        "entries",
+        "domains",
+        "upload_counts",
+        "img_views",
+        "public",
+        "index",
+        "order",
+        "_encoded",
+    )
+
+    def __init__(self, entries: T.List[T.Mapping[str, T.Any]]) -> None:
+        self.entries = entries
+        self.domains: T.List[str] = [str(entry["domain"]) for entry in entries]
+        self.upload_counts = array.array(
+            "q", (int(entry.get("upload_count") or 0) for entry in entries)
+        )
+        self.img_views = array.array(
+            "q", (int(entry.get("img_views") or 0) for entry in entries)
+        )
+        self.public = bytearray(1 if entry.get("public") else 0 for entry in entries)
+        self.index = {domain.lower(): i for i, domain in enumerate(self.domains)}
+        counts = self.upload_counts
+        self.order = sorted(range(len(counts)), key=lambda i: -counts[i])
+        self._encoded: T.Optional[T.List[T.Dict[str, T.Any]]] = None
+
+    def encoded(self) -> T.List[T.Dict[str, T.Any]]:
+        # encoded once per snapshot, for SXCU.list_subdomain
+        if self._encoded is None:
+            self._encoded = [
+                {
+                    key: value.encode() if isinstance(value, str) else value
+                    for key, value in entry.items()
+                }
+                for entry in self.entries
+            ]
+        return self._encoded
+
+    def record(self, i: int) -> Subdomain:
+        return Subdomain(
+            self.domains[i],
+            self.upload_counts[i],
+            bool(self.public[i]),
+            self.img_views[i],
+        )
+
+
+class SubdomainDirectory:
+    """The list of public subdomains, fetched once from ``/api/subdomains``
+    and kept for ``ttl`` seconds.
+
+    The list is stored by column, with an index by name and the order by
+    upload count computed when it is loaded, so that :meth:`get` is a dict
+    lookup and :meth:`top` only slices. The entries as sent by sxcu.net are
+    kept too, for :meth:`entries` and :meth:`.SXCU.list_subdomain`.
+
+    .. code-block:: python
+
+        directory = sxcu.subdomains.SubdomainDirectory(sxcu.SXCU())
+        directory.get("sxcu.net").upload_count
+        directory.top(10)
+
+    Parameters
+    ==========
+    client : :class:`.SXCU`, optional
+        Used for fetching the list. By default, the shared client of
+        :class:`.SXCU` is used.
+    ttl : :class:`float`, optional
+        Seconds after which the list is fetched again.
+    cache_path : :class:`str`, optional
+        A JSON file where the list is also kept, so that it is shared
+        between processes like CLI invocations.
+    """
+
+    def __init__(
+        self,
+        client: T.Any = None,
+        ttl: float = 300.0,
+        cache_path: T.Optional[T.Union[str, os.PathLike]] = None,
+        *,
+        clock: T.Callable[[], float] = time.time,
+    ) -> None:
+        self.client = client
+        self.ttl = ttl
+        self.cache_path = os.path.expanduser(cache_path) if cache_path else None
+        self.clock = clock
+        self._lock = threading.RLock()
+        self._fetched: T.Optional[float] = None
+        self._data = _Columns([])
+
+    def _load(self, entries: T.List[T.Mapping[str, T.Any]], fetched: float) -> None:
+        self._data = _Columns(entries)
+        self._fetched = fetched
+
+    def _fresh(self, fetched: T.Optional[float]) -> bool:
+        return fetched is not None and self.clock() - fetched < self.ttl
+
+    @property
+    def stale(self) -> bool:
+        """Whether the list will be fetched again on the next access."""
+        return not self._fresh(self._fetched)
+
+    def update(self, entries: T.List[T.Mapping[str, T.Any]]) -> None:
+        """Replace the list with ``entries``, as returned by
+        ``/api/subdomains``. Used by :class:`.AsyncSXCU`, which fetches them
+        itself.
+        """
+        with self._lock:
+            self._load(entries, self.clock())
+        if self.cache_path:
+            self._write_cache_file(entries)
+
+    def _read_cache_file(self) -> bool:
+        try:
+            with open(self.cache_path, "rb") as file:
+                cached = codec.loads(file.read())
+        except (OSError, ValueError):
+            return False
+        if not self._fresh(cached.get("fetched")) or "entries" not in cached:
+            return False
+        self._load(cached["entries"], cached["fetched"])
+        return True
+
+    def _write_cache_file(self, entries: T.List[T.Mapping[str, T.Any]]) -> None:
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".subdomains")
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            file.write(codec.dumps({"fetched": self._fetched, "entries": entries}))
+        os.replace(tmp, self.cache_path)
+
+    def refresh(self) -> None:
+        """Fetch the list from sxcu.net now."""
+        client = self.client
+        if client is None:
+            from .sxcu import SXCU  # pylint: disable=import-outside-toplevel
+
+            client = SXCU._shared_instance()
+        res = client.request_handler.get(join_url(client.api_endpoint, "/subdomains"))
+        check_response(res)
+        self.update(codec.loads(res.content))
+
+    def _ensure(self) -> None:
+        if self._fresh(self._fetched):
+            return
+        with self._lock:
+            if self._fresh(self._fetched):
+                return
+            if self.cache_path and self._read_cache_file():
+                return
+            self.refresh()
+
+    def invalidate(self) -> None:
+        """Fetch the list again on the next access."""
+        self._fetched = None
+        if self.cache_path:
+            try:
+                os.remove(self.cache_path)
+            except FileNotFoundError:
+                pass
+
+    def _columns_now(self) -> _Columns:
+        self._ensure()
+        return self._data
+
+    def get(self, domain: str) -> T.Optional[Subdomain]:
+        """Returns the subdomain named ``domain``, if it exists."""
+        data = self._columns_now()
+        i = data.index.get(domain.lower())
+        return None if i is None else data.record(i)
+
+    def __contains__(self, domain: str) -> bool:
+        return domain.lower() in self._columns_now().index
+
+    def __len__(self) -> int:
+        return len(self._columns_now().domains)
+
+    def top(self, count: int = -1) -> T.List[Subdomain]:
+        """Returns the ``count`` subdomains with the most uploads, or all
+        of them if ``count`` is ``-1``.
+        """
+        data = self._columns_now()
+        order = data.order if count == -1 else data.order[:count]
+        return [data.record(i) for i in order]
+
+    def entries(
+        self, count: int = -1, encoded: bool = False
+    ) -> T.List[T.Dict[str, T.Any]]:
+        """Returns the first ``count`` entries as sent by sxcu.net, with all
+        their fields, or all of them if ``count`` is ``-1``. If ``encoded``,
+        the :class:`str` values are encoded to :class:`bytes`, like
+        :meth:`.SXCU.list_subdomain` returns them.
+        """
+        data = self._columns_now()
+        entries = data.encoded() if encoded else data.entries
+        if count != -1:
+            entries = entries[:count]
+        return [dict(entry) for entry in entries]
+
+    def __iter__(self) -> T.Iterator[Subdomain]:
+        return iter(self.top())
@@ -1,99 +1,71 @@
 """Python API wrapper for sxcu.net
 """
 import io
-import json
+import os
 import typing as T
-import warnings
 
+from . import delete, download, mirror, upload
 from .__client__ import RequestClient
-from .__logger__ import logger
-from ._utils import get_id_from_url, join_url, raise_error
-from .constants import SXCU_SUCCESS_CODE, DefaultDomains
+from ._base import _SXCUBase
+from ._utils import check_response, deprecated_alias, hybridmethod, join_url
+from .batch import Outcome
+from .constants import SXCU_SUCCESS_CODE
+from .download import DownloadResult
+from .meta_cache import get_metadata
+from .mirror import MirrorReport
+from .multipart import UploadProgress
 from .og_properties import OGProperties
+from .profile import UploadProfile
+from .results import CollectionMeta, FileMeta, LinkResult, UploadResult
+from .subdomains import SubdomainDirectory
+from .transforms import TransformPipeline
 
 __all__ = ["SXCU"]
 
-request_handler = RequestClient()
+# shared by the helpers when they are called on the class itself, created
+# on first use.
+_request_handler: T.Optional[RequestClient] = None
 
 
-class SXCU:
-    """The Main class for sxcu.net request"""
+class SXCU(_SXCUBase):
+    """The Main class for sxcu.net request
 
-    def __init__(
-        self,
-        subdomain: str = None,
-        upload_token: str = None,
-        sxcu_config: T.Union[str, dict, io.StringIO] = None,
-        *,
-        file_sxcu: str = None,
-    ) -> None:
-        """This initialise the handler
+    Each instance uses its own :class:`~.RequestClient` which keeps the
+    connections alive between calls. Use :meth:`close` or the instance as
+    a context manager to release them.
 
-        Parameters
-        ==========
-        subdomain : :class:`str`, optional
-            The subdomain you get from sxcu.net
-        upload_token : :class:`str`, optional
-            The upload token that comes along with subdomain
-        sxcu_config : :class:`str`,optional
-            The sxcu configuration you have. Parses only ``RequestURL`` and ``upload_token``.
+    The helpers like :meth:`collection_meta` and :meth:`file_meta` can be
+    called both on the class, where a shared client is used, and on an
+    instance, where the instance's client is used.
+    """
 
-            .. note ::
+    @staticmethod
+    def _new_client() -> RequestClient:
+        return RequestClient()
 
-                The content in ``.sxcu`` file has more priority than passed parameters.
-        file_sxcu : :class:`str`, optional
-            File location to sxcu configuration. Kept for backwards compatibility.
+    @staticmethod
+    def _shared_client() -> RequestClient:
+        global _request_handler  # pylint: disable=global-statement
+        if _request_handler is None:
+            _request_handler = RequestClient()
+        return _request_handler
 
-        """
-        self.subdomain = subdomain if subdomain else "https://sxcu.net"
-        self.upload_token = upload_token  # Don't log upload_token
-        self.file_sxcu = sxcu_config
-        self.api_endpoint = DefaultDomains.API_ENDPOINT.value
-        if file_sxcu:
-            warnings.warn(
-                "file_sxcu parameter is deprecated. " "Use sxcu_config instead.",
-                DeprecationWarning,
-                stacklevel=2,
-            )
-            sxcu_config = file_sxcu
-
-        if sxcu_config:
-            if isinstance(sxcu_config, io.StringIO):
-                con = json.load(sxcu_config)
-            elif isinstance(sxcu_config, dict):
-                con = sxcu_config
-            else:
-                with open(sxcu_config) as sxcu_file:
-                    con = json.load(sxcu_file)
-            self.sxcu_config = con
-            # requests url already contain `/api/files/create` remove that.
-            self.subdomain = "/".join(con["RequestURL"].split("/")[:-3])
-            if "Arguments" in con:
-                self.upload_token = con["Arguments"]["token"]
-        logger.debug("subdomain: %s", self.subdomain)
-
-    def _get_api_endpoint(self, default_domain: bool = False) -> str:
-        return (
-            join_url("https://sxcu.net", "/api")
-            if default_domain
-            else join_url(self.subdomain, "/api")
-        )
+    def close(self) -> None:
+        """Close the connections kept alive by this instance's client."""
+        self.request_handler.close()
 
-    def upload_image(self, *args: T.Any, **kwargs: T.Any) -> T.Union[dict, list]:
-        """This method is deprecated.
-        Use :meth:`~.SXCU.upload_file` instead.
-        """
-        warnings.warn(
-            "SXCU.upload_image() is deprecated. " "Use SXCU.upload_file() instead.",
-            DeprecationWarning,
-            stacklevel=2,
-        )
-        return self.upload_file(*args, **kwargs)
+    def __enter__(self) -> "SXCU":
+        return self
+
+    def __exit__(self, *args: T.Any) -> None:
+        self.close()
+
+    upload_image = deprecated_alias("upload_image", "upload_file")
 
     def upload_file(
         self,
         name: str = None,
-        fileobj: io.BytesIO = None,
+        fileobj: T.Union[io.BytesIO, bytes, memoryview, T.Iterable[bytes]] = None,
         collection: T.Optional[str] = None,
         collection_token: T.Optional[str] = None,
         noembed: T.Optional[bool] = False,
@@ -101,9 +73,17 @@ class SXCU:
         self_destruct: bool = False,
         *,
         file: str = None,
-    ) -> T.Union[dict, list]:
+        filename: T.Optional[str] = None,
+        progress: T.Optional[T.Callable[[UploadProgress], None]] = None,
+        ttl: T.Optional[float] = None,
+        transforms: T.Optional[TransformPipeline] = None,
+        profile: T.Optional[UploadProfile] = None,
+    ) -> UploadResult:
         """This uploads image to sxcu
 
+        The file is streamed in chunks, so the memory used doesn't depend
+        on its size. Files on disk are read using :mod:`mmap`.
+
         Parameters
         ==========
         name:
@@ -111,7 +91,10 @@ class SXCU:
         file:
             aliased to name, for backwards compatibility.
         fileobj:
-            If fileobj is given, it is used for reading the file.
+            If fileobj is given, it is used for reading the file. It can
+            also be :class:`bytes`, a :class:`memoryview` or an iterable
+            of :class:`bytes`; an iterable is sent using chunked transfer
+            encoding and isn't retried.
         collection:
             The collection ID to which you want to upload to if
             you want to upload to a collection
@@ -127,10 +110,26 @@ class SXCU:
         self_destruct:
             If ``True``, the file will be deleted automatically after
             24 hours.
+        filename:
+            The filename sent to sxcu.net, defaults to the name of the
+            file.
+        progress:
+            Called with a :class:`~.UploadProgress` after every chunk sent.
+        ttl:
+            Seconds after which the file is deleted by an
+            :class:`~.ExpiryScheduler`. Requires a :attr:`journal`.
+        transforms:
+            Applied to the file before it is uploaded instead of the
+            :attr:`transforms` of the instance.
+        profile:
+            An :class:`~.UploadProfile` used instead of ``collection``,
+            ``collection_token``, ``noembed``, ``og_properties`` and
+            ``self_destruct``, which is faster when uploading many files
+            with the same options.
 
         Returns
         =======
-        :class:`dict` or :class:`list`
+        :class:`~.UploadResult`
             The returned JSON from the request.
 
         Raises
@@ -138,40 +137,80 @@ class SXCU:
         :class:`~.SXCUError`:
             Any error from the request side.
         """
-        data = {}
-        if self.upload_token:
-            data["token"] = self.upload_token
-        if collection:
-            data["collection"] = collection
-        if collection_token:
-            data["collection_token"] = collection_token
-        if noembed:
-            data["noembed"] = ""
-        if og_properties:
-            data["og_properties"] = og_properties.export()
-        if self_destruct:
-            data["self_destruct"] = ""
-        if file:
-            name = file
-        url = join_url(self._get_api_endpoint(default_domain=False), "/files/create")
-        _file_opened = False
-        try:
-            if fileobj is None:
-                fileobj = open(name, "rb")
-                _file_opened = True
-            res = request_handler.post(url, files={"file": fileobj}, data=data)
-        finally:
-            if _file_opened:
-                fileobj.close()
-        if res.status_code != SXCU_SUCCESS_CODE:
-            error_response = res.json()
-            raise_error(
-                res.status_code, error_response["code"], error_response["error"]
-            )
-        # Don't use json instead implement a custom class here.
-        return res.json()
-
-    def create_link(self, link: str) -> T.Union[dict, list]:
+        profile = self._upload_profile(
+            profile, collection, collection_token, noembed, og_properties, self_destruct
+        )
+        source = (file or name) if fileobj is None else fileobj
+        return upload.upload_file(
+            self,
+            profile,
+            source,
+            filename,
+            progress=progress,
+            ttl=ttl,
+            transforms=transforms,
+        )
+
+    def upload_many(
+        self,
+        sources: T.Iterable[T.Any],
+        concurrency: int = 4,
+        *,
+        ordered: bool = False,
+        collection: T.Optional[str] = None,
+        collection_token: T.Optional[str] = None,
+        noembed: T.Optional[bool] = False,
+        og_properties: T.Optional[OGProperties] = None,
+        self_destruct: bool = False,
+        ttl: T.Optional[float] = None,
+        transforms: T.Optional[TransformPipeline] = None,
+        profile: T.Optional[UploadProfile] = None,
+    ) -> T.Iterator[Outcome]:
+        """Uploads many files using ``concurrency`` worker threads, which
+        share the connection pool and rate limits of :attr:`request_handler`.
+
+        The same options are used for every file, see :meth:`upload_file`.
+        They are encoded once into an :class:`~.UploadProfile`, unless one
+        is passed as ``profile``. ``sources`` is consumed lazily, so a generator over a large directory
+        can be passed.
+
+        .. note ::
+
+            Connections above the ``pool_maxsize`` of the client, ``10`` by
+            default, aren't kept alive. Pass a :class:`~.RequestClient` with
+            a larger pool for a higher ``concurrency``.
+
+        Parameters
+        ==========
+        sources : :class:`list`
+            The files to upload: paths, file objects, :class:`bytes` or
+            ``(filename, source)`` tuples.
+        concurrency : :class:`int`, optional
+            The number of uploads sent at the same time.
+        ordered : :class:`bool`, optional
+            Yield the outcomes in the order of ``sources`` instead of as
+            soon as they complete.
+
+        Returns
+        =======
+        :class:`~.Outcome`
+            One per source, with the returned JSON as ``result``. An error
+            is stored in ``error`` and doesn't stop the other uploads.
+        """
+        profile = self._upload_profile(
+            profile, collection, collection_token, noembed, og_properties, self_destruct
+        )
+        return upload.upload_many(
+            self,
+            sources,
+            concurrency,
+            ordered,
+            ttl=ttl,
+            transforms=transforms,
+            profile=profile,
+        )
+
+    def create_link(self, link: str) -> LinkResult:
         """Creates a new link.
 
         Parameters
@@ -181,25 +220,22 @@ class SXCU:
 
         Returns
         =======
-        :class:`dict` or :class:`list`
+        :class:`~.LinkResult`
             The returned JSON from the request.
         """
         url = join_url(self._get_api_endpoint(), "/links/create")
-        res = request_handler.post(url, data={"link": link})
-        if res.status_code != SXCU_SUCCESS_CODE:
-            error_response = res.json()
-            raise_error(
-                res.status_code, error_response["code"], error_response["error"]
-            )
-        return res.json()
+        res = self.request_handler.post(url, data={"link": link})
+        check_response(res)
+        return LinkResult(res.content)
 
-    @staticmethod
+    @hybridmethod
     def create_collection(
+        self,
         title: str,
         private: bool = False,
         unlisted: bool = False,
         desc: T.Optional[str] = None,
-    ) -> T.Union[dict, list]:
+    ) -> CollectionMeta:
         """Create a new collection on sxcu.net.
 
         .. note::
@@ -218,43 +254,24 @@ class SXCU:
             The description of the collection.
         Returns
         =======
-        :class:`dict` or :class:`list`
+        :class:`~.CollectionMeta`
             The returned JSON from the request.
         """
-        url = join_url(DefaultDomains.API_ENDPOINT.value, "/collections/create")
-        data = {
-            "title": title,
-            "private": private,
-            "unlisted": unlisted,
-        }
-        if desc:
-            data["desc"] = desc
-        res = request_handler.post(
+        url = join_url(self.api_endpoint, "/collections/create")
+        data = self._collection_data(title, private, unlisted, desc)
+        res = self.request_handler.post(
             url,
             data=data,
         )
-        if res.status_code != SXCU_SUCCESS_CODE:
-            error_response = res.json()
-            raise_error(
-                res.status_code, error_response["code"], error_response["error"]
-            )
-        return res.json()
+        check_response(res)
+        return CollectionMeta(res.content)
 
-    @staticmethod
-    def collection_details(*args: T.Any, **kwargs: T.Any) -> T.Union[dict, list]:
-        """This method is deprecated.
-        Use :meth:`~.SXCU.collection_meta` instead.
-        """
-        warnings.warn(
-            "SXCU.collection_details() is deprecated. "
-            "Use SXCU.collection_meta() instead.",
-            DeprecationWarning,
-            stacklevel=2,
-        )
-        return SXCU.collection_meta(*args, **kwargs)
+    collection_details = hybridmethod(
+        deprecated_alias("collection_details", "collection_meta")
+    )
 
-    @staticmethod
-    def collection_meta(collection_id: str) -> T.Union[dict, list]:
+    @hybridmethod
+    def collection_meta(self, collection_id: str) -> CollectionMeta:
         """Get collection details and list of images (if any are uploaded)
         for a given collection.
 
@@ -265,25 +282,77 @@ class SXCU:
 
         Returns
         =======
-        :class:`dict` or :class:`list`
+        :class:`~.CollectionMeta`
             The returned JSON from the request.
         """
-        url = join_url(
-            DefaultDomains.API_ENDPOINT.value, f"/collections/{collection_id}"
-        )
-        res = request_handler.get(
-            url,
+        url = join_url(self.api_endpoint, f"/collections/{collection_id}")
+        return get_metadata(self, url, CollectionMeta)
+
+    @hybridmethod
+    def mirror_collection(
+        self,
+        collection_id: str,
+        dest: T.Union[str, os.PathLike],
+        concurrency: int = 4,
+        *,
+        prune: bool = False,
+    ) -> MirrorReport:
+        """Download the files of a collection into the directory ``dest``,
+        skipping the ones mirrored by a previous call. A call without
+        changes to the collection costs a single metadata request. See
+        :func:`.mirror.mirror_collection` for the parameters.
+        """
+        return mirror.mirror_collection(
+            self, collection_id, dest, concurrency, prune=prune
         )
-        if res.status_code != SXCU_SUCCESS_CODE:
-            error_response = res.json()
-            raise_error(
-                res.status_code, error_response["code"], error_response["error"]
-            )
 
-        return res.json()
+    @hybridmethod
+    def download(
+        self,
+        source: str,
+        dest: T.Union[str, os.PathLike, None] = None,
+        *,
+        fileobj: T.Optional[T.BinaryIO] = None,
+    ) -> DownloadResult:
+        """Downloads a file to ``dest`` or ``fileobj``, resuming interrupted
+        downloads. See :func:`.download.download_file` for the parameters.
+        """
+        return download.download_file(self, source, dest, fileobj=fileobj)
 
-    @staticmethod
-    def upload_text(text: str) -> T.Union[dict, list]:
+    def download_many(
+        self,
+        sources: T.Iterable[str],
+        dest: T.Union[str, os.PathLike],
+        concurrency: int = 4,
+        *,
+        ordered: bool = False,
+    ) -> T.Iterator[Outcome]:
+        """Downloads many files into the directory ``dest`` using
+        ``concurrency`` worker threads, which share the connection pool of
+        :attr:`request_handler`. See :meth:`download`.
+
+        Parameters
+        ==========
+        sources : :class:`list`
+            The IDs or URLs of the files.
+        dest : :class:`str`
+            The directory to write the files to, created if needed.
+        concurrency : :class:`int`, optional
+            The number of files downloaded at the same time.
+        ordered : :class:`bool`, optional
+            Yield the outcomes in the order of ``sources``.
+
+        Returns
+        =======
+        :class:`~.Outcome`
+            One per source, with the :class:`~.DownloadResult` as
+            ``result``. An error is stored in ``error`` and doesn't stop the
+            other downloads.
+        """
+        return download.download_many(self, sources, dest, concurrency, ordered)
+
+    @hybridmethod
+    def upload_text(self, text: str) -> UploadResult:
         """Uploads an text to sxcu.net (via cancer-co.de)
 
         Parameters
@@ -293,40 +362,26 @@ class SXCU:
 
         Returns
         =======
-        :class:`dict` or :class:`list`
+        :class:`~.UploadResult`
             The returned JSON from the request.
         """
-        res = request_handler.post(
-            DefaultDomains.UPLOAD_TEXT.value,
+        res = self.request_handler.post(
+            self.upload_text_endpoint,
             data={"text": text},
         )
-        if res.status_code != SXCU_SUCCESS_CODE:
-            error_response = res.json()
-            raise_error(
-                res.status_code, error_response["code"], error_response["error"]
-            )
-        return res.json()
-
-    @staticmethod
-    def image_details(*args: T.Any, **kwargs: T.Any) -> T.Union[dict, list]:
-        """This method is deprecated.
+        check_response(res)
+        return UploadResult(res.content)
 
-        Use :meth:`~.SXCU.file_meta` instead.
-        """
-        warnings.warn(
-            "SXCU.image_details() is deprecated. " "Use SXCU.file_meta() instead.",
-            DeprecationWarning,
-            stacklevel=2,
-        )
-        return SXCU.file_meta(*args, **kwargs)
+    image_details = hybridmethod(deprecated_alias("image_details", "file_meta"))
 
-    @staticmethod
+    @hybridmethod
     def file_meta(
+        self,
         file_id: str = None,
         file_url: str = None,
         image_id: str = None,
         image_url: str = None,
-    ) -> T.Union[dict, list]:
+    ) -> FileMeta:
         """Get basic details about an image on sxcu.net or any of its subdomain
 
         Parameters
@@ -348,55 +403,17 @@ class SXCU:
 
         Returns
         =======
-        :class:`dict` or :class:`list`
+        :class:`~.FileMeta`
             The returned JSON from the request.
         """
-        if image_url is not None:
-            warnings.warn(
-                "The parameter 'image_url' is deprecated. " "Use 'file_url' instead.",
-                DeprecationWarning,
-                stacklevel=2,
-            )
-            if file_url is None:
-                file_url = image_url
-        if image_id is not None:
-            warnings.warn(
-                "The parameter 'image_id' is deprecated. " "Use 'file_id' instead.",
-                DeprecationWarning,
-                stacklevel=2,
-            )
-            if file_id is None:
-                file_id = image_id
-
-        if file_id is None:
-            if file_url is None:
-                raise AttributeError("Either one of file_id or file_url is necessary")
-            else:
-                file_id = get_id_from_url(image_url)
-        url = join_url(DefaultDomains.API_ENDPOINT.value, f"/files/{file_id}")
-        res = request_handler.get(url)
-        if res.status_code != SXCU_SUCCESS_CODE:
-            error_response = res.json()
-            raise_error(
-                res.status_code, error_response["code"], error_response["error"]
-            )
-        return res.json()
-
-    @staticmethod
-    def domain_list(*args: T.Any, **kwargs: T.Any) -> T.Union[dict, list]:
-        """This method is deprecated.
+        file_id = self._file_id(file_id, file_url, image_id, image_url)
+        url = join_url(self.api_endpoint, f"/files/{file_id}")
+        return get_metadata(self, url, FileMeta)
 
-        Use :meth:`~.SXCU.list_subdomain` instead.
-        """
-        warnings.warn(
-            "SXCU.domain_list() is deprecated. " "Use SXCU.list_subdomain() instead.",
-            DeprecationWarning,
-            stacklevel=2,
-        )
-        return SXCU.list_subdomain(*args, **kwargs)
+    domain_list = hybridmethod(deprecated_alias("domain_list", "list_subdomain"))
 
-    @staticmethod
-    def list_subdomain(count: int = -1) -> list:
+    @hybridmethod
+    def list_subdomain(self, count: int = -1) -> list:
         """This lists all the public domains available, sorted by upload count.
 
         Parameters
@@ -407,34 +424,30 @@ class SXCU:
         .. warning::
 
             The returned list contains bytes encoded using :py:func:`str.encode`.
-            Please use :py:func:`bytes.decode` for decoding it.
+            Please use :py:func:`bytes.decode` for decoding it. Use
+            :meth:`subdomains` for the entries without the encoding.
 
         Returns
         =======
         :class:`list`
-            The returned JSON from the request.
+            The entries of :meth:`subdomains`, fetched at most every five
+            minutes.
         """
-        url = join_url(DefaultDomains.API_ENDPOINT.value, "/subdomains")
-        res = request_handler.get(url)
-        if res.status_code != SXCU_SUCCESS_CODE:
-            error_response = res.json()
-            raise_error(
-                res.status_code, error_response["code"], error_response["error"]
-            )
-        if count == -1:
-            to_encode = res.json()
-        else:
-            to_encode = res.json()[:count]
-        for i in enumerate(to_encode):
-            temp = {}
-            for j in i[1]:
-                if isinstance(i[1][j], str):
-                    temp[j] = i[1][j].encode()
-            to_encode[i[0]] = temp
-        return to_encode
+        return self.subdomains().entries(count, encoded=True)
 
-    @staticmethod
-    def delete_image(delete_url: str) -> bool:
+    @hybridmethod
+    def subdomains(self) -> SubdomainDirectory:
+        """Returns the :class:`~.SubdomainDirectory` of this client, which
+        fetches the list of public subdomains once and keeps it for five
+        minutes.
+        """
+        directory = self.__dict__.get("_subdomains")
+        if directory is None:
+            directory = self._subdomains = SubdomainDirectory(self)
+        return directory
+
+    @hybridmethod
+    def delete_image(self, delete_url: str) -> bool:
         """Deletes images from sxcu.net
 
         Parameters
@@ -446,5 +459,40 @@ class SXCU:
         :class:`bool`
             Deleted or not
         """
-        con = request_handler.get(delete_url)
-        return bool(con.status_code == 200)
+        return delete.delete_file(self, delete_url) == SXCU_SUCCESS_CODE
+
+    def delete_image_many(
+        self,
+        delete_urls: T.Iterable[str],
+        concurrency: int = 4,
+        *,
+        report: T.Union[str, os.PathLike, None] = None,
+        ordered: bool = False,
+    ) -> T.Iterator[Outcome]:
+        """Deletes many files using ``concurrency`` worker threads, which
+        share the connection pool and rate limits of :attr:`request_handler`.
+        Only the status codes of the responses are read.
+
+        Parameters
+        ==========
+        delete_urls : :class:`list`
+            The delete URLs returned by sxcu.net while uploading.
+        concurrency : :class:`int`, optional
+            The number of deletes sent at the same time.
+        report : :class:`str`, optional
+            A JSON lines file the outcomes are appended to. The URLs it
+            records as deleted are skipped, so that an interrupted run can
+            be resumed.
+        ordered : :class:`bool`, optional
+            Yield the outcomes in the order of ``delete_urls``.
+
+        Returns
+        =======
+        :class:`~.Outcome`
+            One per URL, ``result`` is ``True`` if it was deleted. Failures
+            are stored in ``error`` as :class:`~.SXCUError` with the
+            ``status_code``.
+        """
+        return delete.delete_many(
+            self, delete_urls, concurrency, report=report, ordered=ordered
+        )
@@ -0,0 +1,268 @@
+"""An in-process fake of sxcu.net for tests and load tests.
+
+:class:`FakeSXCU` starts a local HTTP server implementing the endpoints
+used by :class:`.SXCU`, keeping the uploads in memory. It sends
+rate-limit headers like sxcu.net and can add latency, cap the bandwidth,
+inject error responses, drop connections and cut off downloads.
+
+.. code-block:: python
+
+    with sxcu.testing.FakeSXCU(latency=0.05, errors={503: 0.1}, seed=1) as fake:
+        client = fake.client()
+        client.upload_file("screenshot.png")
+        assert len(fake.files) == 1
+
+The behaviour only approximates sxcu.net: the responses have the same
+shape, but the default rate limits and error codes are guesses.
+"""
+__all__ = ["FakeSXCU", "DEFAULT_RATE_LIMITS"]
+
+import collections
+import random
+import string
+import threading
+import time
+import typing as T
+
+from .__client__ import RequestClient
+from ._fake_routes import Handler, Server
+from .ratelimit import (
+    HEADER_BUCKET,
+    HEADER_LIMIT,
+    HEADER_REMAINING,
+    HEADER_RESET,
+    HEADER_RESET_AFTER,
+    RateLimiter,
+)
+from .sxcu import SXCU
+
+# bucket: (requests, seconds)
+DEFAULT_RATE_LIMITS = {
+    "upload": (5, 10.0),
+    "links": (5, 10.0),
+    "collections": (2, 60.0),
+    "meta": (60, 60.0),
+    "delete": (10, 10.0),
+    "paste": (5, 10.0),
+}
+
+_ID_ALPHABET = string.ascii_letters + string.digits
+
+
+class _Window:
+    __slots__ = ("limit", "period", "remaining", "reset_at")
+
+    def __init__(self, limit: int, period: float) -> None:
+        self.limit = limit
+        self.period = period
+        self.remaining = limit
+        self.reset_at = 0.0
+
+
+class FakeSXCU:
+    """A local HTTP server behaving like sxcu.net and cancer-co.de.
+
+    The knobs are attributes which can also be changed while the server is
+    running.
+
+    Parameters
+    ==========
+    latency : :class:`float`, optional
+        Seconds added before every response.
+    bandwidth : :class:`float`, optional
+        Bytes per second at which request and response bodies are
+        transferred, unlimited by default.
+    errors : :class:`dict`, optional
+        Maps a status code, like ``429`` or ``503``, to the probability
+        that a request is answered with it.
+    drop_rate : :class:`float`, optional
+        The probability that the connection is closed instead of
+        answering a request.
+    cut_rate : :class:`float`, optional
+        The probability that the connection is closed after sending half
+        of a downloaded file. Downloads support ``Range`` requests.
+    rate_limits : :class:`dict`, optional
+        Maps the rate-limit buckets to ``(requests, seconds)`` windows,
+        :data:`DEFAULT_RATE_LIMITS` by default. Requests exceeding them
+        are answered with ``429``. ``None`` disables rate limiting.
+    subdomains : :class:`list`, optional
+        Returned by ``/api/subdomains``.
+    seed : :class:`int`, optional
+        Seeds the random faults and IDs, for reproducible runs.
+    host : :class:`str`, optional
+        The address the server listens on, a free port is chosen.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.0,
+        bandwidth: T.Optional[float] = None,
+        errors: T.Optional[T.Mapping[int, float]] = None,
+        drop_rate: float = 0.0,
+        cut_rate: float = 0.0,
+        rate_limits: T.Optional[T.Mapping[str, T.Tuple[int, float]]] = (
+            DEFAULT_RATE_LIMITS
+        ),
+        subdomains: T.Optional[T.List[T.Dict[str, T.Any]]] = None,
+        seed: T.Optional[int] = None,
+        host: str = "127.0.0.1",
+    ) -> None:
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.errors = dict(errors or {})
+        self.drop_rate = drop_rate
+        self.cut_rate = cut_rate
+        self.rate_limits = dict(rate_limits) if rate_limits else {}
+        self.subdomains = (
+            subdomains
+            if subdomains is not None
+            else [
+                {
+                    "domain": "sxcu.net",
+                    "upload_count": 1000,
+                    "public": True,
+                    "img_views": 5,
+                }
+            ]
+        )
+        self.host = host
+        self.files: T.Dict[str, T.Dict[str, T.Any]] = {}
+        """The uploaded files by ID."""
+        self.links: T.Dict[str, str] = {}
+        self.collections: T.Dict[str, T.Dict[str, T.Any]] = {}
+        self.pastes: T.Dict[str, str] = {}
+        self.requests: T.Counter[str] = collections.Counter()
+        """The number of requests by method and endpoint."""
+        self.faults: T.Counter[T.Any] = collections.Counter()
+        """The number of injected faults by status code, ``"drop"`` or
+        ``"cut"``."""
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._windows: T.Dict[str, _Window] = {}
+        self._server: T.Optional[Server] = None
+        self._thread: T.Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """The base URL of the running server, like ``http://127.0.0.1:8000``."""
+        if self._server is None:
+            raise RuntimeError("The server isn't running.")
+        return "http://%s:%d" % (self.host, self._server.server_address[1])
+
+    def start(self) -> "FakeSXCU":
+        if self._server is None:
+            self._server = Server((self.host, 0), Handler)
+            self._server.fake = self
+            self._thread = threading.Thread(
+                target=self._server.serve_forever, name="fake-sxcu", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread = None
+
+    def __enter__(self) -> "FakeSXCU":
+        return self.start()
+
+    def __exit__(self, *args: T.Any) -> None:
+        self.stop()
+
+    def client(self, cls: T.Type[T.Any] = SXCU, **kwargs: T.Any) -> T.Any:
+        """Returns a :class:`.SXCU`, or an instance of ``cls`` like
+        :class:`.AsyncSXCU`, sending all its requests to this server.
+
+        Unless a ``request_client`` is passed, the client has its own
+        :class:`~.RateLimiter`, so that the buckets of the fake server
+        don't mix with the ones of sxcu.net.
+        """
+        kwargs.setdefault("subdomain", self.url)
+        kwargs.setdefault("api_endpoint", self.url + "/api/")
+        kwargs.setdefault("upload_text_endpoint", self.url + "/upload")
+        if kwargs.get("request_client") is None:
+            if issubclass(cls, SXCU):
+                client_cls = RequestClient
+            else:
+                # pylint: disable=import-outside-toplevel
+                from .__async_client__ import AsyncRequestClient as client_cls
+            kwargs["request_client"] = client_cls(rate_limiter=RateLimiter())
+        return cls(**kwargs)
+
+    def _new_id(self, length: int = 6) -> str:
+        with self._lock:
+            return "".join(self._random.choice(_ID_ALPHABET) for _ in range(length))
+
+    def _add_file(self, data: bytes, extension: str, **fields: T.Any) -> dict:
+        entry = {
+            "id": self._new_id(),
+            "token": self._new_id(16),
+            "data": data,
+            "extension": extension,
+            "views": 0,
+            "created": int(time.time()),
+        }
+        entry.update(fields)
+        with self._lock:
+            self.files[entry["id"]] = entry
+        return entry
+
+    def _count(self, route: str) -> None:
+        with self._lock:
+            self.requests[route] += 1
+
+    def _chance(self, fault: str, probability: float) -> bool:
+        """Draws whether to inject ``fault``, counting it if so."""
+        if not probability:
+            return False
+        with self._lock:
+            if self._random.random() >= probability:
+                return False
+            self.faults[fault] += 1
+            return True
+
+    def _fault(self) -> T.Any:
+        """Returns the fault to inject into a request, if any."""
+        with self._lock:
+            draw = self._random.random()
+            if draw < self.drop_rate:
+                self.faults["drop"] += 1
+                return "drop"
+            draw -= self.drop_rate
+            for status, probability in self.errors.items():
+                if draw < probability:
+                    self.faults[status] += 1
+                    return status
+                draw -= probability
+        return None
+
+    def _take(self, bucket: str) -> T.Tuple[bool, T.Dict[str, str]]:
+        """Count a request against ``bucket``, returns whether it is
+        allowed and the rate-limit headers.
+        """
+        limits = self.rate_limits.get(bucket)
+        if limits is None:
+            return True, {}
+        now = time.time()
+        with self._lock:
+            window = self._windows.get(bucket)
+            if window is None or (window.limit, window.period) != tuple(limits):
+                window = self._windows[bucket] = _Window(*limits)
+            if window.reset_at <= now:
+                window.remaining = window.limit
+                window.reset_at = now + window.period
+            allowed = window.remaining > 0
+            if allowed:
+                window.remaining -= 1
+            headers = {
+                HEADER_BUCKET: bucket,
+                HEADER_LIMIT: str(window.limit),
+                HEADER_REMAINING: str(window.remaining),
+                HEADER_RESET: str(int(window.reset_at)),
+                HEADER_RESET_AFTER: "%.3f" % (window.reset_at - now),
+            }
+        return allowed, headers
@@ -0,0 +1,281 @@
+"""Transforms applied to files before they are uploaded.
+
+A transform is called with an iterator over the chunks of the file and
+returns an iterator over the chunks to upload, so files are never read
+into memory at once.
+
+.. code-block:: python
+
+    pipeline = sxcu.transforms.TransformPipeline(
+        sxcu.transforms.StripMetadata(),
+        on_stats=lambda stats: print(stats.filename, stats.saved),
+    )
+    client = sxcu.SXCU(transforms=pipeline)
+    client.upload_file("screenshot.png")
+"""
+__all__ = ["StripMetadata", "Transform", "TransformPipeline", "TransformStats"]
+
+import struct
+import tempfile
+import threading
+import typing as T
+
+from .constants import UPLOAD_CHUNK_SIZE
+from .multipart import Source, _make_source
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+JPEG_SOI = b"\xff\xd8"
+
+# textual data, Exif, modification time and ICC profile
+PNG_METADATA_CHUNKS = frozenset({b"tEXt", b"iTXt", b"zTXt", b"eXIf", b"tIME", b"iCCP"})
+# APP1 (Exif, XMP), APP2 (ICC profile), APP13 (IPTC) and comments
+JPEG_METADATA_MARKERS = frozenset({0xE1, 0xE2, 0xED, 0xFE})
+# markers which aren't followed by a length
+JPEG_STANDALONE_MARKERS = frozenset({0x01, *range(0xD0, 0xD8)})
+JPEG_SOS = 0xDA
+JPEG_EOI = 0xD9
+
+
+class _Stream:
+    """Reads from an iterator of chunks, only keeping in memory what is
+    needed for parsing.
+    """
+
+    def __init__(self, chunks: T.Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._buffer = bytearray()
+
+    def _fill(self, size: int) -> None:
+        while len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return
+            self._buffer += chunk
+
+    def read(self, size: int) -> bytes:
+        """Returns the next ``size`` bytes, fewer at the end of the
+        stream.
+        """
+        self._fill(size)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def unread(self, data: bytes) -> None:
+        self._buffer[:0] = data
+
+    def pieces(self, size: int) -> T.Iterator[bytes]:
+        """Yields the next ``size`` bytes without joining the chunks."""
+        if self._buffer:
+            piece = self.read(min(size, len(self._buffer)))
+            size -= len(piece)
+            yield piece
+        while size > 0:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return
+            if len(chunk) > size:
+                self._buffer += chunk[size:]
+                chunk = chunk[:size]
+            size -= len(chunk)
+            yield chunk
+
+    def skip(self, size: int) -> None:
+        for _ in self.pieces(size):
+            pass
+
+    def rest(self) -> T.Iterator[bytes]:
+        if self._buffer:
+            yield self.read(len(self._buffer))
+        yield from self._chunks
+
+
+class Transform:
+    """The base class of transforms. Subclasses implement :meth:`__call__`
+    and set a ``name`` which identifies their options, it is part of the
+    key of the :class:`~.UploadCache`.
+    """
+
+    name = "transform"
+
+    def __call__(self, chunks: T.Iterable[bytes]) -> T.Iterator[bytes]:
+        raise NotImplementedError
+
+
+class StripMetadata(Transform):
+    """Removes metadata from PNG and JPEG files without decoding them:
+    the ``tEXt``, ``iTXt``, ``zTXt``, ``eXIf``, ``tIME`` and ``iCCP``
+    chunks of PNG, and the Exif, XMP, ICC profile, IPTC and comment
+    segments of JPEG. Other files are passed through unchanged.
+
+    .. note ::
+
+        The Exif orientation of photos is removed too, so viewers may
+        show them rotated.
+
+    Parameters
+    ==========
+    keep_icc : :class:`bool`, optional
+        Keep the ICC colour profiles.
+    """
+
+    def __init__(self, keep_icc: bool = False) -> None:
+        self.keep_icc = keep_icc
+        self.name = "strip-metadata" + ("+icc" if keep_icc else "")
+        self.png_chunks = PNG_METADATA_CHUNKS - ({b"iCCP"} if keep_icc else set())
+        self.jpeg_markers = JPEG_METADATA_MARKERS - ({0xE2} if keep_icc else set())
+
+    def __call__(self, chunks: T.Iterable[bytes]) -> T.Iterator[bytes]:
+        stream = _Stream(chunks)
+        head = stream.read(len(PNG_SIGNATURE))
+        stream.unread(head)
+        if head == PNG_SIGNATURE:
+            return self._png(stream)
+        if head.startswith(JPEG_SOI):
+            return self._jpeg(stream)
+        return stream.rest()
+
+    def _png(self, stream: _Stream) -> T.Iterator[bytes]:
+        yield stream.read(len(PNG_SIGNATURE))
+        while True:
+            header = stream.read(8)
+            if len(header) < 8:
+                yield header
+                return
+            length, chunk_type = struct.unpack(">I4s", header)
+            # data and CRC
+            if chunk_type in self.png_chunks:
+                stream.skip(length + 4)
+            else:
+                yield header
+                yield from stream.pieces(length + 4)
+
+    def _jpeg(self, stream: _Stream) -> T.Iterator[bytes]:
+        yield stream.read(len(JPEG_SOI))
+        while True:
+            marker = stream.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                # not a marker, leave the rest alone.
+                yield marker
+                break
+            code = marker[1]
+            if code == 0xFF:
+                # fill byte
+                yield marker[:1]
+                stream.unread(marker[1:])
+                continue
+            if code in JPEG_STANDALONE_MARKERS:
+                yield marker
+                continue
+            if code == JPEG_EOI:
+                yield marker
+                break
+            size = stream.read(2)
+            if len(size) < 2:
+                yield marker + size
+                return
+            length = struct.unpack(">H", size)[0] - 2
+            if code in self.jpeg_markers:
+                stream.skip(length)
+                continue
+            yield marker + size
+            if code == JPEG_SOS:
+                # the compressed image data follows.
+                break
+            yield from stream.pieces(length)
+        yield from stream.rest()
+
+
+class TransformStats(T.NamedTuple):
+    """The sizes of a file before and after the transforms."""
+
+    filename: T.Optional[str]
+    bytes_in: int
+    bytes_out: int
+
+    @property
+    def saved(self) -> int:
+        return self.bytes_in - self.bytes_out
+
+
+class TransformPipeline:
+    """Applies ``transforms`` in order to files before they are uploaded,
+    see the ``transforms`` parameter of :class:`.SXCU`.
+
+    The result is spooled to a temporary file, kept in memory up to
+    ``spool_size`` bytes, so that its size is known and the upload can be
+    retried.
+
+    Parameters
+    ==========
+    transforms : :class:`Transform`
+        Callables taking an iterator of :class:`bytes` and returning one.
+    on_stats : :class:`callable`, optional
+        Called with the :class:`TransformStats` of every file.
+    spool_size : :class:`int`, optional
+        The size above which the result is written to disk.
+    """
+
+    def __init__(
+        self,
+        *transforms: T.Callable[[T.Iterable[bytes]], T.Iterable[bytes]],
+        on_stats: T.Optional[T.Callable[[TransformStats], None]] = None,
+        spool_size: int = 8 * 1024 * 1024,
+    ) -> None:
+        self.transforms = transforms
+        self.on_stats = on_stats
+        self.spool_size = spool_size
+        self.bytes_in = 0
+        """The bytes read from all the files transformed so far."""
+        self.bytes_out = 0
+        """The bytes produced by the transforms so far."""
+        self._lock = threading.Lock()
+
+    @property
+    def key(self) -> str:
+        """Identifies the transforms and their options."""
+        return ",".join(
+            getattr(transform, "name", None) or repr(transform)
+            for transform in self.transforms
+        )
+
+    @property
+    def saved(self) -> int:
+        """The bytes saved for all the files transformed so far."""
+        return self.bytes_in - self.bytes_out
+
+    def apply(
+        self, source: Source, filename: T.Optional[str] = None
+    ) -> T.Tuple[T.IO[bytes], TransformStats]:
+        """Transform ``source``, which can be anything accepted by
+        :meth:`.SXCU.upload_file`. Returns the result, positioned at its
+        start, and its statistics. The caller closes the result.
+        """
+        source = _make_source(source)
+        read = 0
+
+        def counted() -> T.Iterator[bytes]:
+            nonlocal read
+            for chunk in source.chunks(UPLOAD_CHUNK_SIZE):
+                read += len(chunk)
+                yield chunk
+
+        chunks: T.Iterable[bytes] = counted()
+        for transform in self.transforms:
+            chunks = transform(chunks)
+        result = tempfile.SpooledTemporaryFile(self.spool_size)
+        try:
+            for chunk in chunks:
+                result.write(chunk)
+            written = result.tell()
+            result.seek(0)
+        except BaseException:
+            result.close()
+            raise
+        stats = TransformStats(filename or source.name, read, written)
+        with self._lock:
+            self.bytes_in += read
+            self.bytes_out += written
+        if self.on_stats is not None:
+            self.on_stats(stats)
+        return result, stats
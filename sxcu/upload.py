@@ -0,0 +1,96 @@
+"""Upload files to sxcu.net, see :meth:`.SXCU.upload_file` and
+:meth:`.SXCU.upload_many`.
+
+The body is streamed by a :class:`~.MultipartEncoder`, so the memory used
+doesn't depend on the size of the file.
+"""
+__all__ = ["upload_file", "upload_many"]
+
+import os
+import typing as T
+
+from .__logger__ import logger
+from ._utils import check_response
+from .batch import Outcome, run_many
+from .journal import check_ttl, record_upload
+from .multipart import MultipartEncoder, UploadProgress
+from .profile import UploadProfile
+from .results import UploadResult
+from .transforms import TransformPipeline
+from .upload_cache import upload_key
+
+
+def upload_file(
+    client: T.Any,
+    profile: UploadProfile,
+    source: T.Any,
+    filename: T.Optional[str] = None,
+    *,
+    progress: T.Optional[T.Callable[[UploadProgress], None]] = None,
+    ttl: T.Optional[float] = None,
+    transforms: T.Optional[TransformPipeline] = None,
+) -> UploadResult:
+    """Upload ``source`` with the options of ``profile``. See
+    :meth:`.SXCU.upload_file`.
+    """
+    check_ttl(client, ttl)
+    data = profile.fields
+    if transforms is None:
+        transforms = client.transforms
+    cache_key = upload_key(client, source, data, profile.self_destruct, transforms)
+    if cache_key is not None:
+        cached = client.upload_cache.get(cache_key[0])
+        if cached is not None:
+            logger.debug("Found %s in the upload cache.", cached.get("url"))
+            return UploadResult(cached)
+    transformed = None
+    if transforms is not None:
+        transformed, stats = transforms.apply(source, filename)
+        source, filename = transformed, stats.filename
+        logger.debug("Transforms saved %d bytes of %s.", stats.saved, filename)
+    body = MultipartEncoder(
+        profile.prepared, "file", source, filename, progress=progress
+    )
+    headers = dict(client.request_handler.headers)
+    headers["Content-Type"] = body.content_type
+    try:
+        res = client.request_handler.post(
+            profile.url,
+            headers=headers,
+            data=body if body.len is not None else body.iter_chunks(),
+        )
+    finally:
+        body.close()
+        if transformed is not None:
+            transformed.close()
+    check_response(res)
+    result = UploadResult(res.content)
+    if cache_key is not None:
+        client.upload_cache.put(*cache_key, result)
+    record_upload(client, result, data, body.source.length, body.filename, ttl)
+    return result
+
+
+def upload_many(
+    client: T.Any,
+    sources: T.Iterable[T.Any],
+    concurrency: int = 4,
+    ordered: bool = False,
+    **options: T.Any,
+) -> T.Iterator[Outcome]:
+    """Upload ``sources`` using ``concurrency`` worker threads, passing
+    ``options`` to :meth:`.SXCU.upload_file`. See :meth:`.SXCU.upload_many`.
+    """
+    check_ttl(client, options.get("ttl"))
+
+    def upload(source: T.Any) -> UploadResult:
+        filename = None
+        if isinstance(source, tuple):
+            filename, source = source
+        if isinstance(source, (str, os.PathLike)):
+            return client.upload_file(source, filename=filename, **options)
+        return client.upload_file(fileobj=source, filename=filename, **options)
+
+    return run_many(
+        upload, sources, concurrency, ordered, thread_name_prefix="sxcu-upload"
+    )
@@ -0,0 +1,239 @@
+"""A persistent cache of uploads, so that the same content isn't uploaded
+twice.
+
+.. code-block:: python
+
+    cache = sxcu.upload_cache.UploadCache("~/.cache/sxcu/uploads.sqlite")
+    client = sxcu.SXCU(upload_cache=cache)
+    client.upload_file("avatar.png")  # uploaded
+    client.upload_file("avatar.png")  # returned from the cache
+"""
+__all__ = ["UploadCache", "content_hash", "upload_key"]
+
+import hashlib
+import mmap
+import os
+import sqlite3
+import stat
+import threading
+import time
+import typing as T
+
+from . import codec
+from .constants import UPLOAD_CHUNK_SIZE
+from .exceptions import ClientError
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    key TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    url TEXT,
+    del_url TEXT,
+    response TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS uploads_url ON uploads (url);
+CREATE INDEX IF NOT EXISTS uploads_del_url ON uploads (del_url);
+"""
+
+
+def content_hash(source: T.Any) -> T.Optional[T.Tuple[str, int]]:
+    """Returns the SHA-256 hex digest and the size of ``source``, reading
+    it in chunks. File objects are rewound to where they were.
+
+    ``None`` is returned for sources which can't be read twice, like
+    iterables or pipes.
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source).cast("B")
+        digest.update(view)
+        return digest.hexdigest(), len(view)
+    if isinstance(source, (str, os.PathLike)):
+        # named pipes and devices, like ``/dev/stdin``, are read once.
+        if not stat.S_ISREG(os.stat(source).st_mode):
+            return None
+        with open(source, "rb") as fileobj:
+            size = os.fstat(fileobj.fileno()).st_size
+            if size:
+                with mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    digest.update(mapped)
+        return digest.hexdigest(), size
+    if not hasattr(source, "read"):
+        return None
+    try:
+        seekable = getattr(source, "seekable", None)
+        if seekable is not None and not seekable():
+            return None
+        start = source.tell()
+    except (AttributeError, OSError):
+        return None
+    size = 0
+    try:
+        while True:
+            chunk = source.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+    finally:
+        source.seek(start)
+    return digest.hexdigest(), size
+
+
+def upload_key(
+    client: T.Any,
+    source: T.Any,
+    data: T.Mapping[str, T.Any],
+    self_destruct: bool,
+    transforms: T.Any = None,
+) -> T.Optional[T.Tuple[str, str, int]]:
+    """Returns the key of ``source`` in the upload cache of ``client`` with
+    its hash and size, or ``None`` if it shouldn't be cached.
+    """
+    if client.upload_cache is None or self_destruct:
+        return None
+    hashed = content_hash(source)
+    if hashed is None:
+        return None
+    options = {
+        "subdomain": client.subdomain,
+        "collection": data.get("collection"),
+        "noembed": "noembed" in data,
+        "og_properties": data.get("og_properties"),
+        # files uploaded with other tokens belong to other accounts.
+        "credentials": hashlib.sha256(
+            f"{data.get('token', '')}\n{data.get('collection_token', '')}".encode()
+        ).hexdigest(),
+    }
+    if transforms is not None:
+        options["transforms"] = transforms.key
+    return (client.upload_cache.key(hashed[0], options),) + hashed
+
+
+class UploadCache:
+    """Remembers the responses of uploads in a SQLite database, keyed by
+    the SHA-256 of the content and the upload options.
+
+    The database uses write-ahead logging, so it can be shared by several
+    threads and processes. Uploads with ``self_destruct`` aren't cached.
+
+    Parameters
+    ==========
+    path : :class:`str`
+        The database file, created if it doesn't exist. ``":memory:"``
+        keeps the cache in memory, for a single thread.
+    max_age : :class:`float`, optional
+        Entries older than this many seconds are ignored.
+    """
+
+    def __init__(
+        self, path: T.Union[str, os.PathLike], max_age: T.Optional[float] = None
+    ) -> None:
+        self.path = os.path.expanduser(os.fspath(path))
+        self.max_age = max_age
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def key(sha256: str, options: T.Mapping[str, T.Any]) -> str:
+        """Returns the cache key of content with the hash ``sha256``
+        uploaded with ``options``.
+        """
+        encoded = codec.dumps(dict(sorted(options.items())))
+        return hashlib.sha256(f"{sha256}\n{encoded}".encode()).hexdigest()
+
+    def get(self, key: str) -> T.Optional[dict]:
+        """Returns the recorded response for ``key``, if any."""
+        row = (
+            self._connect()
+            .execute("SELECT response, created FROM uploads WHERE key = ?", (key,))
+            .fetchone()
+        )
+        if row is None:
+            return None
+        if self.max_age is not None and time.time() - row[1] > self.max_age:
+            self.discard(key)
+            return None
+        return codec.loads(row[0])
+
+    def put(
+        self, key: str, sha256: str, size: int, response: T.Mapping[str, T.Any]
+    ) -> None:
+        """Record the ``response`` of an upload."""
+        self._connect().execute(
+            "INSERT OR REPLACE INTO uploads VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                sha256,
+                size,
+                response.get("url"),
+                response.get("del_url"),
+                codec.dumps(response),
+                time.time(),
+            ),
+        )
+
+    def discard(self, key: str) -> None:
+        self._connect().execute("DELETE FROM uploads WHERE key = ?", (key,))
+
+    def evict_url(self, url: str) -> int:
+        """Remove the entries of the file with the URL or delete URL
+        ``url``. Returns the number of removed entries.
+        """
+        return (
+            self._connect()
+            .execute("DELETE FROM uploads WHERE url = ? OR del_url = ?", (url, url))
+            .rowcount
+        )
+
+    def urls(self) -> T.List[str]:
+        """Returns the URLs of all the cached uploads."""
+        rows = self._connect().execute(
+            "SELECT DISTINCT url FROM uploads WHERE url IS NOT NULL"
+        )
+        return [row[0] for row in rows]
+
+    def validate(self, client: T.Any) -> int:
+        """Check that every cached file still exists using
+        :meth:`.SXCU.file_meta`, and remove the ones which were deleted.
+        Returns the number of removed entries.
+
+        Parameters
+        ==========
+        client : :class:`.SXCU`
+            The client used to send the requests.
+        """
+        removed = 0
+        for url in self.urls():
+            try:
+                client.file_meta(file_url=url)
+            except ClientError as error:
+                if error.status_code in (404, 410):
+                    removed += self.evict_url(url)
+        return removed
+
+    def clear(self) -> None:
+        self._connect().execute("DELETE FROM uploads")
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM uploads").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the connection of the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
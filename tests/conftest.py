@@ -1,3 +1,10 @@
+import json
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+
 def pytest_addoption(parser):
     parser.addoption(
         "--skip_slow",
@@ -5,3 +12,43 @@ def pytest_addoption(parser):
         default=False,
         help="Will skip all the slow marked tests. Slow tests are arbitrarily marked as such.",
     )
+
+
+class MockTransport(BaseAdapter):
+    """A transport adapter which replies with canned responses instead of
+    using the network. ``responses`` is a list of ``(status_code, body,
+    headers)`` tuples or callables taking the request and returning one.
+    The last response is repeated once the list is exhausted.
+    """
+
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = list(responses)
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        index = min(len(self.requests), len(self.responses)) - 1
+        response = self.responses[index]
+        if callable(response):
+            response = response(request)
+        if isinstance(response, Exception):
+            raise response
+        status_code, body, headers = response
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        resp = requests.Response()
+        resp.status_code = status_code
+        resp._content = body
+        resp.headers.update(headers)
+        resp.url = request.url
+        resp.request = request
+        return resp
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def mock_transport():
+    return MockTransport
@@ -161,6 +161,10 @@ class MockUploadResponse:
     def text(self):
         return self._response
 
+    @property
+    def content(self):
+        return self._response.encode()
+
     @property
     def headers(self):
         return {}
@@ -183,13 +187,44 @@ def test_upload_mock(monkeypatch):
     )
 
     def mock_get(*args, **kwargs):
-        assert "token" in kwargs["data"]
-        assert kwargs["data"]["token"] == "b8893b47-0e90-4fce-ad46-4264161a3a72"
+        assert "token" in kwargs["data"].fields
+        assert (
+            kwargs["data"].fields["token"] == "b8893b47-0e90-4fce-ad46-4264161a3a72"
+        )
         return MockUploadResponse(200, response)
 
-    monkeypatch.setattr(requests, "post", mock_get)
+    monkeypatch.setattr(requests.Session, "request", mock_get)
 
     sxcu_file = Path(FILE_PATH, "assets", "sxcu.net - python.is-ne.at.sxcu")
     _t = SXCU(sxcu_config=sxcu_file)
     a = _t.upload_file(IMG_LOC)
     assert json.dumps(a) == response
+    assert a.thumb == a["thumb"] == json.loads(response)["thumb"]
+
+
+def test_instances_have_own_client():
+    _a = SXCU()
+    _b = SXCU()
+    assert _a.request_handler is not _b.request_handler
+    with SXCU() as _c:
+        session = _c.request_handler.session
+    assert _c.request_handler._session is None
+    assert session is not None
+
+
+def test_helpers_use_instance_or_shared_client(monkeypatch):
+    urls = []
+
+    def mock_request(self, method, url, **kwargs):
+        urls.append(url)
+        return MockUploadResponse(200, json.dumps({"id": "abc"}))
+
+    monkeypatch.setattr(requests.Session, "request", mock_request)
+    SXCU.file_meta("abc")
+    _t = SXCU()
+    _t.api_endpoint = "http://localhost:8080/api/"
+    _t.file_meta(file_url="http://localhost:8080/abc")
+    assert urls == [
+        "https://sxcu.net/api/files/abc",
+        "http://localhost:8080/api/files/abc",
+    ]
@@ -0,0 +1,246 @@
+import asyncio
+import json
+
+import pytest
+
+from sxcu import AsyncSXCU
+from sxcu.__async_client__ import AsyncRequestClient
+from sxcu.exceptions import SXCUError
+from sxcu.transforms import TransformPipeline
+
+web = pytest.importorskip("aiohttp.web")
+test_utils = pytest.importorskip("aiohttp.test_utils")
+
+UPLOAD_RESPONSE = {
+    "url": "https://sxcu.net/53BhgPNB1",
+    "del_url": "https://sxcu.net/d/53BhgPNB1/81388fb6",
+    "thumb": "https://sxcu.net/t/53BhgPNB1.png",
+}
+
+
+def make_app(state):
+    async def upload(request):
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        try:
+            form = await request.post()
+            state["uploads"].append(
+                (form["file"].filename, form["file"].file.read(), dict(form))
+            )
+            await asyncio.sleep(0.01)
+        finally:
+            state["in_flight"] -= 1
+        return web.json_response(UPLOAD_RESPONSE)
+
+    async def file_meta(request):
+        state["meta_requests"] = state.get("meta_requests", 0) + 1
+        await asyncio.sleep(0.01)
+        if request.match_info["file_id"] == "missing":
+            return web.json_response(
+                {"code": 8, "error": "Invalid file ID"}, status=404
+            )
+        return web.json_response({"id": request.match_info["file_id"]})
+
+    async def subdomains(request):
+        state["subdomain_requests"] = state.get("subdomain_requests", 0) + 1
+        return web.json_response(
+            [{"domain": "sxcu.net", "upload_count": 5, "public": True}]
+        )
+
+    async def delete(request):
+        state["deleted"] = request.match_info["file_id"]
+        return web.Response(text="x" * 100000)
+
+    async def slow(request):
+        await asyncio.sleep(10)
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_post("/api/files/create", upload)
+    app.router.add_get("/api/files/{file_id}", file_meta)
+    app.router.add_get("/api/subdomains", subdomains)
+    app.router.add_get("/files/delete/{file_id}/{token}/", delete)
+    app.router.add_get("/slow", slow)
+    return app
+
+
+def run(coro_func):
+    state = {"in_flight": 0, "max_in_flight": 0, "uploads": []}
+
+    async def main():
+        server = test_utils.TestServer(make_app(state))
+        await server.start_server()
+        try:
+            await coro_func(str(server.make_url("")), state)
+        finally:
+            await server.close()
+
+    asyncio.run(main())
+    return state
+
+
+def test_upload_bounded_concurrency():
+    async def check(base, state):
+        client = AsyncRequestClient(max_concurrency=3)
+        async with AsyncSXCU(base, "token", request_client=client) as sxcu:
+            results = await asyncio.gather(
+                *(
+                    sxcu.upload_file(fileobj=b"data%d" % i, filename="a.png")
+                    for i in range(10)
+                )
+            )
+        assert all(res == UPLOAD_RESPONSE for res in results)
+
+    state = run(check)
+    assert len(state["uploads"]) == 10
+    assert state["max_in_flight"] <= 3
+    filename, content, form = state["uploads"][0]
+    assert filename == "a.png"
+    assert content.startswith(b"data")
+    assert form["token"] == "token"
+
+
+def test_upload_async_iterable(tmp_path):
+    path = tmp_path / "img.png"
+    path.write_bytes(b"x" * 100000)
+
+    async def chunks():
+        for _ in range(4):
+            yield b"y" * 1000
+
+    async def check(base, state):
+        async with AsyncSXCU(base) as sxcu:
+            await sxcu.upload_file(path)
+            await sxcu.upload_file(fileobj=chunks(), filename="b.txt", noembed=True)
+
+    state = run(check)
+    assert state["uploads"][0][:2] == ("img.png", b"x" * 100000)
+    assert state["uploads"][1][:2] == ("b.txt", b"y" * 4000)
+    assert "noembed" in state["uploads"][1][2]
+
+
+def test_upload_progress_and_transforms(tmp_path):
+    path = tmp_path / "img.png"
+    path.write_bytes(b"x" * 300000)
+    progress = []
+
+    async def chunks():
+        yield b"y"
+
+    async def check(base, state):
+        async with AsyncSXCU(base) as sxcu:
+            await sxcu.upload_file(path, progress=progress.append)
+            with pytest.raises(TypeError):
+                await sxcu.upload_file(
+                    fileobj=chunks(), filename="b.txt", transforms=TransformPipeline()
+                )
+
+    state = run(check)
+    assert len(state["uploads"]) == 1
+    sent = [p.bytes_sent for p in progress]
+    assert len(sent) > 1 and sent == sorted(sent)
+    assert sent[-1] == progress[-1].total > 300000
+
+
+def test_file_meta_and_errors():
+    async def check(base, state):
+        async with AsyncSXCU() as sxcu:
+            sxcu.api_endpoint = base + "/api/"
+            assert await sxcu.file_meta(file_url="https://sxcu.net/abc") == {
+                "id": "abc"
+            }
+            with pytest.raises(SXCUError):
+                await sxcu.file_meta("missing")
+
+    run(check)
+
+
+def test_list_subdomain_cached():
+    async def check(base, state):
+        async with AsyncSXCU() as sxcu:
+            sxcu.api_endpoint = base + "/api/"
+            assert await sxcu.list_subdomain() == [
+                {"domain": b"sxcu.net", "upload_count": 5, "public": True}
+            ]
+            assert await sxcu.list_subdomain(0) == []
+
+    state = run(check)
+    assert state["subdomain_requests"] == 1
+
+
+def test_delete_image():
+    async def check(base, state):
+        async with AsyncSXCU() as sxcu:
+            assert await sxcu.delete_image(base + "/files/delete/abc/token/")
+            assert not await sxcu.delete_image(base + "/files/delete/")
+
+    assert run(check)["deleted"] == "abc"
+
+
+def test_cancellation_releases_slot():
+    async def check(base, state):
+        client = AsyncRequestClient(max_concurrency=1)
+        task = asyncio.ensure_future(client.get(base + "/slow"))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        res = await asyncio.wait_for(client.get(base + "/api/files/abc"), 5)
+        assert json.loads(res.content) == {"id": "abc"}
+        events = []
+        client.hooks.add("request_end", events.append)
+        await client.close()
+        # the hooks are kept when the client is used again.
+        await client.get(base + "/api/files/abc")
+        assert len(events) == 1
+        await client.close()
+
+    run(check)
+
+
+def test_session_follows_event_loop():
+    client = AsyncRequestClient()
+    sessions = []
+
+    async def check(base, state):
+        await client.get(base + "/api/files/abc")
+        sessions.append(client.session)
+
+    run(check)
+    run(check)
+    # the session of the first loop was closed when the second used it.
+    assert sessions[0] is not sessions[1] and sessions[0].closed
+    asyncio.run(client.close())
+    assert sessions[1].closed
+
+
+def test_session_of_stopped_loop_is_closed():
+    client = AsyncRequestClient()
+
+    async def session():
+        return client.session
+
+    async def session_and_close():
+        used = client.session
+        await client.close()
+        return used
+
+    loop = asyncio.new_event_loop()
+    try:
+        first = loop.run_until_complete(session())
+        assert asyncio.run(session_and_close()) is not first
+        assert first.closed
+    finally:
+        loop.close()
+
+
+def test_identical_gets_are_coalesced():
+    async def check(base, state):
+        async with AsyncSXCU(request_client=AsyncRequestClient()) as sxcu:
+            sxcu.api_endpoint = base + "/api/"
+            results = await asyncio.gather(*(sxcu.file_meta("abc") for _ in range(5)))
+            assert results == [{"id": "abc"}] * 5
+            assert state["meta_requests"] == 1
+            assert sxcu.request_handler.single_flight.saved == 4
+
+    run(check)
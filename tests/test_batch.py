@@ -0,0 +1,159 @@
+import http.server
+import json
+import threading
+import time
+
+import pytest
+
+from sxcu import SXCU
+from sxcu.__client__ import RequestClient
+from sxcu.batch import run_many, run_reported
+from sxcu.exceptions import ClientError
+
+
+def test_run_many_ordered_and_errors():
+    def func(item):
+        time.sleep(0.02 * (5 - item))
+        if item == 2:
+            raise ValueError(item)
+        return item * 10
+
+    outcomes = list(run_many(func, range(5), 3, ordered=True))
+    assert [o.index for o in outcomes] == list(range(5))
+    assert [o.result for o in outcomes] == [0, 10, None, 30, 40]
+    assert not outcomes[2].ok and isinstance(outcomes[2].error, ValueError)
+
+    unordered = list(run_many(func, range(5), 5))
+    assert sorted(o.index for o in unordered) == list(range(5))
+    assert unordered[0].index == 4
+
+
+def test_run_many_is_bounded_and_lazy():
+    active = []
+    peak = []
+    lock = threading.Lock()
+    consumed = []
+
+    def items():
+        for i in range(50):
+            consumed.append(i)
+            yield i
+
+    def func(item):
+        with lock:
+            active.append(item)
+            peak.append(len(active))
+        time.sleep(0.002)
+        with lock:
+            active.remove(item)
+
+    batch = run_many(func, items(), 2)
+    next(batch)
+    assert len(consumed) <= 5
+    batch.close()
+    assert len(consumed) <= 5
+    list(run_many(func, items(), 2))
+    assert max(peak) <= 2
+
+    with pytest.raises(ValueError):
+        list(run_many(func, [], 0))
+
+
+def test_run_reported_skips_completed(tmp_path):
+    report = tmp_path / "report.jsonl"
+    names = []
+
+    def func(item):
+        names.append(threading.current_thread().name)
+        if item == "b":
+            raise ValueError(item)
+        return item
+
+    first = list(run_reported(func, "abc", 2, True, report, thread_name_prefix="x"))
+    assert [o.ok for o in first] == [True, False, True]
+    assert all(name.startswith("x_") for name in names)
+    again = list(run_reported(func, "abc", 2, True, report))
+    assert [o.item for o in again] == ["b"]
+
+
+def test_upload_many(mock_transport, tmp_path):
+    def respond(request):
+        body = request.body.read()
+        assert b'name="collection"' in body
+        if b"bad" in body:
+            return 400, {"error": "Invalid file", "code": 1}, {}
+        return 200, {"url": "https://sxcu.net/abc"}, {}
+
+    path = tmp_path / "a.png"
+    path.write_bytes(b"image")
+    transport = mock_transport([respond])
+    client = RequestClient(transport=transport, rate_limiter=False, retry=False)
+    sources = [path, str(path), b"bytes", ("b.png", b"bad")]
+    outcomes = list(
+        SXCU(request_client=client).upload_many(
+            sources, concurrency=2, ordered=True, collection="col"
+        )
+    )
+    assert len(transport.requests) == 4
+    assert [o.item for o in outcomes] == sources
+    assert [o.ok for o in outcomes] == [True, True, True, False]
+    assert isinstance(outcomes[3].error, ClientError)
+    assert outcomes[0].result == {"url": "https://sxcu.net/abc"}
+
+
+class _DeleteHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def do_GET(self):  # noqa N802
+        body = b"<html>" + b"deleted" * 1000 + b"</html>"
+        self.send_response(404 if "/missing" in self.path else 200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def delete_server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _DeleteHandler)
+    server.daemon_threads = True
+    _DeleteHandler.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield "http://127.0.0.1:%d" % server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def test_delete_image_many(delete_server, tmp_path):
+    urls = [f"{delete_server}/d/{i}/token" for i in range(30)]
+    urls.insert(5, f"{delete_server}/d/missing/token")
+    report = tmp_path / "report.jsonl"
+    client = RequestClient(rate_limiter=False, retry=False)
+    with SXCU(request_client=client) as sxcu:
+        outcomes = list(sxcu.delete_image_many(urls, 3, report=report, ordered=True))
+        assert [o.item for o in outcomes] == urls
+        assert [o.ok for o in outcomes].count(False) == 1
+        assert outcomes[5].error.status_code == 404
+        # the pages were drained, so the connections were reused
+        assert _DeleteHandler.connections <= 3
+
+        resumed = list(sxcu.delete_image_many(urls, 3, report=report))
+    assert [o.item for o in resumed] == [urls[5]]
+    lines = [json.loads(line) for line in report.read_text().splitlines()]
+    assert len(lines) == 32
+    assert lines[5] == {
+        "item": urls[5],
+        "ok": False,
+        "error": "HTTP 404",
+        "status_code": 404,
+        "elapsed": lines[5]["elapsed"],
+    }
@@ -0,0 +1,182 @@
+import io
+import json
+import os
+import tempfile
+from argparse import Namespace
+
+import pytest
+
+from sxcu import _cli, _cli_batch
+from sxcu.mirror import MirrorReport
+from sxcu.sxcu import SXCU
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+OUTPUT = {"json": False, "no_clipboard": False}
+
+
+@pytest.fixture
+def uploads(monkeypatch):
+    calls = []
+
+    def upload_file(self, name=None, fileobj=None, **kwargs):
+        source = fileobj if fileobj is not None else name
+        if hasattr(source, "read"):
+            source = source.read()
+        calls.append((source, kwargs["filename"]))
+        return {"url": "u", "del_url": "d", "thumb": "t"}
+
+    monkeypatch.setattr(SXCU, "upload_file", upload_file)
+    monkeypatch.setattr(_cli, "copy_to_clipboard", lambda text: None)
+    return calls
+
+
+def test_guess_filename():
+    assert _cli.guess_filename(PNG) == "upload.png"
+    assert _cli.guess_filename(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == "upload.webp"
+    assert _cli.guess_filename(b"\x00\x00\x00\x18ftypmp42") == "upload.mp4"
+    assert _cli.guess_filename(b"hello") == "upload.jpg"
+
+
+def test_seekable_input_spools_pipes():
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, PNG)
+    os.close(write_fd)
+    with os.fdopen(read_fd, "rb") as pipe:
+        spool = _cli.seekable_input(pipe, spool_size=10)
+        assert isinstance(spool, tempfile.SpooledTemporaryFile)
+        assert spool.read() == PNG
+    stream = io.BytesIO(PNG)
+    assert _cli.seekable_input(stream) is stream
+
+
+def test_upload_path_is_streamed(tmp_path, uploads):
+    path = tmp_path / "recording.mp4"
+    path.write_bytes(b"data")
+    _cli.handle_upload_command(
+        Namespace(paths=[], img_path=path, img="", name=None, **OUTPUT)
+    )
+    assert uploads == [(path, None)]
+
+
+def test_upload_stdin(monkeypatch, uploads):
+    monkeypatch.setattr(_cli.sys, "stdin", Namespace(buffer=io.BytesIO(PNG)))
+    _cli.handle_upload_command(
+        Namespace(paths=[], img_path=None, img="", name=None, **OUTPUT)
+    )
+    _cli.handle_upload_command(
+        Namespace(paths=[], img_path=None, img="text", name="a.txt", **OUTPUT)
+    )
+    assert uploads == [(PNG, "upload.png"), (b"text", "a.txt")]
+
+
+def make_tree(root):
+    for name in ("a.png", "b.jpg", "sub/c.png", "sub/deep/d.png"):
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(name.encode())
+
+
+def test_expand_paths(tmp_path):
+    make_tree(tmp_path)
+
+    def names(paths):
+        return [p.relative_to(tmp_path).as_posix() for p in paths]
+
+    assert names(_cli_batch.expand_paths([str(tmp_path)])) == ["a.png", "b.jpg"]
+    assert names(_cli_batch.expand_paths([str(tmp_path)], recursive=True)) == [
+        "a.png",
+        "b.jpg",
+        "sub/c.png",
+        "sub/deep/d.png",
+    ]
+    pattern = str(tmp_path / "**" / "*.png")
+    assert names(_cli_batch.expand_paths([pattern, str(tmp_path / "a.png")], True)) == [
+        "a.png",
+        "sub/c.png",
+        "sub/deep/d.png",
+    ]
+    with pytest.raises(_cli.CLIError):
+        list(_cli_batch.expand_paths([str(tmp_path / "*.gif")]))
+
+
+def test_upload_json_output(tmp_path, monkeypatch, uploads, capsys):
+    copied = []
+    monkeypatch.setattr(_cli, "copy_to_clipboard", copied.append)
+    path = tmp_path / "a.png"
+    path.write_bytes(PNG)
+    args = Namespace(paths=[], img_path=path, img="", name=None, json=True)
+    _cli.handle_upload_command(args)
+    assert json.loads(capsys.readouterr().out) == {
+        "url": "u",
+        "del_url": "d",
+        "thumb": "t",
+    }
+    _cli.handle_upload_command(
+        Namespace(**dict(vars(args), json=False, no_clipboard=True))
+    )
+    assert "Upload Details" in capsys.readouterr().out
+    assert copied == []
+
+
+def batch_args(tmp_path, manifest, resume=False):
+    return Namespace(
+        paths=[str(tmp_path / "src")],
+        img_path=None,
+        img="",
+        recursive=True,
+        jobs=2,
+        manifest=str(manifest),
+        resume=resume,
+        json=False,
+    )
+
+
+def test_batch_upload_and_resume(tmp_path, monkeypatch):
+    make_tree(tmp_path / "src")
+    uploaded = []
+    failing = {"c.png"}
+
+    def upload_file(self, name=None, fileobj=None, **kwargs):
+        if name.name in failing:
+            raise OSError("failed")
+        uploaded.append(name.name)
+        return {"url": "u/" + name.name, "del_url": "d", "thumb": "t"}
+
+    monkeypatch.setattr(SXCU, "upload_file", upload_file)
+    manifest = tmp_path / "manifest.jsonl"
+    with pytest.raises(SystemExit):
+        _cli.handle_upload_command(batch_args(tmp_path, manifest))
+    lines = [json.loads(line) for line in manifest.read_text().splitlines()]
+    assert sorted(uploaded) == ["a.png", "b.jpg", "d.png"]
+    assert len(lines) == 4
+    entry = next(line for line in lines if line["path"].endswith("a.png"))
+    assert entry["url"] == "u/a.png" and entry["bytes"] == 5
+    assert next(line for line in lines if "error" in line)["error"] == "failed"
+
+    # simulate an interruption while writing the last line
+    with manifest.open("a") as file:
+        file.write('{"path": ')
+    failing.clear()
+    uploaded.clear()
+    _cli.handle_upload_command(batch_args(tmp_path, manifest, resume=True))
+    assert uploaded == ["c.png"]
+    assert len(_cli_batch.read_manifest(manifest)) == 4
+
+
+def test_mirror_command(tmp_path, monkeypatch, capsys):
+    calls = []
+
+    def mirror_collection(self, collection_id, dest, concurrency, prune):
+        calls.append((collection_id, dest, concurrency, prune))
+        failed = {"b": OSError("failed")} if prune else {}
+        return MirrorReport(collection_id, False, ["a"], 2, [], failed, 10)
+
+    monkeypatch.setattr(SXCU, "mirror_collection", mirror_collection)
+    args = Namespace(collection_id="c", dest=tmp_path, jobs=2, prune=False, json=True)
+    _cli.handle_mirror_command(args)
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["downloaded"] == ["a"] and summary["bytes"] == 10
+    assert calls == [("c", tmp_path, 2, False)]
+    with pytest.raises(SystemExit):
+        _cli.handle_mirror_command(Namespace(**dict(vars(args), prune=True)))
+    assert json.loads(capsys.readouterr().out)["failed"] == {"b": "failed"}
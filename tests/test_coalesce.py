@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+
+import pytest
+import requests
+
+from sxcu.__client__ import RequestClient
+from sxcu.coalesce import AsyncSingleFlight, coalesce_key
+from sxcu.exceptions import SXCUConnectionError
+from sxcu.metrics import MetricsRegistry
+
+URL = "https://sxcu.net/api/collections/abc"
+THREADS = 8
+
+
+def make_client(mock_transport, response):
+    client = None
+
+    def respond(request):
+        # wait until every thread joined the request in flight
+        deadline = time.monotonic() + 5
+        while client.single_flight.saved < THREADS - 1 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        return response
+
+    transport = mock_transport([respond])
+    client = RequestClient(transport=transport, rate_limiter=False, retry=False)
+    return client, transport
+
+
+def run_threads(func):
+    results = [None] * THREADS
+
+    def target(i):
+        try:
+            results[i] = func()
+        except Exception as error:
+            results[i] = error
+
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_threads_share_one_request(mock_transport):
+    client, transport = make_client(mock_transport, (200, {"id": "abc"}, {}))
+    registry = MetricsRegistry()
+    registry.instrument(client)
+    results = run_threads(lambda: client.get(URL))
+    assert len(transport.requests) == 1
+    assert all(res is results[0] for res in results)
+    assert results[0].json() == {"id": "abc"}
+    assert client.single_flight.saved == THREADS - 1
+    labels = {"endpoint": "sxcu.net/api/collections", "method": "GET"}
+    assert registry.coalesced.value(**labels) == THREADS - 1
+    assert registry.requests.value(status=200, **labels) == 1
+
+    # the next request is sent again
+    client.single_flight.saved = THREADS
+    client.get(URL)
+    assert len(transport.requests) == 2
+
+
+def test_errors_are_shared(mock_transport):
+    client, transport = make_client(mock_transport, requests.ConnectionError("reset"))
+    results = run_threads(lambda: client.get(URL))
+    assert len(transport.requests) == 1
+    assert all(isinstance(res, SXCUConnectionError) for res in results)
+
+
+def test_coalesce_key():
+    headers = {"User-Agent": "a"}
+    assert coalesce_key("GET", URL, headers, {}) == coalesce_key(
+        "GET", URL, {"user-agent": "a"}, {"params": None}
+    )
+    assert coalesce_key("GET", URL, headers, {}) != coalesce_key(
+        "GET", URL, {"User-Agent": "a", "If-None-Match": "x"}, {}
+    )
+    assert coalesce_key("POST", URL, headers, {}) is None
+    assert coalesce_key("GET", URL, headers, {"stream": True}) is None
+    hash(coalesce_key("GET", URL, headers, {"params": {"a": [1, 2]}}))
+
+
+def test_disabled(mock_transport):
+    transport = mock_transport([(200, {}, {})])
+    client = RequestClient(transport=transport, rate_limiter=False, coalesce=False)
+    assert client.single_flight is None
+    client.get(URL)
+
+
+def test_async_single_flight():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    async def main():
+        results = await asyncio.gather(*(flight.do(("k",), fetch) for _ in range(5)))
+        assert [r[0] for r in results] == [1] * 5
+        assert sorted(r[1] for r in results) == [False] + [True] * 4
+        assert flight.saved == 4
+
+        # cancelling one waiter doesn't cancel the others
+        first = asyncio.ensure_future(flight.do(("k",), fetch))
+        second = asyncio.ensure_future(flight.do(("k",), fetch))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == (2, True)
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        # cancelling every waiter cancels the request
+        third = asyncio.ensure_future(flight.do(("k",), fetch))
+        await asyncio.sleep(0.01)
+        third.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await third
+        await asyncio.sleep(0)
+        assert not flight._calls
+
+    asyncio.run(main())
@@ -0,0 +1,51 @@
+import pytest
+
+from sxcu import OGProperties, codec
+
+DATA = {"title": "Zürich / 東京", "files": [{"id": "a", "views": 1}], "ok": True}
+
+
+@pytest.fixture(autouse=True)
+def restore_codec(monkeypatch):
+    monkeypatch.setattr(codec, "_codec", None)
+
+
+@pytest.mark.parametrize("name", list(codec.BACKENDS))
+def test_backends_agree(name):
+    if name != "json":
+        pytest.importorskip(name)
+    used = codec.set_codec(name)
+    assert used.name == name
+    encoded = codec.dumps(DATA)
+    assert encoded == '{"title":"Zürich / 東京","files":[{"id":"a","views":1}],"ok":true}'
+    assert codec.loads(encoded) == codec.loads(encoded.encode()) == DATA
+    with pytest.raises(ValueError):
+        codec.loads(b"<html>")
+    og = OGProperties(title="t")
+    assert OGProperties.from_json(og.export()).export() == og.export()
+
+
+def test_selection(monkeypatch):
+    monkeypatch.setenv("SXCU_JSON", "json")
+    assert codec.get_codec().name == "json"
+    monkeypatch.delenv("SXCU_JSON")
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        assert codec.set_codec().name == "json"
+    else:
+        assert codec.set_codec().name == "orjson"
+    with pytest.raises(ValueError):
+        codec.set_codec("yaml")
+
+
+def test_ujson_not_chosen(monkeypatch):
+    def missing():
+        raise ImportError("orjson")
+
+    def ujson():
+        raise AssertionError("ujson is only used when asked for")
+
+    monkeypatch.setitem(codec.BACKENDS, "orjson", missing)
+    monkeypatch.setitem(codec.BACKENDS, "ujson", ujson)
+    assert codec.set_codec().name == "json"
@@ -0,0 +1,111 @@
+import io
+
+import pytest
+
+from sxcu.__client__ import RequestClient
+from sxcu.exceptions import ClientError, SXCUConnectionError
+from sxcu.ratelimit import RateLimiter
+from sxcu.retry import RetryPolicy
+from sxcu.testing import FakeSXCU
+
+DATA = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def fake():
+    with FakeSXCU(seed=1, rate_limits=None) as server:
+        yield server
+
+
+def client(fake, **kwargs):
+    retry = RetryPolicy(max_attempts=2, sleep=lambda delay: None)
+    return fake.client(
+        request_client=RequestClient(retry=retry, rate_limiter=RateLimiter(), **kwargs)
+    )
+
+
+def test_download(fake, tmp_path):
+    sxcu = client(fake)
+    upload = sxcu.upload_file(fileobj=DATA, filename="a.png")
+    file_id = upload.url.rsplit("/", 1)[1]
+    direct = sxcu.file_meta(file_id=file_id).url
+
+    result = sxcu.download(direct, tmp_path)
+    assert result.path == str(tmp_path / f"{file_id}.png")
+    assert (tmp_path / f"{file_id}.png").read_bytes() == DATA
+    assert result.size == result.received == len(DATA) and result.throughput > 0
+
+    # IDs and links to the page are resolved to the direct link.
+    buffer = io.BytesIO()
+    assert sxcu.download(upload.url, fileobj=buffer).url == direct
+    assert buffer.getvalue() == DATA
+    assert sxcu.download(file_id, tmp_path / "b.png").size == len(DATA)
+    assert (tmp_path / "b.png").read_bytes() == DATA
+    assert not list(tmp_path.glob("*.part"))
+
+    with pytest.raises(ValueError):
+        sxcu.download(file_id)
+    with pytest.raises(ClientError):
+        sxcu.download(fake.url + "/missing.png", tmp_path)
+    assert not list(tmp_path.glob("missing*"))
+
+
+def test_resume(fake, tmp_path):
+    sxcu = client(fake)
+    direct = sxcu.file_meta(
+        file_id=sxcu.upload_file(fileobj=DATA, filename="a.png").url.rsplit("/")[-1]
+    ).url
+    target = tmp_path / "a.png"
+    (tmp_path / "a.png.part").write_bytes(DATA[:1000])
+    result = sxcu.download(direct, target)
+    assert (result.resumed_from, result.received) == (1000, len(DATA) - 1000)
+    assert target.read_bytes() == DATA
+
+    # a complete partial file is only renamed.
+    target.rename(tmp_path / "a.png.part")
+    assert sxcu.download(direct, target).received == 0
+    assert target.read_bytes() == DATA
+
+    # a partial file longer than the file belongs to another one.
+    (tmp_path / "a.png.part").write_bytes(DATA + b"more")
+    assert sxcu.download(direct, target).received == len(DATA)
+    assert target.read_bytes() == DATA
+
+
+def test_interrupted_transfer_resumes(fake, tmp_path):
+    sxcu = client(fake)
+    direct = sxcu.file_meta(
+        file_id=sxcu.upload_file(fileobj=DATA, filename="a.png").url.rsplit("/")[-1]
+    ).url
+    # every response is cut off half way, each retry gets further.
+    fake.cut_rate = 1.0
+    buffer = io.BytesIO()
+    result = sxcu.download(direct, fileobj=buffer)
+    assert buffer.getvalue() == DATA and result.received == len(DATA)
+    assert fake.faults["cut"] > 5
+
+    # without retries, the partial file is kept for the next call.
+    sxcu.request_handler.retry_policy = None
+    with pytest.raises(SXCUConnectionError):
+        sxcu.download(direct, tmp_path / "a.png")
+    assert (tmp_path / "a.png.part").stat().st_size == len(DATA) // 2
+    fake.cut_rate = 0.0
+    assert sxcu.download(direct, tmp_path / "a.png").resumed_from == len(DATA) // 2
+    assert (tmp_path / "a.png").read_bytes() == DATA
+
+
+def test_download_many(fake, tmp_path):
+    sxcu = client(fake, pool_maxsize=8)
+    files = {}
+    for i in range(12):
+        data = bytes([i]) * (i + 1) * 1000
+        url = sxcu.upload_file(fileobj=data, filename=f"{i}.png").url
+        files[url.rsplit("/", 1)[1]] = data
+    sources = list(files) + ["missing"]
+    outcomes = list(sxcu.download_many(sources, tmp_path / "out", 8, ordered=True))
+    assert [outcome.item for outcome in outcomes] == sources
+    assert isinstance(outcomes[-1].error, ClientError)
+    for outcome in outcomes[:-1]:
+        assert outcome.ok
+        with open(outcome.result.path, "rb") as file:
+            assert file.read() == files[outcome.item]
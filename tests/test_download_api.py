@@ -0,0 +1,22 @@
+import io
+
+import pytest
+
+from sxcu import SXCU
+
+from .test_api import IMG
+
+
+@pytest.mark.slow
+def test_download_uploaded_file(tmp_path):
+    _t = SXCU()
+    con = _t.upload_file(fileobj=io.BytesIO(IMG), noembed=True)
+    file = io.BytesIO()
+    _t.download(con["url"], fileobj=file)
+    assert IMG == file.getvalue()
+
+    path = tmp_path / "file.png"
+    result = _t.download(con["url"], path)
+    assert path.read_bytes() == IMG
+    assert result.received == len(IMG)
+    assert SXCU.delete_image(con["del_url"]) is True
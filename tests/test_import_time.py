@@ -0,0 +1,57 @@
+import subprocess
+import sys
+
+import pytest
+
+# modules which are only imported once they are needed
+HEAVY_MODULES = ["requests", "urllib3", "asyncio", "aiohttp", "rich", "pyperclip"]
+# seconds, measured with ``python -X importtime``; generous so that slow
+# CI machines don't fail.
+IMPORT_BUDGET = 0.25
+
+CHECK = """
+import sys, {module}
+print(",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def run(code, *options):
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+
+
+@pytest.mark.parametrize("module", ["sxcu", "sxcu._cli"])
+def test_heavy_modules_are_lazy(module):
+    result = run(CHECK.format(module=module, heavy=HEAVY_MODULES))
+    assert result.stdout.strip() == ""
+
+
+def test_cli_logging_is_lazy():
+    # rich is imported once a record or the output is printed
+    code = "import sys, sxcu._cli as c; c.setup_logging(); print('rich' in sys.modules)"
+    assert run(code).stdout.strip() == "False"
+
+
+def test_lazy_attributes():
+    code = "import sxcu, sys; sxcu.AsyncSXCU; print('asyncio' in sys.modules)"
+    assert run(code).stdout.strip() == "True"
+    with pytest.raises(subprocess.CalledProcessError):
+        run("import sxcu; sxcu.Missing")
+
+
+def test_import_time_budget():
+    best = None
+    for _ in range(3):
+        stderr = run("import sxcu._cli", "-X", "importtime").stderr
+        total = 0
+        for line in stderr.splitlines():
+            # ``import time: self | cumulative | name``, top level has no indent
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit() and name.startswith(" sxcu"):
+                total += int(cumulative)
+        best = total if best is None else min(best, total)
+    assert best / 1e6 < IMPORT_BUDGET
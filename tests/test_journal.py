@@ -0,0 +1,130 @@
+import pytest
+
+from sxcu import SXCU
+from sxcu.__client__ import RequestClient
+from sxcu.journal import ExpiryScheduler, UploadJournal
+from sxcu.og_properties import OGProperties
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def journal(tmp_path, clock):
+    return UploadJournal(tmp_path / "journal.sqlite", clock=clock)
+
+
+@pytest.fixture
+def client(mock_transport, journal):
+    counter = iter(range(100))
+
+    def respond(request):
+        if "/files/create" in request.url:
+            file_id = next(counter)
+            return (
+                200,
+                {
+                    "url": f"https://sxcu.net/{file_id}",
+                    "del_url": f"https://sxcu.net/api/files/delete/{file_id}/t",
+                    "thumb": "",
+                },
+                {},
+            )
+        if "/delete/1/" in request.url:
+            return 404, b"", {}
+        if "/delete/2/" in request.url:
+            return 500, b"", {}
+        return 200, b"deleted", {}
+
+    transport = mock_transport([respond])
+    sxcu = SXCU(
+        request_client=RequestClient(
+            transport=transport, rate_limiter=False, retry=False
+        ),
+        journal=journal,
+    )
+    return sxcu, transport
+
+
+def test_journal_queries(journal, clock):
+    for i in range(5):
+        journal.record(
+            {"url": f"u{i}", "del_url": f"d{i}"},
+            size=i * 100,
+            collection="c" if i % 2 else None,
+            options={"noembed": True},
+        )
+        clock.now += 10
+    assert len(journal) == 5
+    assert [e.url for e in journal.query(older_than=25)] == ["u0", "u1", "u2"]
+    assert [e.url for e in journal.query(newer_than=20)] == ["u3", "u4"]
+    assert [e.url for e in journal.query(collection="c")] == ["u1", "u3"]
+    assert [e.url for e in journal.query(min_size=100, max_size=300)] == [
+        "u1",
+        "u2",
+        "u3",
+    ]
+    assert journal.query(limit=1)[0].options == {"noembed": True}
+    assert journal.mark_deleted("d0") == 1
+    assert journal.mark_deleted("d0") == 0
+    assert [e.url for e in journal.query(older_than=25)] == ["u1", "u2"]
+    assert len(journal.query(include_deleted=True)) == 5
+
+    plan = journal._connect().execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM uploads WHERE collection = ?", ("c",)
+    )
+    assert "uploads_collection" in " ".join(str(row) for row in plan)
+
+
+def test_upload_is_recorded(client, journal, tmp_path):
+    sxcu, _ = client
+    path = tmp_path / "a.png"
+    path.write_bytes(b"x" * 123)
+    result = sxcu.upload_file(
+        path, collection="col", og_properties=OGProperties(title="t"), ttl=60
+    )
+    (entry,) = journal.query()
+    assert entry.del_url == result["del_url"]
+    assert entry.size == 123
+    assert entry.filename == "a.png"
+    assert entry.collection == "col"
+    assert entry.options["og_properties"]["title"] == "t"
+    assert entry.expires == entry.created + 60
+    with pytest.raises(ValueError):
+        SXCU().upload_file(path, ttl=60)
+
+
+def test_expiry_scheduler(client, journal, clock):
+    sxcu, transport = client
+    for i in range(5):
+        sxcu.upload_file(fileobj=b"data", ttl=None if i == 4 else 30 + i)
+    scheduler = ExpiryScheduler(sxcu, journal, batch_size=2, concurrency=2)
+    assert scheduler.purge() == []
+
+    clock.now += 100
+    outcomes = scheduler.purge()
+    assert sorted(o.item.split("/")[-2] for o in outcomes) == ["0", "1", "2", "3"]
+    # the file which was already gone is marked as deleted, the failed one
+    # is kept for the next purge.
+    assert [e.url for e in journal.due()] == ["https://sxcu.net/2"]
+    assert len(journal.query()) == 2
+    deletes = [r for r in transport.requests if "/delete/" in r.url]
+    assert len(deletes) == 4
+
+    journal.set_ttl(journal.due()[0].id, None)
+    assert journal.due() == []
+
+    # entries without a delete URL can't be deleted, they are unscheduled.
+    entry_id = journal.record({"url": "https://sxcu.net/x"}, ttl=0)
+    assert scheduler.purge() == [] and journal.due() == []
+    assert journal.get(entry_id).expires is None
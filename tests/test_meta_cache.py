@@ -0,0 +1,147 @@
+import asyncio
+import json
+
+import pytest
+
+from sxcu import SXCU
+from sxcu.__client__ import RequestClient
+from sxcu.exceptions import ClientError
+from sxcu.meta_cache import CacheEntry, DiskBackend, MemoryBackend, MetadataCache
+
+FILE_URL = "https://sxcu.net/api/files/abc"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def server(mock_transport):
+    state = {"views": 0, "etag": '"v1"'}
+
+    def respond(request):
+        if "/files/delete/" in request.url:
+            return 200, {}, {}
+        if request.url.endswith("/missing"):
+            return 404, {"error": "Invalid file ID", "code": 1}, {}
+        if request.headers.get("If-None-Match") == state["etag"]:
+            return 304, b"", {"ETag": state["etag"]}
+        state["views"] += 1
+        body = {"id": "abc", "views": state["views"]}
+        return 200, body, {"ETag": state["etag"]}
+
+    transport = mock_transport([respond])
+    client = RequestClient(transport=transport, rate_limiter=False, retry=False)
+    return client, transport, state
+
+
+def test_fresh_hits_and_conditional_refresh(server):
+    client, transport, state = server
+    clock = Clock()
+    cache = MetadataCache(ttl=60, clock=clock)
+    sxcu = SXCU(request_client=client, meta_cache=cache)
+    assert sxcu.file_meta("abc") == {"id": "abc", "views": 1}
+    assert sxcu.file_meta(file_url="https://sxcu.net/abc")["views"] == 1
+    assert len(transport.requests) == 1
+    assert "If-None-Match" not in transport.requests[0].headers
+
+    clock.now += 61
+    assert sxcu.file_meta("abc")["views"] == 1  # 304 Not Modified
+    assert transport.requests[-1].headers["If-None-Match"] == '"v1"'
+    assert transport.requests[-1].headers["User-Agent"].startswith("PySXCU")
+
+    clock.now += 61
+    state["etag"] = '"v2"'
+    assert sxcu.file_meta("abc")["views"] == 2
+    assert cache.stats() == (1, 0, 3, 1, 0)
+
+    with pytest.raises(ClientError):
+        sxcu.file_meta("missing")
+    assert len(cache.backend) == 1
+
+
+def test_stale_while_revalidate(server):
+    client, transport, state = server
+    clock = Clock()
+    cache = MetadataCache(ttl=10, stale_ttl=100, clock=clock)
+    sxcu = SXCU(request_client=client, meta_cache=cache)
+    sxcu.collection_meta("abc")
+    clock.now += 20
+    state["etag"] = '"v2"'
+    assert sxcu.collection_meta("abc")["views"] == 1  # stale value
+    cache.close()
+    assert cache.stats().stale_hits == 1
+    assert sxcu.collection_meta("abc")["views"] == 2  # refreshed
+    assert len(transport.requests) == 2
+    clock.now += 1000
+    sxcu.collection_meta("abc")
+    assert cache.stats().misses == 2
+
+
+def test_class_cache_and_invalidation(server, monkeypatch):
+    client, transport, _ = server
+    monkeypatch.setattr(SXCU, "meta_cache", MetadataCache())
+    monkeypatch.setattr(SXCU, "_shared", SXCU(request_client=client))
+    SXCU.file_meta("abc")
+    SXCU.file_meta("abc")
+    assert len(transport.requests) == 1
+    assert SXCU.delete_image("https://sxcu.net/api/files/delete/abc/token")
+    assert SXCU.file_meta("abc")["views"] == 2
+    SXCU.meta_cache.invalidate(FILE_URL)
+    assert SXCU.file_meta("abc")["views"] == 3
+    # other URLs don't name the file, nothing is evicted.
+    SXCU.delete_image("https://sxcu.net/other/token/")
+    assert SXCU.file_meta("abc")["views"] == 3
+
+
+def test_backends(tmp_path):
+    memory = MemoryBackend(maxsize=2)
+    for key in "abc":
+        memory.set(key, CacheEntry(key, None, None, 0))
+    assert memory.get("a") is None and len(memory) == 2
+    memory.get("b")
+    memory.set("d", CacheEntry("d", None, None, 0))
+    assert memory.get("c") is None and memory.get("b").value == "b"
+
+    path = tmp_path / "meta.sqlite"
+    DiskBackend(path).set(FILE_URL, CacheEntry({"id": "abc"}, '"e"', None, 5.0))
+    entry = DiskBackend(path).get(FILE_URL)
+    assert entry.value == {"id": "abc"} and entry.etag == '"e"'
+    assert entry.validators() == {"If-None-Match": '"e"'}
+
+
+class Response:
+    def __init__(self, status_code, body, headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+        self.text = ""
+        self.content = json.dumps(body).encode()
+
+    def json(self):
+        return self.body
+
+
+def test_async_get():
+    clock = Clock()
+    cache = MetadataCache(ttl=10, stale_ttl=100, clock=clock)
+    calls = []
+
+    async def fetch(validators):
+        calls.append(validators)
+        return Response(200, {"n": len(calls)}, {"Last-Modified": "yesterday"})
+
+    async def main():
+        assert await cache.aget("key", fetch) == {"n": 1}
+        assert await cache.aget("key", fetch) == {"n": 1}
+        clock.now += 20
+        assert await cache.aget("key", fetch) == {"n": 1}
+        await asyncio.sleep(0)
+        assert await cache.aget("key", fetch) == {"n": 2}
+
+    asyncio.run(main())
+    assert calls == [{}, {"If-Modified-Since": "yesterday"}]
@@ -0,0 +1,97 @@
+import pytest
+import requests
+
+from sxcu.__client__ import RequestClient
+from sxcu.metrics import Histogram, MetricsRegistry
+from sxcu.retry import RetryPolicy
+
+URL = "https://sxcu.net/api/files/create"
+
+
+def make_client(transport):
+    policy = RetryPolicy(jitter=False, sleep=lambda delay: None)
+    return RequestClient(transport=transport, rate_limiter=False, retry=policy)
+
+
+def test_hooks_receive_events(mock_transport):
+    client = make_client(mock_transport([(503, b"", {}), (200, {}, {})]))
+    events = []
+    for name in ("request_start", "retry", "request_end"):
+        client.hooks.add(name, lambda e, name=name: events.append((name, e.attempt)))
+    client.post(URL, data={"a": "b"})
+    assert events == [("request_start", 1), ("retry", 1), ("request_end", 2)]
+
+
+def test_hook_errors_are_logged(mock_transport, caplog):
+    client = make_client(mock_transport([(200, {}, {})]))
+
+    def broken(event):
+        raise RuntimeError("oops")
+
+    client.hooks.add("request_end", broken)
+    assert client.get(URL).status_code == 200
+    assert "oops" in caplog.text
+    client.hooks.remove("request_end", broken)
+    assert not client.hooks
+    with pytest.raises(ValueError):
+        client.hooks.add("unknown", broken)
+
+
+def test_registry_records_requests(mock_transport):
+    client = make_client(mock_transport([(503, b"", {}), (200, {}, {}), (404, {}, {})]))
+    registry = MetricsRegistry()
+    registry.instrument(client)
+    client.post(URL, data={"a": "bcd"})
+    client.get("https://sxcu.net/api/files/abc")
+
+    labels = {"endpoint": "sxcu.net/api/files", "method": "POST", "status": 200}
+    assert registry.requests.value(**labels) == 1
+    assert registry.latency.count(**labels) == 1
+    assert registry.retries.value(endpoint="sxcu.net/api/files", reason=503) == 1
+    assert registry.bytes_sent.value(endpoint="sxcu.net/api/files") == 5
+    assert (
+        registry.requests.value(endpoint="sxcu.net/api/files", method="GET", status=404)
+        == 1
+    )
+
+    text = registry.render_prometheus()
+    assert "# TYPE sxcu_requests_total counter" in text
+    assert (
+        'sxcu_requests_total{endpoint="sxcu.net/api/files",method="POST",status="200"} 1'
+        in text
+    )
+    assert "# TYPE sxcu_request_duration_seconds histogram" in text
+    assert 'le="+Inf"} 1' in text
+
+
+def test_retry_reasons(mock_transport):
+    transport = mock_transport(
+        [requests.ConnectionError("reset"), (503, b"", {}), (200, {}, {})]
+    )
+    client = make_client(transport)
+    registry = MetricsRegistry()
+    registry.instrument(client)
+    client.post(URL, data={"a": "b"})
+    endpoint = "sxcu.net/api/files"
+    assert registry.retries.value(endpoint=endpoint, reason="ConnectionError") == 1
+    assert registry.retries.value(endpoint=endpoint, reason=503) == 1
+
+
+def test_histogram_buckets():
+    histogram = Histogram("latency", "help", ("op",), buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 5):
+        histogram.observe(value, op="x")
+    lines = histogram.render().splitlines()
+    assert lines[2:] == [
+        'latency_bucket{op="x",le="0.1"} 2',
+        'latency_bucket{op="x",le="1"} 3',
+        'latency_bucket{op="x",le="+Inf"} 4',
+        'latency_sum{op="x"} 5.65',
+        'latency_count{op="x"} 4',
+    ]
+
+
+def test_duplicate_metric():
+    registry = MetricsRegistry()
+    with pytest.raises(ValueError):
+        registry.counter("requests_total", "again")
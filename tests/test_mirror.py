@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from sxcu.mirror import MANIFEST_NAME
+from sxcu.testing import FakeSXCU
+
+
+@pytest.fixture
+def fake():
+    with FakeSXCU(seed=1, rate_limits=None) as server:
+        yield server
+
+
+def upload(client, collection_id, data, filename="a.png"):
+    return client.upload_file(fileobj=data, filename=filename, collection=collection_id)
+
+
+def test_mirror_is_incremental(fake, tmp_path):
+    client = fake.client()
+    collection_id = client.create_collection("c").collection_id
+    ids = [
+        upload(client, collection_id, bytes([i]) * (i + 1)).url.rsplit("/", 1)[1]
+        for i in range(3)
+    ]
+
+    report = client.mirror_collection(collection_id, tmp_path)
+    assert report.ok and sorted(report.downloaded) == sorted(ids)
+    assert report.bytes == 6 and report.unchanged == 0
+    for i, file_id in enumerate(ids):
+        assert (tmp_path / f"{file_id}.png").read_bytes() == bytes([i]) * (i + 1)
+    manifest = json.loads((tmp_path / MANIFEST_NAME).read_text())
+    assert manifest["files"][ids[0]]["size"] == 1
+    assert not [path for path in tmp_path.iterdir() if path.suffix == ".part"]
+
+    # a run without changes costs a single metadata request.
+    before = sum(fake.requests.values())
+    report = client.mirror_collection(collection_id, tmp_path)
+    assert report.downloaded == [] and report.unchanged == 3
+    report = client.mirror_collection(collection_id, tmp_path)
+    assert report.not_modified and report.unchanged == 3
+    assert sum(fake.requests.values()) - before == 2
+
+    # only new, changed and missing files are downloaded.
+    new_id = upload(client, collection_id, b"new").url.rsplit("/", 1)[1]
+    fake.files[ids[1]]["data"] = b"changed"
+    (tmp_path / f"{ids[2]}.png").unlink()
+    report = client.mirror_collection(collection_id, tmp_path)
+    assert sorted(report.downloaded) == sorted([new_id, ids[1], ids[2]])
+    assert (tmp_path / f"{ids[1]}.png").read_bytes() == b"changed"
+
+    del fake.files[ids[0]]
+    report = client.mirror_collection(collection_id, tmp_path, prune=True)
+    assert report.removed == [ids[0]]
+    assert not (tmp_path / f"{ids[0]}.png").exists()
+
+    with pytest.raises(ValueError):
+        client.mirror_collection("other", tmp_path)
+
+
+def test_mirror_failures(fake, tmp_path):
+    client = fake.client()
+    collection_id = client.create_collection("c").collection_id
+    file_id = upload(client, collection_id, b"data").url.rsplit("/", 1)[1]
+    # listed with a URL which the server doesn't serve.
+    fake.files[file_id]["extension"] = ".not-found"
+    report = client.mirror_collection(collection_id, tmp_path)
+    assert not report.ok and report.failed[file_id].status_code == 404
+    assert [path.name for path in tmp_path.iterdir()] == [MANIFEST_NAME]
+    assert "etag" not in json.loads((tmp_path / MANIFEST_NAME).read_text())
+
+    fake.files[file_id]["extension"] = ".png"
+    report = client.mirror_collection(collection_id, tmp_path)
+    assert report.ok and report.downloaded == [file_id]
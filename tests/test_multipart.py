@@ -0,0 +1,174 @@
+import email.parser
+import io
+import os
+import threading
+import tracemalloc
+
+import pytest
+
+from sxcu import SXCU
+from sxcu.__client__ import RequestClient
+from sxcu.multipart import MultipartEncoder
+from sxcu.retry import RetryPolicy
+
+CONTENT = os.urandom(200_000)
+
+
+def parse(body, content_type):
+    message = email.parser.BytesParser().parsebytes(
+        b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body
+    )
+    return {
+        part.get_param("name", header="content-disposition"): part
+        for part in message.get_payload()
+    }
+
+
+def read_all(encoder, size=8192):
+    chunks = []
+    while True:
+        chunk = encoder.read(size)
+        if not chunk:
+            return b"".join(chunks)
+        assert len(chunk) <= size
+        chunks.append(chunk)
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        lambda path: path,
+        lambda path: open(path, "rb"),
+        lambda path: CONTENT,
+        lambda path: memoryview(CONTENT),
+        lambda path: (CONTENT[i : i + 1000] for i in range(0, len(CONTENT), 1000)),
+    ],
+    ids=["path", "fileobj", "bytes", "memoryview", "iterable"],
+)
+def test_encoder_sources(tmp_path, source):
+    path = tmp_path / "image.png"
+    path.write_bytes(CONTENT)
+    encoder = MultipartEncoder(
+        {"token": "abc", "noembed": ""}, "file", source(path), "image.png"
+    )
+    body = read_all(encoder)
+    if encoder.len is not None:
+        assert len(body) == encoder.len
+    parts = parse(body, encoder.content_type)
+    assert parts["token"].get_payload() == "abc"
+    assert parts["noembed"].get_payload() == ""
+    assert parts["file"].get_filename() == "image.png"
+    assert parts["file"].get_content_type() == "image/png"
+    assert parts["file"].get_payload(decode=True) == CONTENT
+
+
+def test_encoder_filename_defaults(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"")
+    assert MultipartEncoder({}, "file", path).filename == "clip.mp4"
+    with open(path, "rb") as fileobj:
+        assert MultipartEncoder({}, "file", fileobj).filename == "clip.mp4"
+    assert MultipartEncoder({}, "file", b"data").filename == "file"
+    encoder = MultipartEncoder({}, "file", path)
+    assert parse(encoder.read(), encoder.content_type)["file"].get_payload() == ""
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="needs named pipes")
+def test_encoder_named_pipe(tmp_path):
+    path = tmp_path / "fifo"
+    os.mkfifo(path)
+    encoder = MultipartEncoder({}, "file", path, "image.png")
+    assert encoder.len is None and not encoder.seekable()
+
+    def write():
+        with open(path, "wb") as fifo:
+            fifo.write(CONTENT)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    body = read_all(encoder)
+    writer.join()
+    parts = parse(body, encoder.content_type)
+    assert parts["file"].get_payload(decode=True) == CONTENT
+
+
+def test_encoder_progress_and_rewind():
+    progress = []
+    encoder = MultipartEncoder(
+        {"token": "abc"}, "file", CONTENT, chunk_size=50_000, progress=progress.append
+    )
+    first = read_all(encoder, 16384)
+    sent = [p.bytes_sent for p in progress]
+    assert sent == sorted(sent) and sent[-1] == encoder.len
+    assert all(p.total == encoder.len for p in progress)
+    assert encoder.seekable()
+    assert encoder.seek(0) == 0 and encoder.tell() == 0
+    assert read_all(encoder) == first
+    assert len(encoder) == 0
+
+    chunked = MultipartEncoder({}, "file", iter([b"a", b"b"]))
+    assert chunked.len is None and not chunked.seekable()
+    with pytest.raises(TypeError):
+        len(chunked)
+    with pytest.raises(io.UnsupportedOperation):
+        chunked.seek(0)
+
+
+def test_encoder_constant_memory(tmp_path):
+    path = tmp_path / "video.mp4"
+    with open(path, "wb") as fileobj:
+        for _ in range(32):
+            fileobj.write(os.urandom(1024 * 1024))
+    encoder = MultipartEncoder({}, "file", path)
+    tracemalloc.start()
+    try:
+        while encoder.read(16384):
+            pass
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert encoder.tell() == encoder.len
+    assert peak < 1024 * 1024
+
+
+def test_upload_file_streams_and_retries(mock_transport):
+    bodies = []
+
+    def reply(status):
+        def respond(request):
+            bodies.append((read_all(request.body), request.headers))
+            return status, {"url": "https://sxcu.net/abc"}, {}
+
+        return respond
+
+    transport = mock_transport([reply(503), reply(200)])
+    client = RequestClient(
+        transport=transport,
+        rate_limiter=False,
+        retry=RetryPolicy(jitter=False, sleep=lambda _: None),
+    )
+    progress = []
+    res = SXCU(request_client=client).upload_file(
+        fileobj=io.BytesIO(CONTENT), filename="a.bin", progress=progress.append
+    )
+    assert res == {"url": "https://sxcu.net/abc"}
+    assert len(bodies) == 2
+    for body, headers in bodies:
+        assert int(headers["Content-Length"]) == len(body)
+        assert headers["User-Agent"].startswith("PySXCU")
+        parts = parse(body, headers["Content-Type"])
+        assert parts["file"].get_filename() == "a.bin"
+        assert parts["file"].get_payload(decode=True) == CONTENT
+    assert progress[-1].bytes_sent == len(bodies[0][0])
+
+
+def test_upload_file_iterable_is_chunked(mock_transport):
+    seen = []
+
+    def respond(request):
+        seen.append(request.headers.get("Transfer-Encoding"))
+        return 200, {"url": "https://sxcu.net/abc"}, {}
+
+    client = RequestClient(transport=mock_transport([respond]), rate_limiter=False)
+    SXCU(request_client=client).upload_file(fileobj=iter([b"abc"]))
+    assert seen == ["chunked"]
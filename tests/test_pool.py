@@ -0,0 +1,133 @@
+import collections
+
+import pytest
+
+from sxcu import SXCU, UploadProfile
+from sxcu.__client__ import RequestClient
+from sxcu.exceptions import ServerError
+from sxcu.pool import SXCUPool
+from sxcu.ratelimit import RateLimiter
+from sxcu.testing import FakeSXCU
+
+
+def upload_response(request):
+    return 200, {"url": request.url, "del_url": "d", "thumb": "t"}, {}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def mock_client(transport, subdomain, **kwargs):
+    return SXCU(
+        subdomain=subdomain,
+        request_client=RequestClient(
+            transport=transport, rate_limiter=RateLimiter(), retry=False, **kwargs
+        ),
+    )
+
+
+def test_weighted_distribution(mock_transport):
+    transport = mock_transport([upload_response] * 8)
+    pool = SXCUPool(
+        [
+            (mock_client(transport, "https://a.b"), 3),
+            mock_client(transport, "https://c.d"),
+        ]
+    )
+    results = [pool.upload_file(fileobj=b"x") for _ in range(8)]
+    hosts = collections.Counter(result.url.split("/")[2] for result in results)
+    assert hosts == {"a.b": 6, "c.d": 2}
+    # smooth round-robin interleaves the members.
+    assert [r.url.split("/")[2] for r in results[:4]] == ["a.b", "a.b", "c.d", "a.b"]
+    assert [m.uploads for m in pool.members] == [6, 2]
+    assert all(m.latency is not None and m.in_flight == 0 for m in pool.members)
+    with pytest.raises(ValueError):
+        pool.upload_file(fileobj=b"x", profile=UploadProfile(token="t"))
+    with pytest.raises(ValueError):
+        SXCUPool([], strategy="weighted")
+    with pytest.raises(ValueError):
+        SXCUPool([SXCU()], strategy="random")
+
+
+def test_budget(mock_transport):
+    headers = {
+        "X-RateLimit-Bucket": "upload",
+        "X-RateLimit-Limit": "5",
+        "X-RateLimit-Remaining": "0",
+        "X-RateLimit-Reset-After": "10",
+    }
+    transport = mock_transport(
+        [lambda request: (200, {"url": request.url}, headers)] * 4
+    )
+    first = mock_client(transport, "https://a.b")
+    second = mock_client(transport, "https://c.d")
+    for strategy in ("weighted", "least_loaded"):
+        pool = SXCUPool([first, second], strategy=strategy)
+        assert pool.members[0].budget_wait() == 0
+        first.upload_file(fileobj=b"x")
+        status = first.request_handler.rate_limiter.route_status(
+            "POST", "https://a.b/api/files/create"
+        )
+        assert status.remaining == 0 and status.bucket == "upload"
+        assert pool.members[0].budget_wait() > 0
+        # the member without budget is skipped.
+        assert pool.upload_file(fileobj=b"x").url.startswith("https://c.d")
+        first.request_handler.rate_limiter = RateLimiter()
+        second.request_handler.rate_limiter = RateLimiter()
+
+
+def test_ejection_and_probe():
+    clock = Clock()
+    with FakeSXCU(seed=1, rate_limits=None) as good, FakeSXCU(
+        seed=2, errors={503: 1.0}, rate_limits=None
+    ) as bad:
+        members = [
+            fake.client(
+                request_client=RequestClient(retry=False, rate_limiter=RateLimiter())
+            )
+            for fake in (bad, good)
+        ]
+        pool = SXCUPool(members, max_failures=2, eject_time=10, clock=clock)
+        bad_member, good_member = pool.members
+        for _ in range(6):
+            result = pool.upload_file(fileobj=b"data")
+            assert result.url.startswith(good.url)
+        assert bad_member.failures == 2 and not bad_member.healthy
+        assert good_member.uploads == 6
+        assert bad.requests["POST upload_file"] == 2
+
+        # once the ejection is over, a single upload probes the member.
+        clock.now = 11
+        pool.upload_file(fileobj=b"data")
+        assert bad.requests["POST upload_file"] == 3
+        assert bad_member.ejected_until == 11 + 20
+        pool.upload_file(fileobj=b"data")
+        assert bad.requests["POST upload_file"] == 3
+
+        bad.errors.clear()
+        clock.now = 32
+        assert pool.upload_file(fileobj=b"data").url.startswith(bad.url)
+        assert bad_member.healthy and bad_member.ejections == 0
+
+        # errors which say nothing about the member don't end an ejection.
+        bad_member.ejected_until, bad_member.ejections = 40, 2
+        clock.now = 41
+        assert pool.acquire() is bad_member
+        pool.release(bad_member, 0.1, KeyboardInterrupt())
+        assert bad_member.ejections == 2 and not bad_member.healthy
+        assert bad_member.in_flight == 0 and not bad_member.probing
+        assert pool.acquire() is bad_member
+        pool.release(bad_member, 0.1)
+        assert bad_member.healthy and bad_member.ejections == 0
+
+        # without failover, the error of the member is raised.
+        bad.errors[503] = 1.0
+        pool.failover = False
+        with pytest.raises(ServerError):
+            for _ in range(2):
+                pool.upload_file(fileobj=b"data")
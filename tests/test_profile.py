@@ -0,0 +1,105 @@
+import asyncio
+import pickle
+
+import pytest
+
+from sxcu import SXCU, OGProperties, UploadProfile
+from sxcu.__client__ import RequestClient
+from sxcu.multipart import MultipartEncoder
+from sxcu.testing import FakeSXCU
+
+UPLOAD = {"url": "https://sxcu.net/a", "del_url": "d", "thumb": "t"}
+
+
+def test_og_properties_immutable():
+    og = OGProperties(title="t", color="#fff")
+    with pytest.raises(AttributeError):
+        og.title = "x"
+    assert og == OGProperties(title="t", color="#fff")
+    assert len({og, OGProperties(title="t", color="#fff")}) == 1
+    assert og.export() is og.export()
+    changed = og.replace(title="x")
+    assert (changed.title, changed.color, og.title) == ("x", "#fff", "t")
+    assert pickle.loads(pickle.dumps(og)) == og
+
+
+def test_profile():
+    og = OGProperties(title="t")
+    profile = UploadProfile(
+        "token",
+        "col",
+        "secret",
+        noembed=True,
+        og_properties=og,
+        subdomain="https://a.b",
+    )
+    assert profile.fields == {
+        "token": "token",
+        "collection": "col",
+        "collection_token": "secret",
+        "noembed": "",
+        "og_properties": og.export(),
+    }
+    assert profile.url == "https://a.b/api/files/create"
+    assert len(profile.prepared.parts) == 5
+    # every body gets its own boundary.
+    first, second = (MultipartEncoder(profile.prepared, "file", b"") for _ in "ab")
+    assert first.boundary != second.boundary
+    assert first.read().count(first.boundary.encode()) == 7
+    assert profile == profile.replace() and hash(profile) == hash(profile.replace())
+    assert profile.replace(noembed=False).fields.keys() == {
+        "token",
+        "collection",
+        "collection_token",
+        "og_properties",
+    }
+    assert "secret" not in repr(profile)
+    assert pickle.loads(pickle.dumps(profile)) == profile
+    with pytest.raises(AttributeError):
+        profile.collection = "x"
+    # sent without a collection like before profiles, the server ignores it.
+    assert "collection_token" in UploadProfile(collection_token="secret").fields
+    with pytest.raises(TypeError):
+        UploadProfile(og_properties={"title": "t"})
+
+
+def test_upload_with_profile(mock_transport):
+    transport = mock_transport([(200, UPLOAD, {})])
+    sxcu = SXCU(
+        upload_token="token",
+        subdomain="https://a.b",
+        request_client=RequestClient(transport=transport, rate_limiter=False),
+    )
+    profile = UploadProfile(collection="col", noembed=True)
+    sxcu.upload_file(fileobj=b"x", profile=profile)
+    outcomes = list(sxcu.upload_many([b"y", b"z"], profile=profile))
+    assert all(outcome.ok for outcome in outcomes)
+    for request in transport.requests:
+        assert request.url == "https://a.b/api/files/create"
+        assert request.body.fields == {
+            "token": "token",
+            "collection": "col",
+            "noembed": "",
+        }
+    # the same options resolve to the same profile.
+    first = sxcu._upload_profile(None, "col", None, True, None, False)
+    assert sxcu._upload_profile(None, "col", None, True, None, False) is first
+    assert sxcu._upload_profile(profile, None, None, False, None, False) == first
+    with pytest.raises(ValueError):
+        sxcu.upload_file(fileobj=b"x", profile=profile, collection="other")
+
+
+def test_async_upload_with_profile():
+    from sxcu import AsyncSXCU
+
+    with FakeSXCU(seed=1) as fake:
+        collection = fake.client().create_collection("c")
+        profile = UploadProfile(collection=collection.collection_id)
+
+        async def main():
+            async with fake.client(AsyncSXCU) as sxcu:
+                return await sxcu.upload_file(fileobj=b"data", profile=profile)
+
+        result = asyncio.run(main())
+        file_id = result.url.rsplit("/", 1)[1]
+        assert fake.files[file_id]["collection"] == collection.collection_id
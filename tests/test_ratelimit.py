@@ -0,0 +1,112 @@
+import pytest
+
+from sxcu.__client__ import RequestClient
+from sxcu.exceptions import RateLimitExceeded
+from sxcu.ratelimit import RateLimiter, route_key
+
+UPLOAD_URL = "https://sxcu.net/api/files/create"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def headers(remaining, reset_after=10, bucket="upload", limit=3):
+    return {
+        "X-RateLimit-Bucket": bucket,
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset-After": str(reset_after),
+    }
+
+
+def test_route_key():
+    assert (
+        route_key("get", "https://sxcu.net/api/files/abc") == "GET sxcu.net/api/files"
+    )
+    assert route_key("POST", UPLOAD_URL) == "POST sxcu.net/api/files"
+    assert route_key("GET", "https://sxcu.net/d/abc/token") == "GET sxcu.net/d"
+
+
+def test_reserve_waits_until_reset():
+    clock = FakeClock()
+    limiter = RateLimiter(clock=clock)
+    assert limiter.reserve("POST", UPLOAD_URL) == 0
+    limiter.update("POST", UPLOAD_URL, headers(1))
+    assert limiter.reserve("POST", UPLOAD_URL) == 0
+    assert limiter.reserve("POST", UPLOAD_URL) == pytest.approx(10)
+    clock.now += 4
+    assert limiter.reserve("POST", UPLOAD_URL) == pytest.approx(6)
+    # other buckets aren't affected
+    assert limiter.reserve("GET", "https://sxcu.net/api/files/abc") == 0
+    clock.now += 6
+    assert limiter.reserve("POST", UPLOAD_URL) == 0
+    assert limiter.status()["upload"].remaining == 2
+
+
+def test_in_flight_requests_are_not_given_back():
+    clock = FakeClock()
+    limiter = RateLimiter(clock=clock)
+    limiter.update("POST", UPLOAD_URL, headers(2))
+    limiter.reserve("POST", UPLOAD_URL)
+    limiter.reserve("POST", UPLOAD_URL)
+    # a late response from before the last two requests
+    limiter.update("POST", UPLOAD_URL, headers(2))
+    assert limiter.status()["upload"].remaining == 0
+
+
+def test_fail_fast_and_max_wait():
+    limiter = RateLimiter(fail_fast=True, clock=FakeClock())
+    limiter.update("POST", UPLOAD_URL, headers(0))
+    with pytest.raises(RateLimitExceeded) as e:
+        limiter.reserve("POST", UPLOAD_URL)
+    assert e.value.bucket == "upload"
+    assert e.value.retry_after == pytest.approx(10)
+
+    limiter = RateLimiter(max_wait=5, clock=FakeClock())
+    limiter.update("POST", UPLOAD_URL, headers(0))
+    with pytest.raises(RateLimitExceeded):
+        limiter.reserve("POST", UPLOAD_URL)
+
+
+def test_global_bucket():
+    limiter = RateLimiter(clock=FakeClock())
+    global_headers = headers(0, bucket="global")
+    global_headers["X-RateLimit-Global"] = "true"
+    limiter.update("POST", UPLOAD_URL, global_headers)
+    assert limiter.reserve("GET", "https://sxcu.net/api/subdomains") > 0
+
+
+def test_client_updates_and_waits(mock_transport):
+    clock = FakeClock()
+    sleeps = []
+
+    def sleep(delay):
+        sleeps.append(delay)
+        clock.now += delay
+
+    transport = mock_transport([(200, {}, headers(0, reset_after=0.5))])
+    limiter = RateLimiter(clock=clock, sleep=sleep)
+    client = RequestClient(transport=transport, rate_limiter=limiter)
+    client.post(UPLOAD_URL)
+    assert client.rate_limits()["upload"].remaining == 0
+    client.post(UPLOAD_URL)
+    assert sleeps == [pytest.approx(0.5)]
+    assert len(transport.requests) == 2
+
+
+def test_invalid_headers_are_ignored():
+    limiter = RateLimiter(clock=FakeClock())
+    limiter.update("POST", UPLOAD_URL, headers("none"))
+    limiter.update("POST", UPLOAD_URL, headers(1, limit="1.5"))
+    assert limiter.status() == {}
+
+
+def test_client_without_rate_limiter():
+    assert RequestClient(rate_limiter=False).rate_limits() == {}
+    # every client has its own limiter by default.
+    assert RequestClient().rate_limiter is not RequestClient().rate_limiter
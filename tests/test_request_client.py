@@ -1,3 +1,5 @@
+import os
+
 import requests
 
 from sxcu.__client__ import RequestClient
@@ -11,6 +13,10 @@ class MockResponse:
     def headers(self):
         return {}
 
+    @property
+    def status_code(self):
+        return 200
+
 def test_headers(monkeypatch) -> None:
     headers = {"User-Agent": "python-sxcu"}
     def mock_get(*args, **kwargs):
@@ -18,6 +24,42 @@ def test_headers(monkeypatch) -> None:
         assert 'headers' in kwargs
         assert kwargs['headers'] == headers
         return MockResponse()
-    monkeypatch.setattr(requests, "get", mock_get)
-    client=RequestClient(headers=headers)
+    monkeypatch.setattr(requests.Session, "request", mock_get)
+    client = RequestClient(headers=headers)
     client.get("https://dummy_url")
+
+
+def test_session_is_reused() -> None:
+    client = RequestClient()
+    session = client.session
+    assert client.session is session
+    client.close()
+    assert client.session is not session
+
+
+def test_context_manager_closes_session() -> None:
+    with RequestClient() as client:
+        session = client.session
+    assert client._session is None
+    assert client.session is not session
+
+
+def test_new_session_after_fork(monkeypatch) -> None:
+    client = RequestClient()
+    session = client.session
+    monkeypatch.setattr(os, "getpid", lambda: -1)
+    assert client.session is not session
+
+
+def test_pool_size_is_configurable() -> None:
+    client = RequestClient(pool_connections=3, pool_maxsize=42)
+    adapter = client.session.get_adapter("https://sxcu.net")
+    assert adapter._pool_connections == 3
+    assert adapter._pool_maxsize == 42
+
+
+def test_custom_transport_is_mounted() -> None:
+    transport = requests.adapters.HTTPAdapter()
+    client = RequestClient(transport=transport)
+    assert client.session.get_adapter("https://sxcu.net") is transport
+    assert client.session.get_adapter("http://localhost") is transport
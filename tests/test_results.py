@@ -0,0 +1,76 @@
+import json
+import pickle
+
+import pytest
+
+from sxcu import SXCU, codec
+from sxcu.__client__ import RequestClient
+from sxcu.results import CollectionMeta, FileMeta, LinkResult, UploadResult
+
+UPLOAD = {"url": "https://sxcu.net/a", "del_url": "d", "thumb": "t", "extra": 1}
+
+
+def test_decoded_when_built():
+    result = UploadResult(json.dumps(UPLOAD).encode())
+    assert dict.copy(result) == UPLOAD
+    assert result.url == "https://sxcu.net/a"
+    assert json.dumps(UploadResult(json.dumps(UPLOAD))) == json.dumps(UPLOAD)
+
+
+@pytest.mark.parametrize("name", ["json", "orjson", "ujson"])
+def test_encoded_by_every_codec(name, monkeypatch):
+    monkeypatch.setattr(codec, "_codec", None)
+    try:
+        codec.set_codec(name)
+    except ImportError:
+        pytest.skip(f"{name} isn't installed")
+    encoded = codec.dumps(UploadResult(json.dumps(UPLOAD)))
+    assert json.loads(encoded) == UPLOAD
+
+
+def test_dict_compatible():
+    result = UploadResult(UPLOAD)
+    assert isinstance(result, dict)
+    assert result == UPLOAD
+    assert list(result) == list(UPLOAD)
+    assert "thumb" in result and "nope" not in result
+    assert result.get("nope") is None
+    assert result.to_dict() == UPLOAD
+    assert repr(result) == f"UploadResult({UPLOAD!r})"
+    with pytest.raises(KeyError):
+        LinkResult({"url": "u"})["del_url"]
+    # missing fields are None as attributes, but not keys.
+    assert LinkResult({"url": "u"}).del_url is None
+    with pytest.raises(AttributeError):
+        result.nope
+    with pytest.raises(AttributeError):
+        result.url = "x"
+    with pytest.raises(TypeError):
+        FileMeta(b"[]").id
+    assert pickle.loads(pickle.dumps(result)) == UPLOAD
+    assert not hasattr(result, "__dict__")
+
+    # like the dictionaries of older versions, the items can be changed.
+    changed = UploadResult(json.dumps(UPLOAD))
+    changed["url"] = "x"
+    assert changed.url == "x" and changed["thumb"] == "t"
+
+
+def test_client_returns_results(mock_transport):
+    transport = mock_transport(
+        [
+            (200, UPLOAD, {}),
+            (200, {"url": "u", "del_url": ""}, {}),
+            (200, {"collection_id": "c", "title": "t", "files": []}, {}),
+            (200, {"id": "a", "size": 3, "og_properties": {"title": "x"}}, {}),
+        ]
+    )
+    sxcu = SXCU(request_client=RequestClient(transport=transport, rate_limiter=False))
+    assert isinstance(sxcu.upload_file(fileobj=b"x"), UploadResult)
+    assert isinstance(sxcu.create_link("https://example.com"), LinkResult)
+    collection = sxcu.create_collection("t")
+    assert isinstance(collection, CollectionMeta)
+    assert collection.files == []
+    meta = sxcu.file_meta("a")
+    assert meta.size == 3
+    assert meta.og_properties["title"] == "x"
@@ -0,0 +1,136 @@
+import io
+
+import pytest
+import requests
+
+from sxcu._utils import check_response
+from sxcu.__client__ import RequestClient
+from sxcu.exceptions import (
+    ClientError,
+    RateLimitError,
+    ServerError,
+    SXCUConnectionError,
+    SXCUError,
+)
+from sxcu.retry import RetryPolicy, RewindableBody
+
+URL = "https://sxcu.net/api/files/create"
+
+
+def make_client(transport, **kwargs):
+    sleeps = []
+    policy = RetryPolicy(jitter=False, sleep=sleeps.append, **kwargs)
+    client = RequestClient(transport=transport, rate_limiter=False, retry=policy)
+    return client, sleeps
+
+
+def test_backoff():
+    policy = RetryPolicy(backoff_factor=1, max_backoff=5, jitter=False)
+    assert [policy.backoff(i) for i in range(1, 5)] == [1, 2, 4, 5]
+    assert RetryPolicy(backoff_factor=1).backoff(3) <= 4
+
+
+def test_retry_delay_limits():
+    policy = RetryPolicy(max_attempts=3, jitter=False, total_timeout=2)
+    assert policy.retry_delay(1, 0) == 0.5
+    assert policy.retry_delay(1, 0, retry_after=1.5) == 1.5
+    assert policy.retry_delay(1, 1.8) is None
+    assert policy.retry_delay(3, 0) is None
+
+
+def test_retries_server_errors(mock_transport):
+    transport = mock_transport(
+        [
+            (503, b"<html>down</html>", {}),
+            (429, {"code": 1, "error": "slow down"}, {"Retry-After": "3"}),
+            (200, {"url": "ok"}, {}),
+        ]
+    )
+    client, sleeps = make_client(transport)
+    res = client.post(URL, data={"a": "b"})
+    assert res.status_code == 200
+    assert sleeps == [0.5, 3]
+
+
+def test_gives_up_after_max_attempts(mock_transport):
+    transport = mock_transport([(502, b"", {})])
+    client, sleeps = make_client(transport, max_attempts=2)
+    res = client.get(URL)
+    assert res.status_code == 502
+    assert len(transport.requests) == 2
+    with pytest.raises(ServerError) as e:
+        check_response(res)
+    assert e.value.retryable
+    assert e.value.status_code == 502
+
+
+def test_connection_errors(mock_transport):
+    transport = mock_transport([requests.ConnectionError("reset")])
+    client, sleeps = make_client(transport)
+    with pytest.raises(SXCUConnectionError) as e:
+        client.get(URL)
+    assert e.value.retryable
+    assert len(transport.requests) == 3
+    assert sleeps == [0.5, 1.0]
+
+
+def test_file_is_rewound(mock_transport):
+    seen = []
+
+    def reply(status):
+        def _reply(request):
+            seen.append(request.body)
+            return (status, {}, {})
+
+        return _reply
+
+    transport = mock_transport([reply(500), reply(200)])
+    client, _ = make_client(transport)
+    fileobj = io.BytesIO(b"image-bytes")
+    client.post(URL, files={"file": fileobj})
+    assert len(seen) == 2
+    assert b"image-bytes" in seen[0]
+    assert b"image-bytes" in seen[1]
+
+
+def test_unseekable_body_is_not_retried(mock_transport):
+    def chunks():
+        yield b"data"
+
+    assert not RewindableBody({"data": chunks()}).rewindable
+    assert RewindableBody({"files": {"file": ("a.png", io.BytesIO())}}).rewindable
+
+    transport = mock_transport([(500, b"", {})])
+    client, _ = make_client(transport)
+    client.post(URL, data=chunks())
+    assert len(transport.requests) == 1
+
+
+class Response:
+    def __init__(self, status_code, body, headers=None):
+        self.status_code = status_code
+        self.text = body
+        self.content = body.encode()
+        self.headers = headers or {}
+
+    def json(self):
+        import json
+
+        return json.loads(self.text)
+
+
+def test_structured_errors():
+    with pytest.raises(ClientError) as e:
+        check_response(Response(400, '{"code": 3, "error": "Invalid token"}'))
+    assert e.value.error_code == 3
+    assert e.value.status_code == 400
+    assert not e.value.retryable
+    assert str(e.value) == "Invalid token"
+
+    with pytest.raises(RateLimitError) as e:
+        check_response(
+            Response(429, '{"code": 1, "error": "x"}', {"Retry-After": "12"})
+        )
+    assert e.value.retry_after == 12
+    assert e.value.retryable
+    assert isinstance(e.value, SXCUError)
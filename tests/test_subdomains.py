@@ -0,0 +1,68 @@
+from sxcu import SXCU
+from sxcu.__client__ import RequestClient
+from sxcu.subdomains import Subdomain, SubdomainDirectory
+
+SUBDOMAINS = [
+    {"domain": "sxcu.net", "upload_count": 500, "public": True, "img_views": 9},
+    {"domain": "Big.is-ne.at", "upload_count": 900, "public": True, "img_views": 1},
+    {"domain": "small.host", "upload_count": 3, "public": False, "img_views": 0},
+]
+
+
+class Clock:
+    now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_client(mock_transport):
+    transport = mock_transport([(200, SUBDOMAINS, {})])
+    client = RequestClient(transport=transport, rate_limiter=False, retry=False)
+    return SXCU(request_client=client), transport
+
+
+def test_directory(mock_transport):
+    sxcu, transport = make_client(mock_transport)
+    clock = Clock()
+    directory = SubdomainDirectory(sxcu, ttl=60, clock=clock)
+    assert directory.get("big.is-ne.at") == Subdomain("Big.is-ne.at", 900, True, 1)
+    assert directory.get("missing") is None
+    assert "SXCU.NET" in directory and len(directory) == 3
+    assert [s.domain for s in directory.top(2)] == ["Big.is-ne.at", "sxcu.net"]
+    assert [s.upload_count for s in directory] == [900, 500, 3]
+    assert len(transport.requests) == 1
+    clock.now += 61
+    directory.top(1)
+    assert len(transport.requests) == 2
+
+
+def test_directory_disk_cache(mock_transport, tmp_path):
+    sxcu, transport = make_client(mock_transport)
+    path = tmp_path / "cache" / "subdomains.json"
+    clock = Clock()
+    SubdomainDirectory(sxcu, cache_path=path, clock=clock).top()
+    other = SubdomainDirectory(sxcu, cache_path=path, clock=clock)
+    assert other.get("small.host").public is False
+    assert len(transport.requests) == 1
+    other.invalidate()
+    assert not path.exists()
+    other.top()
+    assert len(transport.requests) == 2
+
+
+def test_list_subdomain_keeps_all_fields(mock_transport):
+    sxcu, transport = make_client(mock_transport)
+    assert len(sxcu.list_subdomain()) == 3
+    assert sxcu.list_subdomain(1) == [
+        {"domain": b"sxcu.net", "upload_count": 500, "public": True, "img_views": 9}
+    ]
+    assert sxcu.subdomains() is sxcu.subdomains()
+    assert sxcu.subdomains().entries(1) == [SUBDOMAINS[0]]
+    assert len(transport.requests) == 1
+
+    # fields unknown to the directory are returned too.
+    transport.responses = [(200, [dict(SUBDOMAINS[0], new_field="x")], {})]
+    sxcu.subdomains().invalidate()
+    assert sxcu.list_subdomain()[0]["new_field"] == b"x"
+    assert len(transport.requests) == 2
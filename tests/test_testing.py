@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+import requests
+
+from sxcu.__client__ import RequestClient
+from sxcu.exceptions import SXCUError
+from sxcu.og_properties import OGProperties
+from sxcu.ratelimit import RateLimiter
+from sxcu.retry import RetryPolicy
+from sxcu.testing import FakeSXCU
+
+
+@pytest.fixture
+def fake():
+    with FakeSXCU(seed=1) as server:
+        yield server
+
+
+def test_upload_meta_delete(fake):
+    sxcu = fake.client()
+    result = sxcu.upload_file(
+        fileobj=b"png data", filename="a.png", og_properties=OGProperties(title="t")
+    )
+    assert result["url"].startswith(fake.url)
+    (entry,) = fake.files.values()
+    assert entry["data"] == b"png data"
+    assert entry["og_properties"]["title"] == "t"
+    assert requests.get(result["url"]).content == b"png data"
+
+    meta = sxcu.file_meta(file_url=result["url"])
+    assert meta["size"] == 8
+    assert meta["views"] == 1
+    assert sxcu.delete_image(result["del_url"])
+    assert not fake.files
+    assert not sxcu.delete_image(result["del_url"])
+    with pytest.raises(SXCUError):
+        sxcu.file_meta(entry["id"])
+
+
+def test_links_collections_text(fake):
+    sxcu = fake.client()
+    link = sxcu.create_link("https://example.com")
+    assert list(fake.links.values()) == ["https://example.com"]
+    assert link["url"].startswith(fake.url)
+
+    collection = sxcu.create_collection("title", private=True)
+    assert collection["collection_token"]
+    with pytest.raises(SXCUError):
+        sxcu.upload_file(fileobj=b"x", collection=collection["collection_id"])
+    sxcu.upload_file(
+        fileobj=b"x",
+        collection=collection["collection_id"],
+        collection_token=collection["collection_token"],
+    )
+    meta = sxcu.collection_meta(collection["collection_id"])
+    assert meta["title"] == "title"
+    assert len(meta["files"]) == 1
+
+    assert [s.domain for s in sxcu.subdomains()] == ["sxcu.net"]
+    assert sxcu.upload_text("hello")["url"].startswith(fake.url)
+    assert list(fake.pastes.values()) == ["hello"]
+
+
+def test_rate_limit(fake):
+    fake.rate_limits["links"] = (2, 60.0)
+    session = requests.Session()
+    url = fake.url + "/api/links/create"
+    first = session.post(url, data={"link": "https://example.com"})
+    assert first.headers["X-RateLimit-Bucket"] == "links"
+    assert first.headers["X-RateLimit-Limit"] == "2"
+    assert first.headers["X-RateLimit-Remaining"] == "1"
+    assert float(first.headers["X-RateLimit-Reset-After"]) > 59
+    session.post(url, data={"link": "https://example.com"})
+    limited = session.post(url, data={"link": "https://example.com"})
+    assert limited.status_code == 429
+    assert limited.json()["code"] == 429
+    assert len(fake.links) == 2
+
+    # the client waits for the window to reset instead of being refused.
+    fake.rate_limits["links"] = (1, 0.3)
+    sxcu = fake.client()
+    for _ in range(3):
+        sxcu.create_link("https://example.com")
+    assert len(fake.links) == 5
+
+
+def test_injected_faults_are_retried(fake):
+    fake.errors = {503: 0.3}
+    fake.drop_rate = 0.1
+    retry = RetryPolicy(max_attempts=10, backoff_factor=0.001, jitter=False)
+    sxcu = fake.client(
+        request_client=RequestClient(rate_limiter=RateLimiter(), retry=retry)
+    )
+    fake.rate_limits = None
+    for _ in range(10):
+        sxcu.upload_file(fileobj=b"x", filename="a.txt")
+    assert len(fake.files) == 10
+    assert fake.faults[503] and fake.faults["drop"]
+    assert fake.requests["POST upload_file"] == 10 + sum(fake.faults.values())
+
+
+def test_async_client(fake):
+    from sxcu import AsyncSXCU
+
+    async def main():
+        async with fake.client(AsyncSXCU) as sxcu:
+            result = await sxcu.upload_file(fileobj=b"data", filename="a.png")
+            return result, await sxcu.file_meta(file_url=result["url"])
+
+    result, meta = asyncio.run(main())
+    assert meta["size"] == 4
+    assert result["url"].split("/")[-1] in fake.files
@@ -0,0 +1,115 @@
+import io
+import struct
+import zlib
+
+import pytest
+
+from sxcu import SXCU
+from sxcu.__client__ import RequestClient
+from sxcu.transforms import StripMetadata, TransformPipeline
+
+
+def png_chunk(chunk_type, data):
+    crc = zlib.crc32(chunk_type + data)
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", crc)
+
+
+IHDR = png_chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0))
+IDAT = png_chunk(b"IDAT", zlib.compress(b"\x00\xff\x00\x00"))
+IEND = png_chunk(b"IEND", b"")
+ICCP = png_chunk(b"iCCP", b"profile\x00\x00" + b"p" * 300)
+PNG = b"".join(
+    [
+        b"\x89PNG\r\n\x1a\n",
+        IHDR,
+        png_chunk(b"tEXt", b"Software\x00capture" + b"x" * 1000),
+        ICCP,
+        IDAT,
+        png_chunk(b"eXIf", b"MM\x00*" + b"e" * 500),
+        IEND,
+    ]
+)
+STRIPPED_PNG = b"\x89PNG\r\n\x1a\n" + IHDR + IDAT + IEND
+
+
+def jpeg_segment(marker, data):
+    return bytes([0xFF, marker]) + struct.pack(">H", len(data) + 2) + data
+
+
+APP0 = jpeg_segment(0xE0, b"JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00")
+APP2 = jpeg_segment(0xE2, b"ICC_PROFILE\x00" + b"i" * 200)
+DQT = jpeg_segment(0xDB, b"\x00" + b"\x01" * 64)
+SCAN = jpeg_segment(0xDA, b"\x01\x01\x00\x00\x3f\x00") + b"\x12\xff\x00\x34\xff\xd9"
+JPEG = b"".join(
+    [
+        b"\xff\xd8",
+        APP0,
+        jpeg_segment(0xE1, b"Exif\x00\x00" + b"e" * 2000),
+        APP2,
+        jpeg_segment(0xFE, b"a comment"),
+        DQT,
+        SCAN,
+    ]
+)
+
+
+def chunked(data, size):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 64, 100_000])
+def test_strip_png(size):
+    assert b"".join(StripMetadata()(chunked(PNG, size))) == STRIPPED_PNG
+    kept = b"".join(StripMetadata(keep_icc=True)(chunked(PNG, size)))
+    assert kept == b"\x89PNG\r\n\x1a\n" + IHDR + ICCP + IDAT + IEND
+
+
+@pytest.mark.parametrize("size", [1, 5, 64, 100_000])
+def test_strip_jpeg(size):
+    stripped = b"".join(StripMetadata()(chunked(JPEG, size)))
+    assert stripped == b"\xff\xd8" + APP0 + DQT + SCAN
+    kept = b"".join(StripMetadata(keep_icc=True)(chunked(JPEG, size)))
+    assert kept == b"\xff\xd8" + APP0 + APP2 + DQT + SCAN
+
+
+@pytest.mark.parametrize("data", [b"", b"\x89P", b"GIF89a" + b"x" * 100, PNG[:30]])
+def test_other_files_unchanged(data):
+    assert b"".join(StripMetadata()(chunked(data, 7))) == data
+
+
+def test_pipeline_stats(tmp_path):
+    path = tmp_path / "shot.png"
+    path.write_bytes(PNG)
+    reported = []
+    pipeline = TransformPipeline(StripMetadata(), on_stats=reported.append)
+    result, stats = pipeline.apply(path)
+    assert result.read() == STRIPPED_PNG
+    assert stats == ("shot.png", len(PNG), len(STRIPPED_PNG))
+    assert stats.saved == len(PNG) - len(STRIPPED_PNG)
+    pipeline.apply(io.BytesIO(JPEG), "a.jpg")
+    assert [s.filename for s in reported] == ["shot.png", "a.jpg"]
+    assert pipeline.saved == reported[0].saved + reported[1].saved
+    assert pipeline.key == "strip-metadata"
+
+
+def test_upload_transformed(mock_transport, tmp_path):
+    bodies = []
+
+    def respond(request):
+        bodies.append(request.body.read())
+        return 200, {"url": "https://sxcu.net/a", "del_url": "d"}, {}
+
+    transport = mock_transport([respond])
+    sxcu = SXCU(
+        request_client=RequestClient(transport=transport, rate_limiter=False),
+        transforms=TransformPipeline(StripMetadata()),
+    )
+    path = tmp_path / "shot.png"
+    path.write_bytes(PNG)
+    sxcu.upload_file(path)
+    assert STRIPPED_PNG in bodies[0]
+    assert b"tEXt" not in bodies[0]
+    assert b'filename="shot.png"' in bodies[0]
+    assert "Transfer-Encoding" not in transport.requests[0].headers
+    sxcu.upload_file(path, transforms=TransformPipeline())
+    assert PNG in bodies[1]
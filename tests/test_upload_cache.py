@@ -0,0 +1,128 @@
+import hashlib
+import io
+import multiprocessing
+import os
+
+import pytest
+
+from sxcu import SXCU
+from sxcu.__client__ import RequestClient
+from sxcu.og_properties import OGProperties
+from sxcu.upload_cache import UploadCache, content_hash
+
+CONTENT = b"avatar" * 50_000
+DIGEST = hashlib.sha256(CONTENT).hexdigest()
+
+
+def test_content_hash(tmp_path):
+    path = tmp_path / "a.png"
+    path.write_bytes(CONTENT)
+    assert content_hash(path) == (DIGEST, len(CONTENT))
+    assert content_hash(str(path)) == (DIGEST, len(CONTENT))
+    assert content_hash(memoryview(CONTENT)) == (DIGEST, len(CONTENT))
+    fileobj = io.BytesIO(b"xx" + CONTENT)
+    fileobj.read(2)
+    assert content_hash(fileobj) == (DIGEST, len(CONTENT))
+    assert fileobj.tell() == 2
+    assert content_hash(iter([CONTENT])) is None
+    empty = tmp_path / "empty"
+    empty.write_bytes(b"")
+    assert content_hash(empty) == (hashlib.sha256().hexdigest(), 0)
+    if hasattr(os, "mkfifo"):
+        os.mkfifo(tmp_path / "fifo")
+        assert content_hash(tmp_path / "fifo") is None
+
+
+def _put(path, key):
+    UploadCache(path).put(key, "sha", 1, {"url": "https://sxcu.net/" + key})
+
+
+def test_cache_shared_between_processes(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = UploadCache(path)
+    processes = [
+        multiprocessing.Process(target=_put, args=(path, str(i))) for i in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert len(cache) == 4
+    assert cache.get("2") == {"url": "https://sxcu.net/2"}
+    assert cache.evict_url("https://sxcu.net/2") == 1
+    assert cache.get("2") is None
+
+
+def test_cache_max_age(tmp_path):
+    cache = UploadCache(tmp_path / "cache.sqlite", max_age=-1)
+    cache.put("k", "sha", 1, {"url": "u"})
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+@pytest.fixture
+def client(mock_transport, tmp_path):
+    counter = iter(range(100))
+
+    def respond(request):
+        if "/files/create" in request.url:
+            file_id = next(counter)
+            return (
+                200,
+                {
+                    "url": f"https://sxcu.net/{file_id}",
+                    "del_url": f"https://sxcu.net/api/files/delete/{file_id}/t",
+                    "thumb": "",
+                },
+                {},
+            )
+        if request.url.endswith("/files/0"):
+            return 404, {"error": "Invalid file ID", "code": 1}, {}
+        return 200, {"id": "1"}, {}
+
+    transport = mock_transport([respond])
+    sxcu = SXCU(
+        request_client=RequestClient(transport=transport, rate_limiter=False),
+        upload_cache=UploadCache(tmp_path / "cache.sqlite"),
+    )
+    return sxcu, transport
+
+
+def test_upload_file_uses_cache(client, tmp_path):
+    sxcu, transport = client
+    path = tmp_path / "a.png"
+    path.write_bytes(CONTENT)
+    first = sxcu.upload_file(path)
+    assert sxcu.upload_file(fileobj=io.BytesIO(CONTENT)) == first
+    assert sxcu.upload_file(fileobj=CONTENT, filename="b.png") == first
+    assert len(transport.requests) == 1
+
+    # different options or self destructing uploads aren't shared
+    assert sxcu.upload_file(path, noembed=True) != first
+    assert sxcu.upload_file(path, og_properties=OGProperties(title="a")) != first
+    sxcu.upload_file(path, self_destruct=True)
+    sxcu.upload_file(path, self_destruct=True)
+    assert len(transport.requests) == 5
+    assert len(sxcu.upload_cache) == 3
+
+
+def test_cache_keyed_by_token(client):
+    sxcu, transport = client
+    first = sxcu.upload_file(fileobj=CONTENT)
+    sxcu.upload_token = "other"
+    assert sxcu.upload_file(fileobj=CONTENT) != first
+    public = sxcu.upload_file(fileobj=CONTENT, collection="c")
+    assert sxcu.upload_file(fileobj=CONTENT, collection="c", collection_token="t") != (
+        public
+    )
+    assert len(transport.requests) == 4
+
+
+def test_cache_eviction(client):
+    sxcu, transport = client
+    first = sxcu.upload_file(fileobj=b"one")
+    second = sxcu.upload_file(fileobj=b"two")
+    assert sxcu.upload_cache.validate(sxcu) == 1  # files/0 was deleted
+    assert sxcu.upload_file(fileobj=b"one") != first
+    assert sxcu.delete_image(second["del_url"])
+    assert sxcu.upload_file(fileobj=b"two") != second